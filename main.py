@@ -5,6 +5,7 @@ from pychess_ai.chessai import ChessAi
 from timeit import default_timer as timer
 import chess
 import logging
+import sys
 
 from pychess_ai.evaluator.evaluator import Evaluator
 
@@ -144,4 +145,20 @@ def main():
 
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        from pychess_ai import bench
+
+        sys.exit(bench.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "analyse":
+        from pychess_ai import analysis
+
+        sys.exit(analysis.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "tournament":
+        from pychess_ai import tournament
+
+        sys.exit(tournament.main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "uci":
+        from pychess_ai import uci
+
+        sys.exit(uci.main())
     main()
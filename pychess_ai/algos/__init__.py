@@ -1,3 +1,18 @@
 from .base import BaseChessAlgo, Algo
+from .limits import SearchAborted, SearchLimits
+from .timeman import TimeManager
+from .stats import IterationStats, SearchStats
+from .ordering import MoveOrderer
+from .searchboard import SearchBoard
+from .transposition import (
+    Bound,
+    TTEntry,
+    TranspositionTable,
+    PackedTranspositionTable,
+    SharedTranspositionTable,
+    zobrist_key,
+)
+from .persistent import MappedEvalCache, MappedTranspositionTable, open_cache
 from .minimax import MiniMax
 from .minimaxab import MiniMaxABP
+from .negamaxpvs import NegaMaxPVS
@@ -2,6 +2,7 @@
 from abc import ABC, abstractmethod
 from collections import deque
 from enum import Enum
+from pychess_ai.algos.ordering import gives_check
 from pychess_ai.evaluator import Evaluator
 import chess
 
@@ -11,6 +12,7 @@ class Algo(Enum):
 
     ABP = 0
     NO_ABP = 1
+    PVS = 2
 
 
 class BaseChessAlgo(ABC):
@@ -29,26 +31,19 @@ class BaseChessAlgo(ABC):
         board: chess.Board, only_checks_caps: bool = False
     ) -> deque:
         # Let's make a move deque to sort it so checks and captures are front of the list
-        # Also going to make a hokey dictionary for storing capture moves...since there's a generate function
-        # Honestly not sure if that generate function is quick...
         legal_moves = deque()
-        capture_moves = set()
+        capture_moves = []
+        quiet_moves = []
 
-        # Generate a list of all legal moves to play in this position
-        legal_moves_list = board.generate_legal_moves()
-        capture_move_list = board.generate_legal_captures()
-
-        for move in capture_move_list:
-            legal_moves.append(move)
-            capture_moves.add(move)
-
-        for move in legal_moves_list:
-            # Going to do a quick check if the move creates check
-            board.push(move)
-            if board.is_check():
+        for move in board.generate_legal_moves():
+            # Worked out from the attack tables, no push and pop needed
+            if gives_check(board, move):
                 legal_moves.appendleft(move)
-            else:
-                if move not in capture_moves and only_checks_caps is False:
-                    legal_moves.append(move)
-            board.pop()
+            elif board.is_capture(move):
+                capture_moves.append(move)
+            elif only_checks_caps is False:
+                quiet_moves.append(move)
+
+        legal_moves.extend(capture_moves)
+        legal_moves.extend(quiet_moves)
         return legal_moves
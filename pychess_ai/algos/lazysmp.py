@@ -0,0 +1,86 @@
+from pychess_ai.algos.limits import SearchLimits
+from pychess_ai.algos.searchboard import SearchBoard
+from pychess_ai.algos.transposition import SharedTranspositionTable
+import chess
+import multiprocessing
+
+
+def _run_helper(
+    algo_class: type,
+    options: dict,
+    fen: str,
+    color_to_play: chess.Color,
+    table: SharedTranspositionTable,
+    stop_event,
+    index: int,
+) -> None:
+    """Body of a helper process: search the same position until told to stop,
+    everything useful it finds ends up in the shared table"""
+    # The shared table replaces whatever the constructor builds, so keep
+    # that one as small as it goes rather than allocating a full size table
+    algo = algo_class(0, tt_size=1, **options)
+    algo._tt = table
+    algo._tt_deeper_cutoffs = True
+    algo._stop_event = stop_event
+    # Every other helper runs a ply ahead of the main search, and each one
+    # starts the root moves at a different spot so they don't all walk the
+    # same tree in the same order
+    algo._root_rotation = index
+    board = SearchBoard(fen)
+    algo._evaluator.set_position(board)
+    algo._iterative_deepening(
+        board, color_to_play, SearchLimits(), start_depth=index % 2
+    )
+
+
+class LazySMP:
+    """Helper processes for Lazy SMP
+
+    Each helper runs its own iterative deepening search of the root position,
+    slightly out of step with the others. None of them talk to each other
+    except through the shared transposition table, which is enough for the
+    main search to pick up their results as cutoffs and hash moves.
+    """
+
+    def __init__(
+        self,
+        helpers: int,
+        table: SharedTranspositionTable,
+        algo_class: type,
+        options: dict,
+    ):
+        self._helpers = helpers
+        self._algo_class = algo_class
+        self._options = options
+        self._table = table
+        self._context = multiprocessing.get_context()
+        self._stop_event = self._context.Event()
+        self._processes = []
+
+    def start(self, board: chess.Board, color_to_play: chess.Color) -> None:
+        self.stop()
+        self._stop_event.clear()
+        fen = board.fen()
+        for index in range(1, self._helpers + 1):
+            process = self._context.Process(
+                target=_run_helper,
+                args=(
+                    self._algo_class,
+                    self._options,
+                    fen,
+                    color_to_play,
+                    self._table,
+                    self._stop_event,
+                    index,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+
+    def stop(self) -> None:
+        """Stop the helpers and wait for them to go away"""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join()
+        self._processes = []
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class SearchLimits:
+    """When an iterative deepening search should give up
+
+    Anything left as None isn't limited. With nothing set the search keeps
+    going until it hits MAX_SEARCH_DEPTH or someone calls stop() on the algo.
+    """
+
+    time_limit: Optional[float] = None  # seconds of wall-clock time
+    max_nodes: Optional[int] = None
+    max_depth: Optional[int] = None
+
+
+class SearchAborted(Exception):
+    """Raised inside the search to unwind once a limit has been hit"""
+
+    pass
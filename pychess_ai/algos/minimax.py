@@ -1,15 +1,42 @@
 from pychess_ai.algos import BaseChessAlgo
+from pychess_ai.algos.stats import IterationStats, SearchStats
+from timeit import default_timer as timer
 import chess
 
 
 class MiniMax(BaseChessAlgo):
     def __init__(self, depth: int):
         super().__init__(depth)
+        self._nodes = 0
+        self._stats = SearchStats()
+
+    @property
+    def nodes(self) -> int:
+        """Nodes visited by the last search"""
+        return self._nodes
+
+    @property
+    def last_stats(self) -> SearchStats:
+        """What the last search did, see SearchStats"""
+        return self._stats
 
     def get_next_move(
         self, board: chess.Board, color_to_play: chess.Color
     ) -> chess.Move:
-        return self._minimax_root_node(board, color_to_play)
+        self._nodes = 0
+        start = timer()
+        cache_hits = self._evaluator.cache_hits
+        cache_misses = self._evaluator.cache_misses
+        move = self._minimax_root_node(board, color_to_play)
+        elapsed = timer() - start
+        self._stats = SearchStats(
+            nodes=self._nodes,
+            cache_hits=self._evaluator.cache_hits - cache_hits,
+            cache_misses=self._evaluator.cache_misses - cache_misses,
+            time=elapsed,
+            iterations=[IterationStats(self._depth, self._nodes, elapsed)],
+        )
+        return move
 
     def _minimax_root_node(
         self, board: chess.Board, color_to_play: chess.Color
@@ -49,8 +76,9 @@ class MiniMax(BaseChessAlgo):
         is_maximizing: bool,
         color_to_play: chess.Color,
     ) -> float:
+        self._nodes += 1
         if depth == 0 or board.is_checkmate():
-            return self._evaluator.evaluate(board, num_moves, color_to_play)
+            return self._evaluator.evaluate_score(board, num_moves, color_to_play)
 
         # Generate a list of all legal moves to play in this position
         legal_moves = board.generate_legal_moves()
@@ -1,19 +1,146 @@
-from dataclasses import dataclass
-from collections import deque
 from pychess_ai.algos import BaseChessAlgo
-from pychess_ai.evaluator import EvalReturnType
+from pychess_ai.algos.lazysmp import LazySMP
+from pychess_ai.algos.limits import SearchAborted, SearchLimits
+from pychess_ai.algos.ordering import (
+    MAX_PLY,
+    MoveOrderer,
+    delta_prunable,
+    gives_check,
+)
+from pychess_ai.algos.parallel import RootSplitter
+from pychess_ai.algos.persistent import open_cache
+from pychess_ai.algos.searchboard import SearchBoard
+from pychess_ai.algos.stats import IterationStats, SearchStats
+from pychess_ai.algos.tablebase import WDL_SCORES, open_tablebase, probe_root
+from pychess_ai.algos.transposition import (
+    MATE_THRESHOLD,
+    Bound,
+    PackedTranspositionTable,
+    SharedTranspositionTable,
+    TranspositionTable,
+    zobrist_key,
+)
+from pychess_ai.evaluator import EvalReturnType, Evaluator
+from typing import Callable, Optional
+from timeit import default_timer as timer
 import chess
 import logging
+import threading
 
 
 class MiniMaxABP(BaseChessAlgo):
     BASE_ALPHA_VAL = -99999
     BASE_BETA_VAL = 99999
+    MAX_SEARCH_DEPTH = 64
+    # How many nodes go by between looks at the clock
+    TIME_CHECK_INTERVAL = 1024
+    # Times in a row the quiescence search will answer a check with all moves
+    QUIESCENCE_CHECK_LIMIT = 2
+    # Skip captures that can't raise the score to alpha even with this extra
+    DELTA_MARGIN = 20.0
+    # Width of the window used to test a move against a bound, scores are
+    # floats so this just needs to be smaller than any real difference
+    NULL_WINDOW = 1e-3
+    # Null move pruning, passing still beats beta searched this much shallower
+    NULL_MOVE_MIN_DEPTH = 2
+    NULL_MOVE_REDUCTION = 2
+    # Late move reductions, quiet moves from this far down the list get
+    # searched a ply shallower, two plies from LMR_DEEP_MOVES on
+    LMR_MIN_DEPTH = 2
+    LMR_MIN_MOVES = 3
+    LMR_DEEP_MOVES = 8
+    # How far the static eval has to be from the window, by remaining depth,
+    # before quiet moves are assumed not to get it back
+    FUTILITY_MARGINS = (0.0, 20.0, 40.0)
 
-    def __init__(self, depth: int, log_level=logging.INFO):
+    def __init__(
+        self,
+        depth: int,
+        log_level=logging.INFO,
+        tt_size: int = TranspositionTable.DEFAULT_SIZE,
+        workers: int = 1,
+        lazy_smp: int = 0,
+        null_move: bool = False,
+        lmr: bool = False,
+        futility: bool = False,
+        syzygy_path: Optional[str] = None,
+        syzygy_pieces: int = 5,
+        cache_dir: Optional[str] = None,
+    ):
         super().__init__(depth)
         self._logger = logging.getLogger("MiniMaxABP")
         self._logger.setLevel(log_level)
+        if workers > 1 and lazy_smp > 0:
+            raise ValueError("Pick either root splitting or Lazy SMP, not both")
+        # Lazy SMP helpers only talk to us through the table, so it has to
+        # live in shared memory
+        self._smp = None
+        # A cache directory keeps the table and evaluations in files that
+        # outlive us, every process opening it shares the same entries
+        self._cache_dir = cache_dir
+        if cache_dir is not None:
+            self._tt, self._eval_cache = open_cache(
+                cache_dir,
+                tt_size,
+                {"null_move": null_move, "lmr": lmr, "futility": futility},
+            )
+            self._evaluator = Evaluator(cache=self._eval_cache)
+        elif lazy_smp > 0:
+            self._tt = SharedTranspositionTable(tt_size)
+        else:
+            # Packed so the memory it takes is known up front and small
+            self._tt = PackedTranspositionTable(None, tt_size)
+        # Using entries searched deeper than we need makes results depend on
+        # search order, fine once other processes are filling the table anyway
+        self._tt_deeper_cutoffs = lazy_smp > 0
+        self._root_rotation = 0
+        # Selective search, each one trades exactness for depth so they can
+        # be switched on separately to see what they're worth
+        self._null_move = null_move
+        self._lmr = lmr
+        self._futility = futility
+        # Syzygy tables get probed instead of searched once there are at most
+        # syzygy_pieces pieces left, the files are opened once per process
+        self._tablebase = open_tablebase(syzygy_path) if syzygy_path else None
+        self._syzygy_pieces = syzygy_pieces
+        # Everything a worker or helper process needs to search the same way
+        self._search_options = {
+            "null_move": null_move,
+            "lmr": lmr,
+            "futility": futility,
+            "syzygy_path": syzygy_path,
+            "syzygy_pieces": syzygy_pieces,
+            "cache_dir": cache_dir,
+        }
+        if lazy_smp > 0:
+            self._smp = LazySMP(lazy_smp, self._tt, type(self), self._search_options)
+        self._orderer = MoveOrderer()
+        self._stop_event = threading.Event()
+        self._nodes = 0
+        self._node_limit = float("inf")
+        self._deadline = float("inf")
+        self._completed_depth = None
+        self._root_best_move = None
+        self._result = None
+        # What the last search expected to happen, as (color_to_play, result,
+        # keys of the positions down its line), and what of it is left for
+        # the search running now if the game went that way
+        self._expected = None
+        self._expected_result = None
+        # Game ply of the root the killers and history were last lined up
+        # with, cleared or aged
+        self._tables_ply = None
+        self._stats = SearchStats()
+        self._on_iteration = None
+        # Triangular principal variation table, row ply holds the best line
+        # found from that ply down, filled in place so nothing gets allocated
+        self._pv = [[None] * MAX_PLY for _ in range(MAX_PLY)]
+        self._pv_length = [0] * MAX_PLY
+        # More than one worker splits the root moves over a process pool,
+        # which only gets started the first time we search
+        self._workers = workers
+        self._tt_size = tt_size
+        self._splitter = None
 
     @staticmethod
     def make_eval_string(board: chess.Board, move_list: list):
@@ -25,108 +152,566 @@ class MiniMaxABP(BaseChessAlgo):
             board.pop()
         return eval_string
 
+    @property
+    def nodes(self) -> int:
+        """Nodes visited by the last (or current) search"""
+        return self._nodes
+
+    @property
+    def completed_depth(self) -> Optional[int]:
+        """Deepest iteration the last search finished, None if not even one"""
+        return self._completed_depth
+
+    @property
+    def last_stats(self) -> SearchStats:
+        """What the last search did, see SearchStats"""
+        return self._stats
+
+    @property
+    def last_result(self) -> Optional[EvalReturnType]:
+        """Best move, score and principal variation of the last finished
+        iteration, None if the last search didn't finish one"""
+        return self._result
+
+    def stop(self) -> None:
+        """Ask a running search to wrap up, safe to call from any thread"""
+        self._stop_event.set()
+        if self._splitter is not None:
+            self._splitter.stop()
+
+    def close(self) -> None:
+        """Shut down the worker processes if we started any and unmap the
+        cache files"""
+        if self._splitter is not None:
+            self._splitter.close()
+            self._splitter = None
+        if self._smp is not None:
+            self._smp.stop()
+            self._smp = None
+            self._tt.close()
+        elif self._cache_dir is not None:
+            self._tt.close()
+        if self._cache_dir is not None:
+            self._eval_cache.close()
+
     def get_next_move(
+        self,
+        board: chess.Board,
+        color_to_play: chess.Color,
+        limits: Optional[SearchLimits] = None,
+        on_iteration: Optional[
+            Callable[[int, EvalReturnType, int, float], None]
+        ] = None,
+        reuse_tables: bool = False,
+    ) -> chess.Move:
+        """Best move for color_to_play
+
+        Args:
+            board (chess.Board): Position to search, left as it was afterwards
+            color_to_play (chess.Color): Side we're finding a move for
+            limits (SearchLimits): Iterative deepening limits, None for one
+                search at the depth the algo was made with
+            on_iteration: Called with (depth, result, nodes, seconds) every
+                time an iteration finishes, from the searching thread
+            reuse_tables (bool): Carry on from earlier searches instead of
+                starting cold, see _follow_expected_line
+        """
+        self._on_iteration = on_iteration
+        # Whatever is still in the table from before gives way to this search
+        self._tt.new_search()
+        if reuse_tables:
+            self._follow_expected_line(board, color_to_play)
+        else:
+            # A table on disk is there to be reused, it never gets cleared
+            if self._cache_dir is None:
+                self._tt.clear()
+            self._orderer.clear()
+            self._expected_result = None
+        self._tables_ply = board.ply()
+        self._stop_event.clear()
+        self._nodes = 0
+        self._stats = SearchStats()
+        start = timer()
+        cache_hits = self._evaluator.cache_hits
+        cache_misses = self._evaluator.cache_misses
+
+        move = self._tablebase_root_move(board, color_to_play)
+        if move is None:
+            move = self._search(board, color_to_play, limits)
+        self._remember_line(board, color_to_play)
+
+        self._stats.nodes = self._nodes
+        self._stats.time = timer() - start
+        self._stats.cache_hits = self._evaluator.cache_hits - cache_hits
+        self._stats.cache_misses = self._evaluator.cache_misses - cache_misses
+        return move
+
+    def _remember_line(self, board: chess.Board, color_to_play: chess.Color) -> None:
+        """Keep the principal variation just found for the next search"""
+        result = self._result
+        if result is None:
+            # Nothing new to expect, whatever the last search that finished
+            # said still stands
+            return
+        search_board = SearchBoard.from_board(board)
+        keys = [search_board.zobrist_hash()]
+        for move in result.line:
+            if not search_board.is_legal(move):
+                break
+            search_board.push(move)
+            keys.append(search_board.zobrist_hash())
+        self._expected = (color_to_play, result, keys)
+
+    def _follow_expected_line(
         self, board: chess.Board, color_to_play: chess.Color
+    ) -> None:
+        """Get ready to search a position further on in the same game
+
+        The transposition table is kept, its entries from earlier searches
+        just give way to new ones (see TranspositionTable). The killers and
+        history get aged rather than cleared, by the plies from the root
+        they were last lined up with to this one, so a search that got
+        stopped (say a ponder miss) doesn't get them aged twice. If the game
+        followed the last finished search's principal variation, the rest
+        of it is what gets searched first: the next move on it goes first at
+        the root and the moves after it are in the table as hash moves, and
+        its score is where PVS centres its first window.
+        """
+        self._expected_result = None
+        if self._expected is not None:
+            color, result, keys = self._expected
+            key = zobrist_key(board)
+            if key in keys:
+                played = keys.index(key)
+                line = result.line[played:]
+                if line and color == color_to_play and played % 2 == 0:
+                    self._expected_result = EvalReturnType(
+                        move=line[0], eval=result.eval, line=line
+                    )
+                    self._seed_line(board, line)
+
+        plies = 2 if self._tables_ply is None else board.ply() - self._tables_ply
+        if plies < 0:
+            # Back to earlier in the game (or another one), start again
+            self._orderer.clear()
+        elif plies > 0:
+            self._orderer.age(plies)
+
+    def _seed_line(self, board: chess.Board, line: list) -> None:
+        """Make sure every position down line has its move as the hash move.
+        Entries only get added where the table has no move, at depth 0 so
+        they can never cause a cutoff (every node that probes the table has
+        depth left), they just hand out the move."""
+        search_board = SearchBoard.from_board(board)
+        for move in line:
+            if not search_board.is_legal(move):
+                break
+            key = search_board.zobrist_hash()
+            entry = self._tt.probe(key)
+            if entry is None or entry.move is None:
+                self._tt.store(key, 0, 0.0, Bound.UPPER, move)
+            search_board.push(move)
+
+    def _search(
+        self,
+        board: chess.Board,
+        color_to_play: chess.Color,
+        limits: Optional[SearchLimits],
+    ) -> chess.Move:
+        start_depth = 0
+        if limits is None:
+            # Plain fixed depth search, just the one iteration
+            limits = SearchLimits(max_depth=self._depth)
+            start_depth = self._depth
+        if self._smp is None:
+            return self._iterative_deepening(board, color_to_play, limits, start_depth)
+
+        self._smp.start(board, color_to_play)
+        try:
+            return self._iterative_deepening(board, color_to_play, limits, start_depth)
+        finally:
+            self._smp.stop()
+
+    def _iterative_deepening(
+        self,
+        board: chess.Board,
+        color_to_play: chess.Color,
+        limits: SearchLimits,
+        start_depth: int = 0,
     ) -> chess.Move:
-        return self._minimaxabp_root_node(board, color_to_play)
+        """Search one ply deeper at a time until a limit is hit
+
+        The best move of each finished iteration gets searched first in the
+        next one, and if an iteration gets cut off we fall back to the last
+        one that finished.
+        """
+        # The search itself runs on its own SearchBoard, made once up here
+        if not isinstance(board, SearchBoard):
+            board = SearchBoard.from_board(board)
+        start = timer()
+        self._node_limit = (
+            limits.max_nodes if limits.max_nodes is not None else float("inf")
+        )
+        self._deadline = (
+            start + limits.time_limit if limits.time_limit is not None else float("inf")
+        )
+        max_depth = (
+            limits.max_depth if limits.max_depth is not None else self.MAX_SEARCH_DEPTH
+        )
+        self._completed_depth = None
+        root_length = len(board.move_stack)
+        best_move = None
+        result = None
+        # While an iteration runs this holds the one before it, to begin with
+        # whatever the last search expected from here if there's anything
+        self._result = self._expected_result
+        first_move = (
+            self._expected_result.move if self._expected_result is not None else None
+        )
+        self._evaluator.set_position(board)
+
+        for depth in range(start_depth, max_depth + 1):
+            self._root_best_move = None
+            iteration_start = timer()
+            iteration_nodes = self._nodes
+            try:
+                best_move = self._minimaxabp_root_node(
+                    board, color_to_play, depth, best_move or first_move
+                )
+                result = self._result
+            except SearchAborted:
+                # Put the board back the way we got it
+                while len(board.move_stack) > root_length:
+                    self._evaluator.pop(board)
+                if best_move is None:
+                    best_move = self._root_best_move
+                break
+            self._completed_depth = depth
+            self._stats.iterations.append(
+                IterationStats(
+                    depth, self._nodes - iteration_nodes, timer() - iteration_start
+                )
+            )
+            if self._on_iteration is not None:
+                self._on_iteration(depth, self._result, self._nodes, timer() - start)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(
+                    "Depth: {}, Move: {}, Nodes: {}, Time: {:.3f}".format(
+                        depth, best_move, self._nodes, timer() - start
+                    )
+                )
+            # Told to stop between iterations, no point starting another
+            if self._stop_event.is_set():
+                break
+
+        # Only hand out the result of an iteration that finished
+        self._result = result
+        if best_move is None:
+            # Didn't even finish one root move, anything legal beats nothing
+            best_move = next(iter(board.legal_moves), None)
+        return best_move
+
+    def _check_limits(self) -> None:
+        self._nodes += 1
+        if self._nodes >= self._node_limit or self._stop_event.is_set():
+            raise SearchAborted()
+        if self._nodes % self.TIME_CHECK_INTERVAL == 0 and timer() >= self._deadline:
+            raise SearchAborted()
 
     def _minimaxabp_root_node(
-        self, board: chess.Board, color_to_play: chess.Color
+        self,
+        board: chess.Board,
+        color_to_play: chess.Color,
+        depth: Optional[int] = None,
+        first_move: Optional[chess.Move] = None,
     ) -> chess.Move:
         """Root for minimax"""
+        if depth is None:
+            depth = self._depth
+        if self._workers > 1:
+            return self._parallel_root_node(board, color_to_play, depth, first_move)
 
-        best_move = ""
+        # Stays None with no legal moves, same as PVS and the root splitter
+        best_move = None
         best_eval = -99999
-        best_eval_object = None
-
-        # Generate a list of all legal moves
-        legal_moves = self.generate_check_capture_move_list_order(board)
 
-        # We also start as the maximizing player as we are making the move
-        is_maximizing = True
+        # Generate a list of all legal moves, last iteration's best goes first
+        legal_moves = self._root_moves(board, first_move)
 
         # let's step through each legal move
-        while legal_moves:
-            move = legal_moves.popleft()
-            if is_maximizing:
-                board.push(move)
-                eval = self._minimaxabp_sub_nodes(
-                    board,
-                    self._depth,
-                    0,
-                    not is_maximizing,
-                    self.BASE_ALPHA_VAL,
-                    self.BASE_BETA_VAL,
-                    color_to_play,
-                )
-                board.pop()
+        for move in legal_moves:
+            # Anything that can't beat the best move so far can fail low
+            eval = self._search_root_move(
+                board, move, depth, max(self.BASE_ALPHA_VAL, best_eval), color_to_play
+            )
+            if self._logger.isEnabledFor(logging.DEBUG):
                 self._logger.debug(
                     "Move: {}, Eval: {}, Line: {}".format(
-                        board.san(eval.move),
-                        eval.eval,
-                        self.make_eval_string(board, eval.line),
+                        board.san(move),
+                        eval,
+                        self.make_eval_string(board, self._child_line(move)),
                     )
                 )
-                if eval.eval > best_eval:
-                    best_eval = eval.eval
-                    best_eval_object = eval
-                    best_move = eval.move
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+                self._root_best_move = best_move
+                self._set_root_line(move)
 
+        self._result = EvalReturnType(
+            move=best_move, eval=best_eval, line=self._pv[0][: self._pv_length[0]]
+        )
         return best_move
 
+    def _root_moves(self, board: chess.Board, first_move: Optional[chess.Move]) -> list:
+        """Root moves in the order to search them, first_move up front unless
+        this is a Lazy SMP helper that starts somewhere else on purpose"""
+        legal_moves = self._orderer.order_moves(board, 0, first_move)
+        if self._root_rotation and legal_moves:
+            rotation = self._root_rotation % len(legal_moves)
+            legal_moves = legal_moves[rotation:] + legal_moves[:rotation]
+        return legal_moves
+
+    def _child_line(self, move: chess.Move) -> list:
+        """Line found under a root move that was just searched"""
+        return [move] + self._pv[1][1 : self._pv_length[1]]
+
+    def _set_root_line(self, move: chess.Move) -> None:
+        pv = self._pv[0]
+        pv[0] = move
+        child_length = self._pv_length[1]
+        pv[1:child_length] = self._pv[1][1:child_length]
+        self._pv_length[0] = max(child_length, 1)
+
+    def _search_root_move(
+        self,
+        board: chess.Board,
+        move: chess.Move,
+        depth: int,
+        alpha: float,
+        color_to_play: chess.Color,
+    ) -> float:
+        """Play one root move and search the reply, we start as the
+        maximizing player as we are making the move"""
+        self._evaluator.push(board, move)
+        eval = self._minimaxabp_sub_nodes(
+            board,
+            depth,
+            0,
+            False,
+            alpha,
+            self.BASE_BETA_VAL,
+            color_to_play,
+        )
+        self._evaluator.pop(board)
+        return eval
+
+    def _parallel_root_node(
+        self,
+        board: chess.Board,
+        color_to_play: chess.Color,
+        depth: int,
+        first_move: Optional[chess.Move],
+    ) -> chess.Move:
+        """Same as the serial root but with the root moves spread over
+        worker processes, picks the same move the serial search would"""
+        if self._splitter is None:
+            self._splitter = RootSplitter(
+                self._workers, self._tt_size, type(self), self._search_options
+            )
+
+        legal_moves = self._orderer.order_moves(board, 0, first_move)
+        # Best (score, index) so far, ties go to the move searched first serially
+        best = [None]
+        self._result = None
+
+        def on_result(index: int, score: float, nodes: int, line: list) -> None:
+            self._nodes += nodes
+            if best[0] is None or (score, -index) > best[0]:
+                best[0] = (score, -index)
+                self._root_best_move = legal_moves[index]
+                self._result = EvalReturnType(
+                    move=legal_moves[index], eval=score, line=line
+                )
+
+        def should_stop() -> bool:
+            return (
+                self._stop_event.is_set()
+                or self._nodes >= self._node_limit
+                or timer() >= self._deadline
+            )
+
+        self._splitter.search(
+            board,
+            legal_moves,
+            depth,
+            color_to_play,
+            self.BASE_ALPHA_VAL,
+            on_result,
+            should_stop,
+        )
+        return self._root_best_move
+
     def _minimaxabp_sub_nodes(
         self,
         board: chess.Board,
         depth: int,
         num_moves: int,
         is_maximizing: bool,
-        alpha: int,
-        beta: int,
+        alpha: float,
+        beta: float,
         color_to_play: chess.Color,
-    ) -> EvalReturnType:
-        if board.is_checkmate():
-            return self._evaluator.evaluate(board, num_moves, color_to_play)
+    ) -> float:
+        self._check_limits()
+        ply = num_moves + 1
+        # The line from here is empty until some move improves on it
+        self._pv_length[ply] = ply
 
         if depth == 0:
-            return self._evaluator.evaluate(board, num_moves, color_to_play)
-            # return self._quiescence_search(board, alpha, beta, num_moves, color_to_play)
+            return self._quiescence_search(
+                board,
+                alpha,
+                beta,
+                num_moves,
+                is_maximizing,
+                color_to_play,
+                self.QUIESCENCE_CHECK_LIMIT,
+            )
+        tablebase_score = self._probe_tablebase(board, num_moves)
+        if tablebase_score is not None:
+            return tablebase_score if is_maximizing else -tablebase_score
+        key = board.zobrist_hash()
 
-        # Set the eval to either very large negative of very large positive
-        best_eval = None
-        if is_maximizing:
-            best_move = -99999
-        else:
-            best_move = 99999
+        # Check if we've already searched this position through another move order
+        tt_move = None
+        entry = self._tt.probe(key)
+        if entry is not None:
+            tt_move = entry.move
+            # Normally only trust entries searched to exactly this depth, that
+            # way the result doesn't depend on which transposition got there first
+            if entry.depth == depth or (
+                self._tt_deeper_cutoffs and entry.depth > depth
+            ):
+                score, bound = self._score_from_tt(
+                    entry.score, entry.bound, ply, is_maximizing
+                )
+                if (
+                    bound == Bound.EXACT
+                    or (bound == Bound.LOWER and score >= beta)
+                    or (bound == Bound.UPPER and score <= alpha)
+                ):
+                    return score
+        alpha_orig = alpha
+        beta_orig = beta
 
-        # Let's make a move deque to sort it so checks and captures are front of the list
-        # Also going to make a hokey dictionary for storing capture moves...since there's a generate function
-        # Honestly not sure if that generate function is quick...
-        legal_moves = self.generate_check_capture_move_list_order(board)
+        in_check = board.is_check()
+        static_eval = None
+        if (self._futility or self._null_move) and not in_check:
+            static_eval = self._evaluator.evaluate_score(
+                board, num_moves, color_to_play, key
+            )
+        futile = False
+        if self._futility and static_eval is not None:
+            pruned = self._futility_prune(
+                static_eval, depth, is_maximizing, alpha, beta
+            )
+            if pruned is not None:
+                return pruned
+            futile = self._is_futile(static_eval, depth, is_maximizing, alpha, beta)
 
-        # let's step through each legal move
-        while legal_moves:
-            move = legal_moves.popleft()
+        if self._null_move_allowed(board, depth, in_check) and (
+            static_eval >= beta if is_maximizing else static_eval <= alpha
+        ):
+            # Let the other side move twice, if we're still doing well enough
+            # a real move surely would be too
+            self._evaluator.push(board, chess.Move.null())
+            null_depth = max(depth - 1 - self.NULL_MOVE_REDUCTION, 0)
             if is_maximizing:
-                board.push(move)
                 eval = self._minimaxabp_sub_nodes(
                     board,
-                    depth - 1,
+                    null_depth,
                     num_moves + 1,
-                    not is_maximizing,
-                    alpha,
+                    False,
+                    beta - self.NULL_WINDOW,
                     beta,
                     color_to_play,
                 )
-                if eval.eval > best_move:
-                    best_move = eval.eval
-                    best_eval = eval
-                board.pop()
-                alpha = max(alpha, best_move)
-                if beta <= alpha:
-                    break
-
             else:
-                board.push(move)
+                eval = self._minimaxabp_sub_nodes(
+                    board,
+                    null_depth,
+                    num_moves + 1,
+                    True,
+                    alpha,
+                    alpha + self.NULL_WINDOW,
+                    color_to_play,
+                )
+            self._evaluator.pop(board)
+            # Return the bound rather than the score, a mate found after
+            # passing isn't a real mate
+            if is_maximizing and eval >= beta:
+                return beta
+            if not is_maximizing and eval <= alpha:
+                return alpha
+
+        # Whatever was best last time we were here goes first, then captures,
+        # checks, killers and the rest by history
+        legal_moves = self._orderer.order_moves(board, ply, tt_move)
+        if not legal_moves:
+            # Checkmate or stalemate, nothing to store
+            if in_check:
+                return self._evaluator.evaluate_score(
+                    board, num_moves, color_to_play, key
+                )
+            return 0.0
+
+        # Set the eval to either very large negative of very large positive
+        best_node_move = None
+        if is_maximizing:
+            best_move = -99999
+        else:
+            best_move = 99999
+
+        # let's step through each legal move
+        for index, move in enumerate(legal_moves):
+            reduction = 0
+            if index > 0 and (futile or self._lmr) and not in_check:
+                quiet = self._is_quiet(board, move)
+                if futile and quiet:
+                    continue
+                if quiet:
+                    reduction = self._late_move_reduction(
+                        board, move, depth, index, ply
+                    )
+
+            self._evaluator.push(board, move)
+            search_full = True
+            if reduction:
+                # Late quiet moves hardly ever matter, check that this one
+                # doesn't with a shallower null window search first
+                if is_maximizing:
+                    eval = self._minimaxabp_sub_nodes(
+                        board,
+                        depth - 1 - reduction,
+                        num_moves + 1,
+                        False,
+                        alpha,
+                        alpha + self.NULL_WINDOW,
+                        color_to_play,
+                    )
+                    search_full = eval > alpha
+                else:
+                    eval = self._minimaxabp_sub_nodes(
+                        board,
+                        depth - 1 - reduction,
+                        num_moves + 1,
+                        True,
+                        beta - self.NULL_WINDOW,
+                        beta,
+                        color_to_play,
+                    )
+                    search_full = eval < beta
+            if search_full:
                 eval = self._minimaxabp_sub_nodes(
                     board,
                     depth - 1,
@@ -136,73 +721,264 @@ class MiniMaxABP(BaseChessAlgo):
                     beta,
                     color_to_play,
                 )
-                if eval.eval < best_move:
-                    best_move = eval.eval
-                    best_eval = eval
-                board.pop()
+            self._evaluator.pop(board)
+            if is_maximizing:
+                if eval > best_move:
+                    best_move = eval
+                    best_node_move = move
+                    self._update_pv(ply, move)
+                alpha = max(alpha, best_move)
+            else:
+                if eval < best_move:
+                    best_move = eval
+                    best_node_move = move
+                    self._update_pv(ply, move)
                 beta = min(beta, best_move)
-                if beta <= alpha:
-                    break
+            if beta <= alpha:
+                self._stats.beta_cutoffs += 1
+                if index == 0:
+                    self._stats.first_move_cutoffs += 1
+                self._orderer.record_cutoff(board, move, ply, depth)
+                break
 
-        # print(alpha, beta)
-        return best_eval
+        if best_move <= alpha_orig:
+            bound = Bound.UPPER
+        elif best_move >= beta_orig:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        score, bound = self._score_to_tt(best_move, bound, is_maximizing)
+        self._tt.store(key, depth, score, bound, best_node_move, ply)
+
+        return best_move
+
+    def _in_tablebase(self, board: chess.Board) -> bool:
+        return (
+            self._tablebase is not None
+            and not board.castling_rights
+            and chess.popcount(board.occupied) <= self._syzygy_pieces
+        )
+
+    def _probe_tablebase(self, board: chess.Board, num_moves: int) -> Optional[float]:
+        """Exact score for the side to move if the tablebases have the
+        position, None otherwise. Quicker wins score higher, same as mates."""
+        if not self._in_tablebase(board):
+            return None
+        wdl = self._tablebase.get_wdl(board)
+        if wdl is None:
+            return None
+        score = WDL_SCORES[wdl]
+        if score > 0:
+            return score - num_moves
+        if score < 0:
+            return score + num_moves
+        return score
+
+    def _tablebase_root_move(
+        self, board: chess.Board, color_to_play: chess.Color
+    ) -> Optional[chess.Move]:
+        """Pick the move straight out of the tablebases, no search needed"""
+        if not self._in_tablebase(board):
+            return None
+        probe = probe_root(self._tablebase, board)
+        if probe is None:
+            return None
+        move, wdl = probe
+        score = WDL_SCORES[wdl]
+        if board.turn != color_to_play:
+            score = -score
+        self._completed_depth = 0
+        self._result = EvalReturnType(move=move, eval=score, line=[move])
+        return move
+
+    def _null_move_allowed(
+        self, board: chess.Board, depth: int, in_check: bool
+    ) -> bool:
+        """Passing is only a fair test when it's legal, wasn't just done, and
+        the side to move has pieces besides pawns. In pawn endings zugzwang
+        is common enough that passing would often be the best move."""
+        return (
+            self._null_move
+            and depth >= self.NULL_MOVE_MIN_DEPTH
+            and not in_check
+            and bool(board.move_stack and board.move_stack[-1])
+            and bool(board.occupied_co[board.turn] & ~(board.pawns | board.kings))
+        )
+
+    def _futility_prune(
+        self,
+        static_eval: float,
+        depth: int,
+        is_maximizing: bool,
+        alpha: float,
+        beta: float,
+    ) -> Optional[float]:
+        """Reverse futility pruning, near the leaves a static eval that's
+        already way past the window can be returned as is"""
+        if depth >= len(self.FUTILITY_MARGINS):
+            return None
+        margin = self.FUTILITY_MARGINS[depth]
+        if is_maximizing and beta < MATE_THRESHOLD and static_eval - margin >= beta:
+            return static_eval - margin
+        if (
+            not is_maximizing
+            and alpha > -MATE_THRESHOLD
+            and static_eval + margin <= alpha
+        ):
+            return static_eval + margin
+        return None
+
+    def _is_futile(
+        self,
+        static_eval: float,
+        depth: int,
+        is_maximizing: bool,
+        alpha: float,
+        beta: float,
+    ) -> bool:
+        """Whether the static eval is so far short of the window that quiet
+        moves at this node can be skipped"""
+        if depth >= len(self.FUTILITY_MARGINS):
+            return False
+        margin = self.FUTILITY_MARGINS[depth]
+        if is_maximizing:
+            return alpha > -MATE_THRESHOLD and static_eval + margin <= alpha
+        return beta < MATE_THRESHOLD and static_eval - margin >= beta
+
+    def _is_quiet(self, board: chess.Board, move: chess.Move) -> bool:
+        """Not a capture, promotion or check"""
+        return (
+            not move.promotion
+            and self._orderer.capture_victim(board, move) is None
+            and not gives_check(board, move)
+        )
+
+    def _late_move_reduction(
+        self, board: chess.Board, move: chess.Move, depth: int, index: int, ply: int
+    ) -> int:
+        """Plies to take off a quiet move searched index'th at this node"""
+        if (
+            not self._lmr
+            or depth < self.LMR_MIN_DEPTH
+            or index < self.LMR_MIN_MOVES
+            or move in self._orderer.killers(ply)
+        ):
+            return 0
+        reduction = 2 if index >= self.LMR_DEEP_MOVES else 1
+        return min(reduction, depth - 1)
+
+    def _update_pv(self, ply: int, move: chess.Move) -> None:
+        """move is the best at ply so far, so the line here is move followed
+        by the line the child just found"""
+        pv = self._pv[ply]
+        pv[ply] = move
+        child_length = self._pv_length[ply + 1]
+        pv[ply + 1 : child_length] = self._pv[ply + 1][ply + 1 : child_length]
+        self._pv_length[ply] = max(child_length, ply + 1)
+
+    @staticmethod
+    def _score_to_tt(score: float, bound: Bound, is_maximizing: bool):
+        """Our scores are from the root's point of view, the table wants the
+        side to move's, so flip the score and bound on minimizing nodes"""
+        if is_maximizing:
+            return score, bound
+        if bound == Bound.LOWER:
+            bound = Bound.UPPER
+        elif bound == Bound.UPPER:
+            bound = Bound.LOWER
+        return -score, bound
+
+    @staticmethod
+    def _score_from_tt(score: float, bound: Bound, ply: int, is_maximizing: bool):
+        score = TranspositionTable.score_from_tt(score, ply)
+        return MiniMaxABP._score_to_tt(score, bound, is_maximizing)
 
     def _quiescence_search(
         self,
         board: chess.Board,
-        alpha: int,
-        beta: int,
+        alpha: float,
+        beta: float,
         num_moves: int,
+        is_maximizing: bool,
         color_to_play: chess.Color,
-    ) -> EvalReturnType:
-        eval = self._evaluator.evaluate(board, num_moves, color_to_play)
-
-        # if board.is_check() is False:
-        #     if eval.eval >= beta:
-        #         return EvalReturnType(
-        #             move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-        #             eval=beta,
-        #             line=board.move_stack[len(board.move_stack) - (num_moves + 1) :],
-        #         )
-        #     if eval.eval > alpha:
-        #         alpha = eval.eval
-
-        # if board.is_check():
-        #     legal_moves = deque(board.generate_legal_moves())
-        # else:
-        #     legal_moves = self.generate_check_capture_move_list_order(board, True)
-
-        if eval.eval >= beta:
-            return EvalReturnType(
-                move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-                eval=beta,
-                line=board.move_stack[len(board.move_stack) - (num_moves + 1) :],
+        checks_left: int,
+    ) -> float:
+        """Keep searching captures past the horizon until things are quiet
+
+        Same minimax convention as _minimaxabp_sub_nodes. The side to move
+        can always stand pat on the static eval unless it's in check, in which
+        case every evasion gets searched, but only checks_left more times down
+        this line so perpetual checks can't blow the search up.
+        """
+        self._check_limits()
+        self._stats.quiescence_nodes += 1
+        ply = num_moves + 1
+        self._pv_length[ply] = ply
+        in_check = board.is_check()
+
+        if in_check and checks_left > 0 and ply < MAX_PLY - 1:
+            moves = [(0, move) for move in self._orderer.order_moves(board, ply)]
+            if not moves:
+                return self._evaluator.evaluate_score(board, num_moves, color_to_play)
+            stand_pat = None
+            checks_left -= 1
+            best = -99999 if is_maximizing else 99999
+        else:
+            stand_pat = self._evaluator.evaluate_score(
+                board, num_moves, color_to_play, board.zobrist_hash()
             )
-        if eval.eval > alpha:
-            alpha = eval.eval
+            if ply >= MAX_PLY - 1:
+                return stand_pat
+            # Doing nothing is good enough
+            if is_maximizing:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            best = stand_pat
+            # Legality gets checked as moves come up, in check it's easier
+            # to let python-chess generate the evasions
+            moves = self._orderer.order_captures(board, pseudo_legal=not in_check)
 
-        legal_moves = self.generate_check_capture_move_list_order(board, True)
+        for see, move in moves:
+            # Delta pruning, even winning the exchange outright plus a margin
+            # can't get the score back inside the window
+            if stand_pat is not None:
+                if is_maximizing:
+                    hopeless = stand_pat + see + self.DELTA_MARGIN <= alpha
+                else:
+                    hopeless = stand_pat - see - self.DELTA_MARGIN >= beta
+                if hopeless and delta_prunable(board, move):
+                    continue
+                # Only moves that made it this far get checked for legality
+                if not in_check and board.is_into_check(move):
+                    continue
 
-        while legal_moves:
-            next_move = legal_moves.popleft()
-            board.push(next_move)
+            self._evaluator.push(board, move)
             eval = self._quiescence_search(
-                board, -beta, -alpha, num_moves + 1, color_to_play
+                board,
+                alpha,
+                beta,
+                num_moves + 1,
+                not is_maximizing,
+                color_to_play,
+                checks_left,
             )
-            # negate the eval as a part of quiescence_search
-            eval.eval = eval.eval * -1.0
-            board.pop()
-            if eval.eval >= beta:
-                # print("here")
-                return EvalReturnType(
-                    move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-                    eval=beta,
-                    line=board.move_stack[len(board.move_stack) - (num_moves + 1) :],
-                )
-            if eval.eval > alpha:
-                alpha = eval.eval
-        return EvalReturnType(
-            move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-            eval=alpha,
-            line=board.move_stack[len(board.move_stack) - (num_moves + 1) :],
-        )
+            self._evaluator.pop(board)
+
+            if is_maximizing:
+                if eval > best:
+                    best = eval
+                    self._update_pv(ply, move)
+                alpha = max(alpha, best)
+            else:
+                if eval < best:
+                    best = eval
+                    self._update_pv(ply, move)
+                beta = min(beta, best)
+            if beta <= alpha:
+                break
+        return best
@@ -0,0 +1,360 @@
+from pychess_ai.algos.minimaxab import MiniMaxABP
+from pychess_ai.algos.ordering import MAX_PLY, delta_prunable
+from pychess_ai.algos.transposition import (
+    MATE_THRESHOLD,
+    Bound,
+    TranspositionTable,
+)
+from pychess_ai.evaluator import EvalReturnType
+from typing import List, Optional
+import chess
+import logging
+
+
+class NegaMaxPVS(MiniMaxABP):
+    """Negamax principal variation search with aspiration windows
+
+    Every node scores from the point of view of the side to move, so there
+    is just the one branch instead of a maximizing and a minimizing one. The
+    first move at a node gets the full window, the rest are only checked
+    against alpha with a null window and searched again properly if one of
+    them turns out better. Each iteration of the iterative deepening starts
+    with a narrow window around the last iteration's score and widens it if
+    the score falls outside.
+
+    Iterative deepening, limits, the transposition table, move ordering and
+    the worker processes all come from MiniMaxABP.
+    """
+
+    # Half a pawn either side of the last iteration's score
+    ASPIRATION_WINDOW = 5.0
+
+    def __init__(self, depth: int, log_level=logging.INFO, **kwargs):
+        super().__init__(depth, log_level=log_level, **kwargs)
+        self._logger = logging.getLogger("NegaMaxPVS")
+        self._logger.setLevel(log_level)
+
+    def _minimaxabp_root_node(
+        self,
+        board: chess.Board,
+        color_to_play: chess.Color,
+        depth: Optional[int] = None,
+        first_move: Optional[chess.Move] = None,
+    ) -> chess.Move:
+        """Root search, re-searched with a wider window until the score
+        lands inside it"""
+        if depth is None:
+            depth = self._depth
+        if self._workers > 1:
+            return self._parallel_root_node(board, color_to_play, depth, first_move)
+
+        legal_moves = self._root_moves(board, first_move)
+        alpha = self.BASE_ALPHA_VAL
+        beta = self.BASE_BETA_VAL
+        delta = self.ASPIRATION_WINDOW
+        previous = self._result
+        if previous is not None and abs(previous.eval) < MATE_THRESHOLD:
+            alpha = previous.eval - delta
+            beta = previous.eval + delta
+
+        while True:
+            best_move, best_eval = self._pvs_root(
+                board, legal_moves, depth, alpha, beta, color_to_play
+            )
+            if best_eval <= alpha and alpha > self.BASE_ALPHA_VAL:
+                delta *= 2
+                alpha = max(best_eval - delta, self.BASE_ALPHA_VAL)
+            elif best_eval >= beta and beta < self.BASE_BETA_VAL:
+                delta *= 2
+                beta = min(best_eval + delta, self.BASE_BETA_VAL)
+            else:
+                break
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(
+                    "Aspiration window missed at depth {}, now {} to {}".format(
+                        depth, alpha, beta
+                    )
+                )
+
+        self._result = EvalReturnType(
+            move=best_move, eval=best_eval, line=self._pv[0][: self._pv_length[0]]
+        )
+        return best_move
+
+    def _pvs_root(
+        self,
+        board: chess.Board,
+        legal_moves: List[chess.Move],
+        depth: int,
+        alpha: float,
+        beta: float,
+        color_to_play: chess.Color,
+    ) -> tuple:
+        """One pass over the root moves inside (alpha, beta), returns the
+        best move and its score, the score is only a bound if it ended up
+        outside the window"""
+        best_move = None
+        best_eval = -99999
+        for index, move in enumerate(legal_moves):
+            self._evaluator.push(board, move)
+            if index == 0:
+                eval = -self._negamax(board, depth, 0, -beta, -alpha, color_to_play)
+            else:
+                eval = -self._negamax(
+                    board, depth, 0, -alpha - self.NULL_WINDOW, -alpha, color_to_play
+                )
+                if alpha < eval < beta:
+                    eval = -self._negamax(board, depth, 0, -beta, -alpha, color_to_play)
+            self._evaluator.pop(board)
+            if self._logger.isEnabledFor(logging.DEBUG):
+                self._logger.debug(
+                    "Move: {}, Eval: {}, Line: {}".format(
+                        board.san(move),
+                        eval,
+                        self.make_eval_string(board, self._child_line(move)),
+                    )
+                )
+
+            if eval > best_eval:
+                best_eval = eval
+                best_move = move
+            if eval > alpha:
+                alpha = eval
+                # Only a score inside the window is worth falling back on
+                self._root_best_move = move
+                self._set_root_line(move)
+            if alpha >= beta:
+                break
+        return best_move, best_eval
+
+    def _search_root_move(
+        self,
+        board: chess.Board,
+        move: chess.Move,
+        depth: int,
+        alpha: float,
+        color_to_play: chess.Color,
+    ) -> float:
+        """Same as MiniMaxABP._search_root_move, used by the root splitter"""
+        self._evaluator.push(board, move)
+        eval = -self._negamax(
+            board, depth, 0, -self.BASE_BETA_VAL, -alpha, color_to_play
+        )
+        self._evaluator.pop(board)
+        return eval
+
+    def _side_to_move_score(
+        self,
+        board: chess.Board,
+        num_moves: int,
+        color_to_play: chess.Color,
+        key: Optional[int] = None,
+    ) -> float:
+        """Static eval flipped round to the side to move's point of view"""
+        score = self._evaluator.evaluate_score(board, num_moves, color_to_play, key)
+        return score if board.turn == color_to_play else -score
+
+    def _negamax(
+        self,
+        board: chess.Board,
+        depth: int,
+        num_moves: int,
+        alpha: float,
+        beta: float,
+        color_to_play: chess.Color,
+    ) -> float:
+        """Score of board for the side to move, fail soft"""
+        self._check_limits()
+        ply = num_moves + 1
+        self._pv_length[ply] = ply
+
+        if depth == 0:
+            return self._negamax_quiescence(
+                board,
+                alpha,
+                beta,
+                num_moves,
+                color_to_play,
+                self.QUIESCENCE_CHECK_LIMIT,
+            )
+        tablebase_score = self._probe_tablebase(board, num_moves)
+        if tablebase_score is not None:
+            return tablebase_score
+        key = board.zobrist_hash()
+
+        tt_move = None
+        entry = self._tt.probe(key)
+        if entry is not None:
+            tt_move = entry.move
+            if entry.depth == depth or (
+                self._tt_deeper_cutoffs and entry.depth > depth
+            ):
+                score = TranspositionTable.score_from_tt(entry.score, ply)
+                if (
+                    entry.bound == Bound.EXACT
+                    or (entry.bound == Bound.LOWER and score >= beta)
+                    or (entry.bound == Bound.UPPER and score <= alpha)
+                ):
+                    return score
+        alpha_orig = alpha
+
+        # Pruning is left to the null window nodes, anything still on the
+        # principal variation gets searched properly
+        in_check = board.is_check()
+        selective = beta - alpha <= self.NULL_WINDOW and not in_check
+        static_eval = None
+        if selective and (self._futility or self._null_move):
+            static_eval = self._side_to_move_score(board, num_moves, color_to_play, key)
+        futile = False
+        if self._futility and static_eval is not None:
+            # Side to move scores, so always the maximizing case
+            pruned = self._futility_prune(static_eval, depth, True, alpha, beta)
+            if pruned is not None:
+                return pruned
+            futile = self._is_futile(static_eval, depth, True, alpha, beta)
+
+        if (
+            selective
+            and self._null_move_allowed(board, depth, in_check)
+            and static_eval >= beta
+        ):
+            self._evaluator.push(board, chess.Move.null())
+            eval = -self._negamax(
+                board,
+                max(depth - 1 - self.NULL_MOVE_REDUCTION, 0),
+                num_moves + 1,
+                -beta,
+                -beta + self.NULL_WINDOW,
+                color_to_play,
+            )
+            self._evaluator.pop(board)
+            if eval >= beta:
+                return beta
+
+        legal_moves = self._orderer.order_moves(board, ply, tt_move)
+        if not legal_moves:
+            if in_check:
+                return self._side_to_move_score(board, num_moves, color_to_play, key)
+            return 0.0
+
+        best_node_move = None
+        best = -99999
+        for index, move in enumerate(legal_moves):
+            reduction = 0
+            if index > 0 and (futile or self._lmr) and not in_check:
+                quiet = self._is_quiet(board, move)
+                if futile and quiet:
+                    continue
+                if quiet:
+                    reduction = self._late_move_reduction(
+                        board, move, depth, index, ply
+                    )
+
+            self._evaluator.push(board, move)
+            if index == 0:
+                eval = -self._negamax(
+                    board, depth - 1, num_moves + 1, -beta, -alpha, color_to_play
+                )
+            else:
+                # Prove it can't beat alpha with a null window, at reduced
+                # depth first for late quiet moves, and search it properly
+                # only if that fails
+                eval = -self._negamax(
+                    board,
+                    depth - 1 - reduction,
+                    num_moves + 1,
+                    -alpha - self.NULL_WINDOW,
+                    -alpha,
+                    color_to_play,
+                )
+                if reduction and eval > alpha:
+                    eval = -self._negamax(
+                        board,
+                        depth - 1,
+                        num_moves + 1,
+                        -alpha - self.NULL_WINDOW,
+                        -alpha,
+                        color_to_play,
+                    )
+                if alpha < eval < beta:
+                    eval = -self._negamax(
+                        board, depth - 1, num_moves + 1, -beta, -alpha, color_to_play
+                    )
+            self._evaluator.pop(board)
+
+            if eval > best:
+                best = eval
+                best_node_move = move
+                self._update_pv(ply, move)
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                self._stats.beta_cutoffs += 1
+                if index == 0:
+                    self._stats.first_move_cutoffs += 1
+                self._orderer.record_cutoff(board, move, ply, depth)
+                break
+
+        if best <= alpha_orig:
+            bound = Bound.UPPER
+        elif best >= beta:
+            bound = Bound.LOWER
+        else:
+            bound = Bound.EXACT
+        self._tt.store(key, depth, best, bound, best_node_move, ply)
+        return best
+
+    def _negamax_quiescence(
+        self,
+        board: chess.Board,
+        alpha: float,
+        beta: float,
+        num_moves: int,
+        color_to_play: chess.Color,
+        checks_left: int,
+    ) -> float:
+        """Negamax flavour of MiniMaxABP._quiescence_search"""
+        self._check_limits()
+        self._stats.quiescence_nodes += 1
+        ply = num_moves + 1
+        self._pv_length[ply] = ply
+
+        in_check = board.is_check()
+        if in_check and checks_left > 0 and ply < MAX_PLY - 1:
+            moves = [(0, move) for move in self._orderer.order_moves(board, ply)]
+            if not moves:
+                return self._side_to_move_score(board, num_moves, color_to_play)
+            stand_pat = None
+            checks_left -= 1
+            best = -99999
+        else:
+            stand_pat = self._side_to_move_score(
+                board, num_moves, color_to_play, board.zobrist_hash()
+            )
+            if ply >= MAX_PLY - 1 or stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best = stand_pat
+            moves = self._orderer.order_captures(board, pseudo_legal=not in_check)
+
+        for see, move in moves:
+            if stand_pat is not None:
+                if stand_pat + see + self.DELTA_MARGIN <= alpha and delta_prunable(
+                    board, move
+                ):
+                    continue
+                # Only moves that made it this far get checked for legality
+                if not in_check and board.is_into_check(move):
+                    continue
+            self._evaluator.push(board, move)
+            eval = -self._negamax_quiescence(
+                board, -beta, -alpha, num_moves + 1, color_to_play, checks_left
+            )
+            self._evaluator.pop(board)
+
+            if eval > best:
+                best = eval
+                self._update_pv(ply, move)
+            alpha = max(alpha, best)
+            if alpha >= beta:
+                break
+        return best
@@ -0,0 +1,301 @@
+from typing import List, Optional
+import chess
+
+MAX_PLY = 128
+
+# Rough piece values just for deciding which captures to look at first
+MVV_LVA_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+    chess.KING: 10,
+}
+
+# Piece values on the evaluator's scale for static exchange evaluation
+SEE_VALUES = {
+    chess.PAWN: 10,
+    chess.KNIGHT: 30,
+    chess.BISHOP: 30,
+    chess.ROOK: 50,
+    chess.QUEEN: 90,
+    chess.KING: 1000,
+}
+
+# Ranks where a pawn of that color is a move or two from promoting. The
+# evaluator's piece square tables make one there worth up to five times
+# SEE_VALUES[PAWN], more than any delta pruning margin covers.
+ADVANCED_PAWN_RANKS = {
+    chess.WHITE: chess.BB_RANK_6 | chess.BB_RANK_7,
+    chess.BLACK: chess.BB_RANK_3 | chess.BB_RANK_2,
+}
+
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 26
+CHECK_SCORE = 1 << 25
+KILLER_SCORES = (1 << 24, (1 << 24) - 1)
+# History scores get halved once one reaches this so they stay below killers
+HISTORY_LIMIT = 1 << 20
+
+
+def attackers_through(
+    board: chess.Board, color: chess.Color, square: chess.Square, occupied: int
+) -> int:
+    """Pieces of color attacking square if only the pieces in occupied were on
+    the board, so sliders see through pieces that already got traded off"""
+    queens_and_rooks = board.queens | board.rooks
+    queens_and_bishops = board.queens | board.bishops
+    attackers = (
+        (chess.BB_KING_ATTACKS[square] & board.kings)
+        | (chess.BB_KNIGHT_ATTACKS[square] & board.knights)
+        | (
+            chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied]
+            & queens_and_rooks
+        )
+        | (
+            chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied]
+            & queens_and_rooks
+        )
+        | (
+            chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+            & queens_and_bishops
+        )
+        | (chess.BB_PAWN_ATTACKS[not color][square] & board.pawns)
+    )
+    return attackers & board.occupied_co[color] & occupied
+
+
+def gives_check(board: chess.Board, move: chess.Move) -> bool:
+    """Same answer as board.gives_check(move) without the push and pop it
+    does in python-chess 1.7: the moved piece attacking the enemy king from
+    where it lands is a direct check, anything of ours attacking the king
+    once the from square is empty is a discovered one. Castling and en
+    passant are rare enough to leave to python-chess."""
+    turn = board.turn
+    from_bb = chess.BB_SQUARES[move.from_square]
+    to_square = move.to_square
+    if board.kings & from_bb:
+        if board.occupied_co[turn] & chess.BB_SQUARES[to_square] or (
+            abs(to_square - move.from_square) == 2
+        ):
+            return board.gives_check(move)
+        piece_type = chess.KING
+    else:
+        piece_type = board.piece_type_at(move.from_square)
+        if piece_type == chess.PAWN and to_square == board.ep_square:
+            return board.gives_check(move)
+    king_mask = board.kings & board.occupied_co[not turn]
+    if not king_mask:
+        return False
+    king = chess.msb(king_mask)
+    occupied = (board.occupied & ~from_bb) | chess.BB_SQUARES[to_square]
+
+    piece_type = move.promotion or piece_type
+    if piece_type == chess.PAWN:
+        attacks = chess.BB_PAWN_ATTACKS[turn][to_square]
+    elif piece_type == chess.KNIGHT:
+        attacks = chess.BB_KNIGHT_ATTACKS[to_square]
+    elif piece_type == chess.KING:
+        # Only ever true for a pseudo legal king move next to theirs, but
+        # python-chess counts that as check too
+        attacks = chess.BB_KING_ATTACKS[to_square]
+    else:
+        attacks = 0
+        if piece_type != chess.ROOK:
+            attacks |= chess.BB_DIAG_ATTACKS[to_square][
+                chess.BB_DIAG_MASKS[to_square] & occupied
+            ]
+        if piece_type != chess.BISHOP:
+            attacks |= (
+                chess.BB_RANK_ATTACKS[to_square][
+                    chess.BB_RANK_MASKS[to_square] & occupied
+                ]
+                | chess.BB_FILE_ATTACKS[to_square][
+                    chess.BB_FILE_MASKS[to_square] & occupied
+                ]
+            )
+    if attacks & king_mask:
+        return True
+    # Nothing of ours can be attacking their king before we move, so any
+    # attacker now is one the moved piece got out of the way of
+    return bool(attackers_through(board, turn, king, occupied))
+
+
+def delta_prunable(board: chess.Board, move: chess.Move) -> bool:
+    """Whether SEE_VALUES are anywhere near what move can swing the
+    evaluation by, which isn't the case for promotions and for captures of
+    pawns about to promote"""
+    if move.promotion:
+        return False
+    advanced = board.pawns & ADVANCED_PAWN_RANKS[not board.turn]
+    return (
+        not advanced
+        & board.occupied_co[not board.turn]
+        & chess.BB_SQUARES[move.to_square]
+    )
+
+
+def static_exchange(board: chess.Board, move: chess.Move) -> int:
+    """Material won or lost by move once every capture and recapture on its
+    destination square has been played out cheapest piece first. Pins are
+    ignored, like most engines do, it only has to be good enough to order
+    and prune captures."""
+    to_square = move.to_square
+    if board.is_en_passant(move):
+        victim = chess.PAWN
+        occupied = board.occupied ^ chess.BB_SQUARES[to_square ^ 8]
+    else:
+        victim = board.piece_type_at(to_square)
+        occupied = board.occupied
+    occupied ^= chess.BB_SQUARES[move.from_square]
+
+    gain = [SEE_VALUES[victim] if victim else 0]
+    on_square = board.piece_type_at(move.from_square)
+    if move.promotion:
+        gain[0] += SEE_VALUES[move.promotion] - SEE_VALUES[chess.PAWN]
+        on_square = move.promotion
+    side = not board.turn
+
+    while True:
+        attackers = attackers_through(board, side, to_square, occupied)
+        if not attackers:
+            break
+        # Least valuable attacker goes next
+        for piece_type in chess.PIECE_TYPES:
+            cheapest = attackers & board.pieces_mask(piece_type, side)
+            if cheapest:
+                break
+        gain.append(SEE_VALUES[on_square] - gain[-1])
+        on_square = piece_type
+        occupied ^= cheapest & -cheapest
+        side = not side
+
+    # Either side can stop capturing whenever it likes
+    for index in range(len(gain) - 1, 0, -1):
+        gain[index - 1] = -max(-gain[index - 1], gain[index])
+    return gain[0]
+
+
+class MoveOrderer:
+    """Sorts moves so the ones most likely to cause a cutoff come first
+
+    Order is the hash move, then captures by most valuable victim / least
+    valuable attacker, then quiet checks, then the killer moves for this ply,
+    then everything else by how often it has caused cutoffs before (the
+    history table, indexed by from and to square).
+    """
+
+    KILLER_SLOTS = 2
+
+    def __init__(self):
+        self._killers = [[None] * self.KILLER_SLOTS for _ in range(MAX_PLY)]
+        self._history = [0] * (64 * 64)
+
+    def clear(self) -> None:
+        self._killers = [[None] * self.KILLER_SLOTS for _ in range(MAX_PLY)]
+        self._history = [0] * (64 * 64)
+
+    def age(self, plies: int = 2) -> None:
+        """Keep what the last search learned for the next one, whose root is
+        plies further into the game. Killers move up to the ply they're at
+        from the new root and history gets halved, so whatever the new
+        search finds soon counts for more."""
+        kept = self._killers[plies:]
+        self._killers = kept + [
+            [None] * self.KILLER_SLOTS for _ in range(MAX_PLY - len(kept))
+        ]
+        self._history = [value // 2 for value in self._history]
+
+    def killers(self, ply: int) -> List[Optional[chess.Move]]:
+        return self._killers[ply] if ply < MAX_PLY else [None] * self.KILLER_SLOTS
+
+    def history(self, move: chess.Move) -> int:
+        return self._history[move.from_square * 64 + move.to_square]
+
+    def order_moves(
+        self, board: chess.Board, ply: int, tt_move: Optional[chess.Move] = None
+    ) -> List[chess.Move]:
+        killers = self.killers(ply)
+        history = self._history
+
+        def score(move: chess.Move) -> int:
+            if move == tt_move:
+                return TT_MOVE_SCORE
+            victim = self.capture_victim(board, move)
+            if victim is not None or move.promotion:
+                value = CAPTURE_SCORE
+                if victim is not None:
+                    attacker = board.piece_type_at(move.from_square)
+                    value += 16 * MVV_LVA_VALUES[victim] - MVV_LVA_VALUES[attacker]
+                if move.promotion:
+                    value += 16 * MVV_LVA_VALUES[move.promotion]
+                return value
+            if gives_check(board, move):
+                return CHECK_SCORE
+            for slot, killer in enumerate(killers):
+                if move == killer:
+                    return KILLER_SCORES[slot]
+            return history[move.from_square * 64 + move.to_square]
+
+        # sort is stable so ties stay in generation order
+        return sorted(board.generate_legal_moves(), key=score, reverse=True)
+
+    def order_captures(
+        self, board: chess.Board, pseudo_legal: bool = False
+    ) -> List[tuple]:
+        """Captures and queen promotions that don't lose material, best
+        exchange first, as (see, move) pairs for the quiescence search
+
+        With pseudo_legal the moves aren't checked for leaving the king in
+        check, that's left to the caller for the moves it actually plays
+        (board.is_into_check), most of them never are.
+        """
+        if pseudo_legal:
+            moves = list(board.generate_pseudo_legal_captures())
+            generate = board.generate_pseudo_legal_moves
+        else:
+            moves = list(board.generate_legal_captures())
+            generate = board.generate_legal_moves
+        # Only bother looking for promotions with a pawn about to make one
+        seventh_rank = chess.BB_RANK_7 if board.turn == chess.WHITE else chess.BB_RANK_2
+        if board.pawns & board.occupied_co[board.turn] & seventh_rank:
+            for move in generate(board.pawns, chess.BB_RANK_1 | chess.BB_RANK_8):
+                if move.promotion == chess.QUEEN and not board.is_capture(move):
+                    moves.append(move)
+        scored = []
+        for move in moves:
+            see = static_exchange(board, move)
+            if see >= 0:
+                scored.append((see, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
+
+    @staticmethod
+    def capture_victim(board: chess.Board, move: chess.Move) -> Optional[int]:
+        """Piece type captured by move, None for quiet moves"""
+        victim = board.piece_type_at(move.to_square)
+        if victim is not None:
+            # Chess960 castling looks like the king taking its own rook
+            if board.occupied_co[board.turn] & chess.BB_SQUARES[move.to_square]:
+                return None
+            return victim
+        if board.is_en_passant(move):
+            return chess.PAWN
+        return None
+
+    def record_cutoff(
+        self, board: chess.Board, move: chess.Move, ply: int, depth: int
+    ) -> None:
+        """A move caused a beta cutoff, remember it if it was a quiet one"""
+        if move.promotion or self.capture_victim(board, move) is not None:
+            return
+        if ply < MAX_PLY:
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1:] = killers[:-1]
+                killers[0] = move
+        index = move.from_square * 64 + move.to_square
+        self._history[index] += depth * depth
+        if self._history[index] >= HISTORY_LIMIT:
+            self._history = [value // 2 for value in self._history]
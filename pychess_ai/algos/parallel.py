@@ -0,0 +1,139 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pychess_ai.algos.limits import SearchAborted
+from pychess_ai.algos.searchboard import SearchBoard
+from typing import Callable, List, Optional
+import chess
+import multiprocessing
+
+# Workers search with alpha a hair below the best score so far, that way a
+# move that ties the best still comes back with its exact score and we can
+# break the tie on move order the same way the serial search does
+TIE_MARGIN = 1e-6
+
+# How often (seconds) the main process looks at the stop conditions
+POLL_INTERVAL = 0.02
+
+# Set up once per worker process by _init_worker
+_worker_algo = None
+_shared_alpha = None
+# FEN of the root the worker last searched for, a new one starts a new
+# generation in its table
+_worker_root = None
+
+
+def _init_worker(
+    algo_class: type, options: dict, tt_size: int, shared_alpha, stop_event
+) -> None:
+    global _worker_algo, _shared_alpha
+    _worker_algo = algo_class(0, tt_size=tt_size, **options)
+    # The worker's search checks this every node, so stop() reaches us here
+    _worker_algo._stop_event = stop_event
+    _shared_alpha = shared_alpha
+
+
+def _search_root_move(
+    fen: str, move_uci: str, depth: int, color_to_play: chess.Color
+) -> Optional[tuple]:
+    """Search one root move in a worker, returns (score, nodes, line) or
+    None if the search got stopped part way through"""
+    global _worker_root
+    if fen != _worker_root:
+        # Same as get_next_move does for the main table, otherwise the last
+        # root's entries never age out of the worker's
+        _worker_algo._tt.new_search()
+        _worker_root = fen
+    board = SearchBoard(fen)
+    move = chess.Move.from_uci(move_uci)
+    alpha = _shared_alpha.value
+    if alpha > _worker_algo.BASE_ALPHA_VAL:
+        alpha -= TIE_MARGIN
+    _worker_algo._nodes = 0
+    _worker_algo._evaluator.set_position(board)
+    try:
+        score = _worker_algo._search_root_move(board, move, depth, alpha, color_to_play)
+    except SearchAborted:
+        return None
+
+    # Let everyone else prune against this one
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score, _worker_algo.nodes, _worker_algo._child_line(move)
+
+
+class RootSplitter:
+    """Searches the root moves of a position across a pool of processes
+
+    The first move is searched on its own to get a decent alpha (young
+    brothers wait), then the rest go out to the pool together. Every worker
+    starts from the best score found so far, which lives in shared memory so
+    later subtrees still get pruned.
+    """
+
+    def __init__(self, workers: int, tt_size: int, algo_class: type, options: dict):
+        context = multiprocessing.get_context()
+        self._alpha = context.Value("d", 0.0)
+        self._stop_event = context.Event()
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(algo_class, options, tt_size, self._alpha, self._stop_event),
+        )
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def close(self) -> None:
+        self._stop_event.set()
+        self._pool.shutdown(wait=True)
+
+    def search(
+        self,
+        board: chess.Board,
+        moves: List[chess.Move],
+        depth: int,
+        color_to_play: chess.Color,
+        base_alpha: float,
+        on_result: Callable[[int, float, int, list], None],
+        should_stop: Callable[[], bool],
+    ) -> None:
+        """Search every move in moves, calling on_result(index, score, nodes,
+        line) as each one finishes. Raises SearchAborted if should_stop() says
+        so before they're all done."""
+        self._alpha.value = base_alpha
+        self._stop_event.clear()
+        fen = board.fen()
+
+        def submit(index: int):
+            future = self._pool.submit(
+                _search_root_move, fen, moves[index].uci(), depth, color_to_play
+            )
+            future.index = index
+            return future
+
+        pending = {submit(0)} if moves else set()
+        queued = False
+        try:
+            while pending:
+                done, pending = wait(
+                    pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    result = future.result()
+                    if result is None:
+                        raise SearchAborted()
+                    on_result(future.index, *result)
+                if not queued and not pending:
+                    pending = {submit(index) for index in range(1, len(moves))}
+                    queued = True
+                if pending and should_stop():
+                    raise SearchAborted()
+        except SearchAborted:
+            # Tell the busy workers to give up and drop anything not started
+            self._stop_event.set()
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            self._stop_event.clear()
+            raise
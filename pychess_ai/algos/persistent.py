@@ -0,0 +1,286 @@
+from pychess_ai.algos.transposition import (
+    PACKED_ENTRY,
+    Bound,
+    PackedTranspositionTable,
+    TranspositionTable,
+    pack_entry,
+    unpack_entry,
+)
+from pychess_ai.evaluator import EVAL_VERSION, EvalCache
+from typing import Optional
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+logger = logging.getLogger("cache")
+
+# Files start with the magic, the versions they were written with, the key of
+# the search options the scores came from, how many records follow and the
+# table generation. The records are the same three words
+# PackedTranspositionTable uses.
+FILE_HEADER = struct.Struct("<8sIIQQQ")
+FILE_MAGIC = b"PYCAICHE"
+# Every layout of these files has had a magic starting with this, older ones
+# get rebuilt rather than refused
+MAGIC_PREFIX = b"PYCAICH"
+# Bump whenever the header or record layout changes
+FORMAT_VERSION = 4
+
+TT_FILE = "tt.bin"
+EVAL_FILE = "eval.bin"
+
+
+def options_key(options: dict) -> int:
+    """Key for the search options scores in a file were searched with, the
+    same in every process (unlike hash() of a string)"""
+    return zlib.crc32(repr(sorted(options.items())).encode())
+
+
+class MappedFile:
+    """Fixed record file mapped into memory
+
+    The file is created (zeroed) the first time with room for entries
+    records, after that the record count in its header wins. Every process
+    that opens the same file maps the same pages, so writes show up in the
+    others straight away and land on disk whenever the OS gets round to it.
+
+    A file written with another FORMAT_VERSION, EVAL_VERSION or options key
+    (or cut short) gets replaced by a new one, its scores can't be trusted.
+    The new file is built under a temporary name and renamed over the old
+    one, so processes that still have the old one mapped carry on with it
+    rather than having the pages cut out from under them.
+    """
+
+    def __init__(self, path: str, entries: int, options: int = 0):
+        self.path = os.path.abspath(path)
+        self.options = options
+        fd = self._open_current()
+        if fd is None:
+            fd = self._create(entries)
+        try:
+            self._map = mmap.mmap(fd, os.fstat(fd).st_size)
+        finally:
+            # The mapping keeps its own reference to the file
+            os.close(fd)
+        self.entries = FILE_HEADER.unpack_from(self._map)[4]
+        self.buffer = memoryview(self._map)[FILE_HEADER.size :]
+
+    def _open_current(self) -> Optional[int]:
+        """Descriptor of the file at path, None if there isn't one or it's
+        out of date. Raises if it isn't a cache file at all."""
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        try:
+            file_size = os.fstat(fd).st_size
+            # Empty counts as out of date too, nothing was ever written to it
+            stale = file_size == 0 or self._stale(
+                os.pread(fd, FILE_HEADER.size, 0), file_size
+            )
+        except ValueError:
+            os.close(fd)
+            raise
+        if not stale:
+            return fd
+        if file_size:
+            logger.warning("Rebuilding out of date cache file {}".format(self.path))
+        os.close(fd)
+        return None
+
+    def _create(self, entries: int) -> int:
+        """Write a zeroed file with room for entries records next to path,
+        move it into place and return its descriptor"""
+        if entries <= 0:
+            raise ValueError("Cache file needs room for at least one entry")
+        fd, temp_path = tempfile.mkstemp(
+            prefix=os.path.basename(self.path) + ".", dir=os.path.dirname(self.path)
+        )
+        try:
+            os.fchmod(fd, 0o644)
+            header = FILE_HEADER.pack(
+                FILE_MAGIC, FORMAT_VERSION, EVAL_VERSION, self.options, entries, 0
+            )
+            os.pwrite(fd, header, 0)
+            os.ftruncate(fd, FILE_HEADER.size + entries * PACKED_ENTRY.size)
+            os.replace(temp_path, self.path)
+        except OSError:
+            os.close(fd)
+            os.unlink(temp_path)
+            raise
+        return fd
+
+    def _stale(self, header: bytes, file_size: int) -> bool:
+        """Whether the file is an out of date cache file to start again,
+        raises if it isn't a cache file at all"""
+        if not header.startswith(MAGIC_PREFIX):
+            raise ValueError("{} isn't a cache file".format(self.path))
+        if len(header) < FILE_HEADER.size:
+            return True
+        magic, format_version, eval_version, options, entries, _ = FILE_HEADER.unpack(
+            header
+        )
+        return (
+            magic != FILE_MAGIC
+            or format_version != FORMAT_VERSION
+            or eval_version != EVAL_VERSION
+            or options != self.options
+            or entries <= 0
+            or file_size < FILE_HEADER.size + entries * PACKED_ENTRY.size
+        )
+
+    @property
+    def generation(self) -> int:
+        return FILE_HEADER.unpack_from(self._map)[5]
+
+    def next_generation(self, modulo: int) -> int:
+        """Move the generation in the header on one and return it. Two
+        processes doing this at once may both get the same one, which is
+        harmless."""
+        generation = (self.generation + 1) % modulo
+        FILE_HEADER.pack_into(
+            self._map,
+            0,
+            FILE_MAGIC,
+            FORMAT_VERSION,
+            EVAL_VERSION,
+            self.options,
+            self.entries,
+            generation,
+        )
+        return generation
+
+    def flush(self) -> None:
+        if self.buffer is not None:
+            self._map.flush()
+
+    def close(self) -> None:
+        """Unmap the file, safe to call more than once"""
+        if self.buffer is None:
+            return
+        self.buffer.release()
+        self.buffer = None
+        self._map.close()
+
+
+class MappedTranspositionTable(PackedTranspositionTable):
+    """Packed transposition table kept in a file
+
+    Nothing to load or save, opening the file is all it takes to pick up
+    every entry earlier searches left in it, by this process or any other.
+    Like the shared table, pickling one attaches the other side to the same
+    file rather than copying it. The generation lives in the file header,
+    so whichever process searches next moves it on for everyone and entries
+    from old runs give way to new ones.
+
+    Scores depend on how the search prunes, so options (see options_key)
+    identifies the search settings and a file written with others gets
+    started again.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = TranspositionTable.DEFAULT_SIZE,
+        options: int = 0,
+    ):
+        self._file = MappedFile(path, size, options)
+        super().__init__(self._file.buffer, self._file.entries)
+        self._generation = self._file.generation % self.GENERATIONS
+
+    def new_search(self) -> None:
+        self._generation = self._file.next_generation(self.GENERATIONS)
+
+    @property
+    def path(self) -> str:
+        return self._file.path
+
+    def __reduce__(self):
+        return (
+            MappedTranspositionTable,
+            (self._file.path, self._size, self._file.options),
+        )
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._buffer = None
+        self._file.close()
+
+
+class MappedEvalCache(EvalCache):
+    """EvalCache backed by a file of packed records
+
+    Lookups try the in-memory slots first and fall back to the file, and
+    every put goes to both. A fresh process starts with a cold memory cache
+    but gets hits out of the file from the first position on.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        file_entries: int = EvalCache.DEFAULT_ENTRIES,
+        entries: Optional[int] = None,
+        size_mb: Optional[float] = None,
+    ):
+        super().__init__(entries=entries, size_mb=size_mb)
+        self._file = MappedFile(path, file_entries)
+
+    @property
+    def path(self) -> str:
+        return self._file.path
+
+    def get(self, key: int) -> Optional[float]:
+        index = key % self._capacity
+        if self._keys[index] == key:
+            self.hits += 1
+            return self._values[index]
+        entry = unpack_entry(
+            key,
+            *PACKED_ENTRY.unpack_from(
+                self._file.buffer, (key % self._file.entries) * PACKED_ENTRY.size
+            )
+        )
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._keys[index] = key
+        self._values[index] = entry.score
+        return entry.score
+
+    def put(self, key: int, value: float) -> None:
+        super().put(key, value)
+        PACKED_ENTRY.pack_into(
+            self._file.buffer,
+            (key % self._file.entries) * PACKED_ENTRY.size,
+            *pack_entry(key, 0, value, Bound.EXACT, None)
+        )
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def open_cache(
+    cache_dir: str, tt_size: int, search_options: Optional[dict] = None
+) -> tuple:
+    """The (MappedTranspositionTable, MappedEvalCache) pair kept in
+    cache_dir, created the first time. search_options are whatever changes
+    the scores the search stores, a table written with different ones gets
+    started again (evaluations don't depend on them)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    return (
+        MappedTranspositionTable(
+            os.path.join(cache_dir, TT_FILE),
+            tt_size,
+            options_key(search_options or {}),
+        ),
+        MappedEvalCache(os.path.join(cache_dir, EVAL_FILE)),
+    )
@@ -0,0 +1,314 @@
+from chess.polyglot import POLYGLOT_RANDOM_ARRAY, ZobristHasher
+from typing import Dict, Optional, Tuple
+import chess
+
+# Polyglot keys per [color][piece_type][square], piece_type 0 is unused
+PIECE_KEYS = [
+    [
+        [0] * 64
+        if piece_type == 0
+        else [
+            POLYGLOT_RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + color) + square]
+            for square in chess.SQUARES
+        ]
+        for piece_type in range(7)
+    ]
+    # Indexed by the color, so black (False) comes first
+    for color in (chess.BLACK, chess.WHITE)
+]
+TURN_KEY = POLYGLOT_RANDOM_ARRAY[780]
+
+_hasher = ZobristHasher(POLYGLOT_RANDOM_ARRAY)
+
+# Castling part of the key by (castling rights, kings on the back ranks),
+# there are only ever a handful of these in a search
+_castling_keys: Dict[Tuple[int, int], int] = {}
+
+_BACK_RANKS = chess.BB_RANK_1 | chess.BB_RANK_8
+
+
+class _Undo:
+    """Everything push() changes, put back by restore(). Stands in for
+    python-chess's _BoardState on the board's stack, just with slots and
+    the piece part of the key."""
+
+    __slots__ = (
+        "pawns",
+        "knights",
+        "bishops",
+        "rooks",
+        "queens",
+        "kings",
+        "occupied_w",
+        "occupied_b",
+        "occupied",
+        "promoted",
+        "turn",
+        "castling_rights",
+        "ep_square",
+        "halfmove_clock",
+        "fullmove_number",
+        "piece_key",
+    )
+
+    def __init__(self, board: "SearchBoard"):
+        self.pawns = board.pawns
+        self.knights = board.knights
+        self.bishops = board.bishops
+        self.rooks = board.rooks
+        self.queens = board.queens
+        self.kings = board.kings
+        self.occupied_w = board.occupied_co[chess.WHITE]
+        self.occupied_b = board.occupied_co[chess.BLACK]
+        self.occupied = board.occupied
+        self.promoted = board.promoted
+        self.turn = board.turn
+        self.castling_rights = board.castling_rights
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.fullmove_number = board.fullmove_number
+        self.piece_key = board._piece_key
+
+    def restore(self, board: "SearchBoard") -> None:
+        board.pawns = self.pawns
+        board.knights = self.knights
+        board.bishops = self.bishops
+        board.rooks = self.rooks
+        board.queens = self.queens
+        board.kings = self.kings
+        board.occupied_co[chess.WHITE] = self.occupied_w
+        board.occupied_co[chess.BLACK] = self.occupied_b
+        board.occupied = self.occupied
+        board.promoted = self.promoted
+        board.turn = self.turn
+        board.castling_rights = self.castling_rights
+        board.ep_square = self.ep_square
+        board.halfmove_clock = self.halfmove_clock
+        board.fullmove_number = self.fullmove_number
+        board._piece_key = self.piece_key
+
+
+class SearchBoard(chess.Board):
+    """chess.Board for the inside of a search
+
+    Still a chess.Board, so the evaluator, move ordering and tablebase
+    probes work on it unchanged, but with the hot paths cut down:
+
+    * the Zobrist key is kept up to date as pieces move rather than worked
+      out from every piece on the board, see zobrist_hash()
+    * push() handles ordinary moves itself (castling and null moves still
+      go through python-chess) and saves a slotted undo record instead of
+      a _BoardState
+    * pop() is python-chess's, it just restores whatever push() saved
+
+    Build one from a chess.Board once at the root with from_board(), make
+    and unmake moves with push()/pop() and don't use it for anything else.
+    """
+
+    def __init__(self, fen: Optional[str] = chess.STARTING_FEN, *, chess960=False):
+        self._piece_key = 0
+        super().__init__(fen, chess960=chess960)
+        self._reset_piece_key()
+        # push() expects clean castling rights, python-chess only cleans
+        # them while the stack is empty
+        self.castling_rights = self.clean_castling_rights()
+
+    @classmethod
+    def from_board(cls, board: chess.Board) -> "SearchBoard":
+        """Copy of board (without its move history) to search on"""
+        search_board = cls(None, chess960=board.chess960)
+        search_board.pawns = board.pawns
+        search_board.knights = board.knights
+        search_board.bishops = board.bishops
+        search_board.rooks = board.rooks
+        search_board.queens = board.queens
+        search_board.kings = board.kings
+        search_board.occupied_co[chess.WHITE] = board.occupied_co[chess.WHITE]
+        search_board.occupied_co[chess.BLACK] = board.occupied_co[chess.BLACK]
+        search_board.occupied = board.occupied
+        search_board.promoted = board.promoted
+        search_board.turn = board.turn
+        search_board.castling_rights = board.clean_castling_rights()
+        search_board.ep_square = board.ep_square
+        search_board.halfmove_clock = board.halfmove_clock
+        search_board.fullmove_number = board.fullmove_number
+        search_board._reset_piece_key()
+        return search_board
+
+    def zobrist_hash(self) -> int:
+        """Same value as chess.polyglot.zobrist_hash(self), without the walk
+        over every piece"""
+        key = self._piece_key
+        if self.turn:
+            key ^= TURN_KEY
+        castling_rights = self.castling_rights
+        if castling_rights:
+            castling_index = (castling_rights, self.kings & _BACK_RANKS)
+            castling_key = _castling_keys.get(castling_index)
+            if castling_key is None:
+                castling_key = _hasher.hash_castling(self)
+                _castling_keys[castling_index] = castling_key
+            key ^= castling_key
+        if self.ep_square is not None:
+            key ^= _hasher.hash_ep_square(self)
+        return key
+
+    def push(self, move: chess.Move) -> None:
+        from_square = move.from_square
+        to_square = move.to_square
+        from_bb = chess.BB_SQUARES[from_square]
+        to_bb = chess.BB_SQUARES[to_square]
+        turn = self.turn
+        occupied_co = self.occupied_co
+        # Null moves, drops and castling (a king moving two files or onto
+        # its own rook) are rare, python-chess can have those
+        if (
+            not move
+            or move.drop
+            or (
+                self.kings & from_bb
+                and (occupied_co[turn] & to_bb or abs(to_square - from_square) == 2)
+            )
+        ):
+            super().push(move)
+            return
+
+        self._stack.append(_Undo(self))
+        self.move_stack.append(move)
+        ep_square = self.ep_square
+        self.ep_square = None
+        self.halfmove_clock += 1
+        if not turn:
+            self.fullmove_number += 1
+
+        keys = PIECE_KEYS
+        piece_key = self._piece_key
+        piece_type = self._piece_type_on(from_bb)
+        captured = self._piece_type_on(to_bb) if self.occupied & to_bb else None
+        capture_square = to_square
+
+        if piece_type == chess.PAWN:
+            self.halfmove_clock = 0
+            diff = to_square - from_square
+            if diff == 16 or diff == -16:
+                self.ep_square = from_square + diff // 2
+            elif to_square == ep_square and captured is None:
+                # The pawn taken en passant is behind the square moved to
+                capture_square = ep_square - 8 if turn else ep_square + 8
+                captured = chess.PAWN
+
+        if captured is not None:
+            self.halfmove_clock = 0
+            capture_bb = chess.BB_SQUARES[capture_square]
+            self._toggle(captured, capture_bb)
+            occupied_co[not turn] ^= capture_bb
+            self.occupied ^= capture_bb
+            piece_key ^= keys[not turn][captured][capture_square]
+
+        # Moving or capturing either a king or a rook off its square clears
+        # the castling rights that went with it
+        if self.castling_rights:
+            self.castling_rights &= ~from_bb & ~to_bb
+            if piece_type == chess.KING:
+                self.castling_rights &= ~(chess.BB_RANK_1 if turn else chess.BB_RANK_8)
+
+        promoted = self.promoted
+        if promoted:
+            moved_promoted = promoted & from_bb
+            promoted &= ~from_bb & ~to_bb
+            if moved_promoted:
+                promoted |= to_bb
+        if move.promotion:
+            self._toggle(piece_type, from_bb)
+            self._toggle(move.promotion, to_bb)
+            promoted |= to_bb
+            piece_key ^= keys[turn][piece_type][from_square]
+            piece_key ^= keys[turn][move.promotion][to_square]
+        else:
+            self._toggle(piece_type, from_bb | to_bb)
+            piece_key ^= keys[turn][piece_type][from_square]
+            piece_key ^= keys[turn][piece_type][to_square]
+        self.promoted = promoted
+
+        occupied_co[turn] ^= from_bb | to_bb
+        self.occupied = occupied_co[chess.WHITE] | occupied_co[chess.BLACK]
+        self._piece_key = piece_key
+        self.turn = not turn
+
+    def copy(self, *, stack=True) -> "SearchBoard":
+        board = super().copy(stack=stack)
+        board._piece_key = self._piece_key
+        return board
+
+    def _board_state(self) -> _Undo:
+        # What python-chess's own push() saves, used for the moves we hand it
+        return _Undo(self)
+
+    def _piece_type_on(self, mask: int) -> Optional[int]:
+        if self.pawns & mask:
+            return chess.PAWN
+        if self.knights & mask:
+            return chess.KNIGHT
+        if self.bishops & mask:
+            return chess.BISHOP
+        if self.rooks & mask:
+            return chess.ROOK
+        if self.queens & mask:
+            return chess.QUEEN
+        if self.kings & mask:
+            return chess.KING
+        return None
+
+    def _toggle(self, piece_type: int, mask: int) -> None:
+        """Flip mask in the bitboard for piece_type"""
+        if piece_type == chess.PAWN:
+            self.pawns ^= mask
+        elif piece_type == chess.KNIGHT:
+            self.knights ^= mask
+        elif piece_type == chess.BISHOP:
+            self.bishops ^= mask
+        elif piece_type == chess.ROOK:
+            self.rooks ^= mask
+        elif piece_type == chess.QUEEN:
+            self.queens ^= mask
+        else:
+            self.kings ^= mask
+
+    # Everything else that moves pieces around goes through these, keep the
+    # key in step with them
+
+    def _remove_piece_at(self, square: chess.Square) -> Optional[int]:
+        color = bool(self.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+        piece_type = super()._remove_piece_at(square)
+        if piece_type:
+            self._piece_key ^= PIECE_KEYS[color][piece_type][square]
+        return piece_type
+
+    def _set_piece_at(
+        self,
+        square: chess.Square,
+        piece_type: int,
+        color: chess.Color,
+        promoted: bool = False,
+    ) -> None:
+        super()._set_piece_at(square, piece_type, color, promoted)
+        self._piece_key ^= PIECE_KEYS[color][piece_type][square]
+
+    def _reset_board(self) -> None:
+        super()._reset_board()
+        self._reset_piece_key()
+
+    def _clear_board(self) -> None:
+        super()._clear_board()
+        self._piece_key = 0
+
+    def apply_transform(self, f) -> None:
+        super().apply_transform(f)
+        self._reset_piece_key()
+
+    def apply_mirror(self) -> None:
+        super().apply_mirror()
+        self._reset_piece_key()
+
+    def _reset_piece_key(self) -> None:
+        self._piece_key = _hasher.hash_board(self)
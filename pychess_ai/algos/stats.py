@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import List, NamedTuple
+
+
+class IterationStats(NamedTuple):
+    """One finished iteration of a search"""
+
+    depth: int
+    nodes: int  # visited during this iteration only
+    time: float  # seconds this iteration took
+
+
+@dataclass
+class SearchStats:
+    """What the last search did, read it from the algo's last_stats
+
+    Counters are only ever bumped where the search already does the work
+    (a node, a cutoff) so keeping them costs next to nothing.
+    """
+
+    nodes: int = 0  # every node, quiescence ones included
+    quiescence_nodes: int = 0
+    beta_cutoffs: int = 0
+    first_move_cutoffs: int = 0  # cutoffs caused by the first move searched
+    cache_hits: int = 0  # evaluator cache
+    cache_misses: int = 0
+    time: float = 0.0  # seconds for the whole search
+    iterations: List[IterationStats] = field(default_factory=list)
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        """Share of cutoffs the first move caused, a measure of how good the
+        move ordering is"""
+        if self.beta_cutoffs == 0:
+            return 0.0
+        return self.first_move_cutoffs / self.beta_cutoffs
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    @property
+    def nps(self) -> float:
+        return self.nodes / self.time if self.time > 0 else 0.0
+
+    @property
+    def branching_factor(self) -> float:
+        """Effective branching factor, how many times more nodes the last
+        iteration took than the one before. With only one iteration it's
+        the root of its node count over the plies searched."""
+        done = [iteration for iteration in self.iterations if iteration.nodes > 0]
+        if len(done) >= 2:
+            return done[-1].nodes / done[-2].nodes
+        if done:
+            # depth counts the plies below the root move
+            return done[-1].nodes ** (1.0 / (done[-1].depth + 1))
+        return 0.0
@@ -0,0 +1,61 @@
+from typing import Dict, Optional
+import chess
+import chess.syzygy
+import os
+
+# Tablebase wins rank below any mate the search actually sees, but above
+# anything the evaluator could come up with
+TB_WIN_SCORE = 5000.0
+
+# Cursed wins and blessed losses are draws under the 50 move rule
+WDL_SCORES = {2: TB_WIN_SCORE, 1: 0.0, 0: 0.0, -1: 0.0, -2: -TB_WIN_SCORE}
+
+# Open tablebases by absolute path, one set of handles per process
+_tablebases: Dict[str, chess.syzygy.Tablebase] = {}
+
+
+def open_tablebase(path: str) -> chess.syzygy.Tablebase:
+    """Open the Syzygy files in path, or hand back the ones already open"""
+    path = os.path.abspath(path)
+    tablebase = _tablebases.get(path)
+    if tablebase is None:
+        tablebase = chess.syzygy.open_tablebase(path)
+        _tablebases[path] = tablebase
+    return tablebase
+
+
+def close_tablebases() -> None:
+    for tablebase in _tablebases.values():
+        tablebase.close()
+    _tablebases.clear()
+
+
+def probe_root(tablebase, board: chess.Board) -> Optional[tuple]:
+    """Best move by the tablebases as (move, wdl), None unless every move
+    is covered
+
+    Wins are converted by the shortest distance to zeroing (and straight
+    away when the move itself zeroes), losses are dragged out as long as
+    possible.
+    """
+    best_key = None
+    best = None
+    for move in board.legal_moves:
+        zeroing = board.is_zeroing(move)
+        board.push(move)
+        mate = board.is_checkmate()
+        wdl = tablebase.get_wdl(board)
+        dtz = tablebase.get_dtz(board)
+        board.pop()
+        if wdl is None or dtz is None:
+            return None
+        # The probes are from the other side's point of view
+        wdl = -wdl
+        if wdl > 0:
+            key = (wdl, mate, zeroing, -abs(dtz))
+        else:
+            key = (wdl, mate, False, abs(dtz))
+        if best_key is None or key > best_key:
+            best_key = key
+            best = (move, wdl)
+    return best
@@ -0,0 +1,114 @@
+from pychess_ai.algos.limits import SearchLimits
+from pychess_ai.algos.transposition import MATE_THRESHOLD
+from pychess_ai.evaluator import EvalReturnType
+from typing import Optional
+
+# Without moves_to_go assume this many moves are left to play on the clock
+DEFAULT_MOVES_TO_GO = 30
+
+
+class TimeManager:
+    """How long to think about one move given the game clock
+
+    There are two budgets. The hard one is the most the move can take, the
+    search gets aborted there (it's the time limit in limits()). The soft
+    one is what an ordinary move gets, checked with should_stop() after
+    every iteration: past it, or once the next iteration couldn't finish
+    inside the hard budget anyway, there's no point starting another one.
+
+    The soft budget stretches while the best move keeps changing between
+    iterations or the score is dropping, and shrinks once the same move has
+    come out on top a few iterations running. Easy moves end up quick and
+    the time they save goes on the hard ones.
+    """
+
+    # Kept back on every move for everything that isn't searching
+    MOVE_OVERHEAD = 0.05
+    # Never more than this much of what's left on one move
+    MAX_CLOCK_FRACTION = 0.5
+    # But always this long, even flagging is better than a random move
+    MIN_TIME = 0.01
+    # The hard budget is this many soft budgets, clock permitting
+    HARD_FACTOR = 3.0
+    # Each best move change is worth this much more time, fading by half
+    # every iteration after it
+    INSTABILITY_WEIGHT = 0.5
+    # A score this much worse than the last iteration's (half a pawn) means
+    # trouble, worth looking into for longer
+    SCORE_DROP = 5.0
+    SCORE_DROP_FACTOR = 1.3
+    # The same best move this many iterations running gets the budget cut
+    STABLE_ITERATIONS = 3
+    STABLE_FACTOR = 0.5
+    # Guess at how much longer each iteration takes than the last, used
+    # until there are two to compare and clamped after that
+    DEFAULT_GROWTH = 4.0
+    GROWTH_RANGE = (1.5, 8.0)
+
+    def __init__(
+        self,
+        time_left: float,
+        increment: float = 0.0,
+        moves_to_go: Optional[int] = None,
+    ):
+        """
+        Args:
+            time_left (float): Seconds left on our clock
+            increment (float): Seconds added to it after every move
+            moves_to_go (int): Moves to play before the clock gets topped
+                up, None for the rest of the game
+        """
+        moves = moves_to_go if moves_to_go else DEFAULT_MOVES_TO_GO
+        available = max(time_left - self.MOVE_OVERHEAD, 0.0)
+        most = max(available * self.MAX_CLOCK_FRACTION, self.MIN_TIME)
+        self.soft = min(available / moves + increment / 2, most)
+        self.soft = max(self.soft, self.MIN_TIME)
+        self.hard = min(self.soft * self.HARD_FACTOR, most)
+        self._best_move = None
+        self._score = None
+        self._instability = 0.0
+        self._stable = 0
+        self._score_dropped = False
+        self._elapsed = 0.0
+        self._last_iteration = None
+
+    def limits(self, max_depth: Optional[int] = None) -> SearchLimits:
+        """Limits for the search, the hard budget as its time limit"""
+        return SearchLimits(time_limit=self.hard, max_depth=max_depth)
+
+    @property
+    def budget(self) -> float:
+        """Soft budget after everything the iterations so far said"""
+        budget = self.soft * (1.0 + self.INSTABILITY_WEIGHT * self._instability)
+        if self._score_dropped:
+            budget *= self.SCORE_DROP_FACTOR
+        if self._stable >= self.STABLE_ITERATIONS:
+            budget *= self.STABLE_FACTOR
+        return min(budget, self.hard)
+
+    def should_stop(self, result: EvalReturnType, seconds: float) -> bool:
+        """Call after every finished iteration with its result and the
+        seconds since the search started, True once it's time to play"""
+        self._instability *= 0.5
+        if self._best_move is not None:
+            if result.move != self._best_move:
+                self._instability += 1.0
+                self._stable = 0
+            else:
+                self._stable += 1
+            self._score_dropped = result.eval < self._score - self.SCORE_DROP
+        self._best_move = result.move
+        self._score = result.eval
+
+        iteration = seconds - self._elapsed
+        growth = self.DEFAULT_GROWTH
+        if self._last_iteration:
+            low, high = self.GROWTH_RANGE
+            growth = min(max(iteration / self._last_iteration, low), high)
+        self._elapsed = seconds
+        self._last_iteration = iteration
+
+        # Nothing beats a mate we've found
+        if result.eval > MATE_THRESHOLD:
+            return True
+        return seconds >= self.budget or seconds + iteration * growth > self.hard
@@ -0,0 +1,308 @@
+from enum import Enum
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+import chess
+import chess.polyglot
+import struct
+
+# Anything above this is a mate score (see Evaluator.evaluate), which needs
+# to be stored relative to the node rather than the root of the search
+MATE_THRESHOLD = 9000.0
+
+
+class Bound(Enum):
+    """What kind of score a transposition table entry holds"""
+
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+
+class TTEntry(NamedTuple):
+    key: int
+    depth: int
+    score: float
+    bound: Bound
+    move: Optional[chess.Move]
+
+
+def zobrist_key(board: chess.Board) -> int:
+    """64 bit Zobrist hash of the position (polyglot flavour)"""
+    return chess.polyglot.zobrist_hash(board)
+
+
+class TranspositionTable:
+    """Fixed size table of searched positions keyed by a 64 bit Zobrist hash
+
+    Slots are picked with key % size and the full key is kept in the entry to
+    catch index collisions. When two positions land in the same slot the one
+    searched deeper wins, so expensive subtrees aren't thrown out by leaves.
+    That only holds within one search though: every entry remembers the
+    generation (new_search() moves it on) it was stored in, and anything
+    from an earlier one gets replaced regardless of depth. Otherwise a table
+    kept between searches fills up with deep entries nobody needs any more.
+
+    Scores are stored from the point of view of the side to move at the node,
+    so the table doesn't care who we were searching for at the root.
+    """
+
+    DEFAULT_SIZE = 1 << 20
+    # Generations count round modulo this, it fits in a byte when packed
+    GENERATIONS = 256
+
+    def __init__(self, size: int = DEFAULT_SIZE):
+        if size <= 0:
+            raise ValueError("Transposition table size must be positive")
+        self._size = size
+        self._table = [None] * size
+        # Generation each slot was last written in
+        self._generations = [0] * size
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def new_search(self) -> None:
+        """Start a new generation, call before every search"""
+        self._generation = (self._generation + 1) % self.GENERATIONS
+
+    def clear(self) -> None:
+        self._table = [None] * self._size
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        entry = self._table[key % self._size]
+        if entry is not None and entry.key == key:
+            return entry
+        return None
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: float,
+        bound: Bound,
+        move: Optional[chess.Move],
+        ply: int = 0,
+    ) -> None:
+        """Save a searched node
+
+        Args:
+            key (int): Zobrist key of the position
+            depth (int): Remaining depth the node was searched to
+            score (float): Score from the side to move's point of view
+            bound (Bound): Whether the score is exact or a lower/upper bound
+            move (chess.Move): Best (or refutation) move found, None if unknown
+            ply (int): Distance from the root, used to make mate scores relative
+        """
+        index = key % self._size
+        current = self._table[index]
+        if (
+            current is not None
+            and current.key != key
+            and current.depth > depth
+            and self._generations[index] == self._generation
+        ):
+            return
+        # Keep the old best move around if this search didn't come up with one
+        if move is None and current is not None and current.key == key:
+            move = current.move
+        self._table[index] = TTEntry(
+            key, depth, self.score_to_tt(score, ply), bound, move
+        )
+        self._generations[index] = self._generation
+
+    @staticmethod
+    def score_to_tt(score: float, ply: int) -> float:
+        """Mate scores count moves from the root, convert to from the node"""
+        if score > MATE_THRESHOLD:
+            return score + ply
+        if score < -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def score_from_tt(score: float, ply: int) -> float:
+        if score > MATE_THRESHOLD:
+            return score - ply
+        if score < -MATE_THRESHOLD:
+            return score + ply
+        return score
+
+
+# Packed entries are three little endian 64 bit words:
+#   check = key ^ score_bits ^ data, score_bits = float64 score, data below
+# A reader that sees half of an entry another process was writing ends up
+# with a check that doesn't match the key, so no locks are needed.
+PACKED_ENTRY = struct.Struct("<QQQ")
+_DOUBLE = struct.Struct("<d")
+_UINT64 = struct.Struct("<Q")
+
+# data word: valid bit, 2 bits of bound, 16 bits of depth, 15 bits of move,
+# 8 bits of generation
+_VALID = 1
+_BOUND_SHIFT = 1
+_DEPTH_SHIFT = 3
+_MOVE_SHIFT = 19
+_GENERATION_SHIFT = 34
+
+
+def pack_move(move: Optional[chess.Move]) -> int:
+    """from | to << 6 | promotion << 12, 0 for no move"""
+    if not move:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+def unpack_move(packed: int) -> Optional[chess.Move]:
+    if packed == 0:
+        return None
+    return chess.Move(packed & 63, (packed >> 6) & 63, (packed >> 12) or None)
+
+
+def pack_entry(
+    key: int,
+    depth: int,
+    score: float,
+    bound: Bound,
+    move: Optional[chess.Move],
+    generation: int = 0,
+) -> tuple:
+    """Turn an entry into the three words stored for it"""
+    score_bits = _UINT64.unpack(_DOUBLE.pack(score))[0]
+    data = (
+        _VALID
+        | bound.value << _BOUND_SHIFT
+        | (depth & 0xFFFF) << _DEPTH_SHIFT
+        | pack_move(move) << _MOVE_SHIFT
+        | (generation & 0xFF) << _GENERATION_SHIFT
+    )
+    return key ^ score_bits ^ data, score_bits, data
+
+
+def unpack_entry(key: int, check: int, score_bits: int, data: int) -> Optional[TTEntry]:
+    """Inverse of pack_entry, None if the words don't hold an entry for key"""
+    if not data & _VALID or check ^ score_bits ^ data != key:
+        return None
+    return TTEntry(
+        key,
+        (data >> _DEPTH_SHIFT) & 0xFFFF,
+        _DOUBLE.unpack(_UINT64.pack(score_bits))[0],
+        Bound((data >> _BOUND_SHIFT) & 3),
+        unpack_move((data >> _MOVE_SHIFT) & 0x7FFF),
+    )
+
+
+class PackedTranspositionTable(TranspositionTable):
+    """Transposition table laid out as fixed size records in a flat buffer
+
+    Works on anything that hands out a writable buffer, so the same table
+    can live in shared memory between processes, or pass None to get a
+    bytearray of the right size. Same replacement rules as
+    TranspositionTable.
+    """
+
+    def __init__(self, buffer, size: int):
+        if size <= 0:
+            raise ValueError("Transposition table size must be positive")
+        if buffer is None:
+            # Our own memory, 24 bytes an entry rather than a few hundred for
+            # a TTEntry in a list
+            buffer = bytearray(size * PACKED_ENTRY.size)
+        if len(buffer) < size * PACKED_ENTRY.size:
+            raise ValueError("Buffer is too small for the table")
+        self._size = size
+        self._buffer = buffer
+        self._generation = 0
+
+    def clear(self) -> None:
+        self._buffer[: self._size * PACKED_ENTRY.size] = bytes(
+            self._size * PACKED_ENTRY.size
+        )
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        words = PACKED_ENTRY.unpack_from(
+            self._buffer, (key % self._size) * PACKED_ENTRY.size
+        )
+        return unpack_entry(key, *words)
+
+    def store(
+        self,
+        key: int,
+        depth: int,
+        score: float,
+        bound: Bound,
+        move: Optional[chess.Move],
+        ply: int = 0,
+    ) -> None:
+        offset = (key % self._size) * PACKED_ENTRY.size
+        check, score_bits, data = PACKED_ENTRY.unpack_from(self._buffer, offset)
+        if data & _VALID:
+            current_key = check ^ score_bits ^ data
+            current_depth = (data >> _DEPTH_SHIFT) & 0xFFFF
+            current_generation = (data >> _GENERATION_SHIFT) & 0xFF
+            if (
+                current_key != key
+                and current_depth > depth
+                and current_generation == self._generation
+            ):
+                return
+            if move is None and current_key == key:
+                move = unpack_move((data >> _MOVE_SHIFT) & 0x7FFF)
+        PACKED_ENTRY.pack_into(
+            self._buffer,
+            offset,
+            *pack_entry(
+                key,
+                depth,
+                self.score_to_tt(score, ply),
+                bound,
+                move,
+                self._generation,
+            ),
+        )
+
+
+class SharedTranspositionTable(PackedTranspositionTable):
+    """Packed transposition table in multiprocessing shared memory
+
+    The process that creates it owns the memory and should close() it when
+    done. Pickling one (e.g. handing it to a spawned Process) attaches the
+    other side to the same memory by name instead of copying it.
+    """
+
+    def __init__(
+        self,
+        size: int = TranspositionTable.DEFAULT_SIZE,
+        name: str = None,
+        generation: int = 0,
+    ):
+        if name is None:
+            self._memory = shared_memory.SharedMemory(
+                create=True, size=size * PACKED_ENTRY.size
+            )
+            self._owner = True
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        super().__init__(self._memory.buf, size)
+        self._generation = generation
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def __reduce__(self):
+        return (
+            SharedTranspositionTable,
+            (self._size, self._memory.name, self._generation),
+        )
+
+    def close(self) -> None:
+        self._buffer = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
@@ -0,0 +1,229 @@
+"""Batch analysis of EPD and PGN files
+
+Positions are read lazily and handed to a pool of worker processes, each
+with its own engine. Only a bounded number of positions are in flight at
+once and results are written out as JSON lines as soon as they finish, so
+the size of the input doesn't matter. Run it with
+
+    python main.py analyse puzzles.epd --output results.jsonl --depth 3
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pychess_ai.algos import Algo, SearchLimits
+from timeit import default_timer as timer
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO
+import argparse
+import chess
+import chess.pgn
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger("analysis")
+
+
+class AnalysisJob(NamedTuple):
+    index: int
+    id: str
+    fen: str
+    best_moves: List[str]  # uci, from the EPD bm opcode
+    avoid_moves: List[str]  # uci, from the EPD am opcode
+
+
+def read_epd(lines: Iterable[str]) -> Iterator[AnalysisJob]:
+    """One job per EPD line, blank lines, # comments and lines that don't
+    parse are skipped"""
+    index = 0
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            board, operations = chess.Board.from_epd(line)
+        except ValueError as error:
+            logger.warning("Skipping EPD line {!r}: {}".format(line, error))
+            continue
+        yield AnalysisJob(
+            index,
+            str(operations.get("id", index)),
+            board.fen(),
+            [move.uci() for move in operations.get("bm", [])],
+            [move.uci() for move in operations.get("am", [])],
+        )
+        index += 1
+
+
+def read_pgn(handle: TextIO) -> Iterator[AnalysisJob]:
+    """One job for every position before a move in the main line of every
+    game, read a game at a time"""
+    index = 0
+    game_number = 0
+    while True:
+        game = chess.pgn.read_game(handle)
+        if game is None:
+            return
+        board = game.board()
+        for ply, move in enumerate(game.mainline_moves()):
+            yield AnalysisJob(
+                index, "{}.{}".format(game_number, ply), board.fen(), [], []
+            )
+            board.push(move)
+            index += 1
+        game_number += 1
+
+
+def read_positions(path: str) -> Iterator[AnalysisJob]:
+    """Jobs from a .pgn file or an EPD file (anything else)"""
+    with open(path) as handle:
+        if path.lower().endswith(".pgn"):
+            yield from read_pgn(handle)
+        else:
+            yield from read_epd(handle)
+
+
+# Set up once per worker process by _init_worker
+_worker_algo = None
+_worker_limits = None
+
+
+def _init_worker(
+    algo_type: Algo, depth: int, time_limit: Optional[float], options: dict
+) -> None:
+    # Imported here, the workers only need it once they're running
+    from pychess_ai.bench import make_algo
+
+    global _worker_algo, _worker_limits
+    _worker_algo = make_algo(algo_type, depth, **options)
+    # MiniMax only does fixed depth
+    if time_limit is not None and algo_type != Algo.NO_ABP:
+        _worker_limits = SearchLimits(time_limit=time_limit, max_depth=depth)
+
+
+def _analyse(job: AnalysisJob) -> dict:
+    board = chess.Board(job.fen)
+    start = timer()
+    if _worker_limits is not None:
+        move = _worker_algo.get_next_move(board, board.turn, _worker_limits)
+    else:
+        move = _worker_algo.get_next_move(board, board.turn)
+    elapsed = timer() - start
+
+    result = getattr(_worker_algo, "last_result", None)
+    uci = move.uci() if move else None
+    matches = None
+    if job.best_moves or job.avoid_moves:
+        matches = (not job.best_moves or uci in job.best_moves) and (
+            uci not in job.avoid_moves
+        )
+    return {
+        "index": job.index,
+        "id": job.id,
+        "fen": job.fen,
+        "move": uci,
+        "score": result.eval if result is not None else None,
+        "nodes": _worker_algo.nodes,
+        "time": elapsed,
+        "bm": job.best_moves,
+        "am": job.avoid_moves,
+        "matches": matches,
+    }
+
+
+def analyse(
+    jobs: Iterable[AnalysisJob],
+    output: TextIO,
+    algo_type: Algo = Algo.ABP,
+    depth: int = 3,
+    time_limit: Optional[float] = None,
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    options: Optional[dict] = None,
+) -> dict:
+    """Search every job and write a JSON line for each as it finishes
+
+    Args:
+        jobs (Iterable[AnalysisJob]): Positions to analyse, read lazily
+        output (TextIO): Where the JSON lines go, in order of completion
+        algo_type (Algo): Engine to use
+        depth (int): Search depth, or the most it can reach with time_limit
+        time_limit (float): Seconds per position, None for a fixed depth
+        workers (int): Processes in the pool, defaults to one per CPU
+        max_in_flight (int): Most positions handed out at once, defaults to
+            a few per worker
+        options (dict): Extra keyword arguments for the engine
+
+    Returns:
+        dict: Totals, positions, nodes, time and how many bm/am matched
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    totals = {"positions": 0, "nodes": 0, "time": 0.0, "matched": 0, "checked": 0}
+
+    def record(result: dict) -> None:
+        output.write(json.dumps(result) + "\n")
+        totals["positions"] += 1
+        totals["nodes"] += result["nodes"]
+        totals["time"] += result["time"]
+        if result["matches"] is not None:
+            totals["checked"] += 1
+            totals["matched"] += result["matches"]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(algo_type, depth, time_limit, options or {}),
+    ) as pool:
+        pending = set()
+        for job in jobs:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+            pending.add(pool.submit(_analyse, job))
+        for future in wait(pending).done:
+            record(future.result())
+    output.flush()
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="main.py analyse", description=__doc__)
+    parser.add_argument("input", help=".epd or .pgn file to analyse")
+    parser.add_argument("--output", help="JSONL file for the results (stdout)")
+    parser.add_argument("--algo", default="ABP", choices=[a.name for a in Algo])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--time", type=float, help="seconds per position")
+    parser.add_argument("--workers", type=int, help="processes (one per CPU)")
+    parser.add_argument("--in-flight", type=int, help="positions handed out at once")
+    parser.add_argument(
+        "--cache-dir", help="keep the search tables here, shared by every run"
+    )
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        totals = analyse(
+            read_positions(args.input),
+            output,
+            Algo[args.algo],
+            args.depth,
+            args.time,
+            args.workers,
+            args.in_flight,
+            {"cache_dir": args.cache_dir} if args.cache_dir else None,
+        )
+    finally:
+        if args.output:
+            output.close()
+
+    summary = "Positions: {}  Nodes: {}  Time: {:.3f}s".format(
+        totals["positions"], totals["nodes"], totals["time"]
+    )
+    if totals["checked"]:
+        summary += "  Solved: {}/{}".format(totals["matched"], totals["checked"])
+    print(summary, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
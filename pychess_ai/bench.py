@@ -0,0 +1,174 @@
+"""Fixed position benchmark
+
+Searches the same positions to the same depth with each algorithm and
+reports nodes, time and nodes per second. The total node count is the
+signature: any change to what the search does moves it, while changes
+that only make it faster don't. Run it with
+
+    python main.py bench [--depth N] [--algo ABP] [--output bench.json]
+"""
+from pychess_ai.algos import Algo, MiniMax, MiniMaxABP, NegaMaxPVS
+from timeit import default_timer as timer
+from typing import Dict, Iterable, List, Optional
+import argparse
+import chess
+import json
+import sys
+
+BENCH_POSITIONS = [
+    # Standard positions
+    chess.STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8",
+    # Tactics from the test suite and the old scratch positions in main.py
+    "1Q6/p7/q1p3p1/3p4/2kPpP2/4P1P1/P2B2K1/3r4 w - - 4 34",
+    "2Q5/1p1r2kp/p4pq1/6p1/2P5/1PB5/P4PPK/4r3 w - - 0 42",
+    "5bk1/6p1/p1qr1pQP/1p2r3/1P6/P1NR4/5PP1/6K1 w - - 0 38",
+    "3k4/7R/1q5p/8/8/4B3/6Q1/4K3 w - - 0 1",
+    "1q4k1/5ppp/8/8/3BQ3/8/8/4RK2 w - - 0 1",
+    "4r1k1/5ppp/4q3/5b2/8/8/5PPP/1Q4K1 b - - 0 1",
+    "4rk2/p4ppp/1p2p3/3p4/3P4/1P2P3/P4PPP/4RK2 w - - 0 1",
+    "3k4/8/1q5p/8/8/4B3/7R/4K3 w - - 0 1",
+    "5b1k/6pP/p1qr1pQ1/1p4r1/1P6/P1NR4/5PPK/8 w - - 3 40",
+]
+
+# MiniMax has no pruning at all so it gets a much shallower search
+DEFAULT_DEPTHS = {Algo.ABP: 3, Algo.NO_ABP: 1, Algo.PVS: 3}
+
+
+def make_algo(algo_type: Algo, depth: int, **options):
+    """Build the algo for algo_type, options go to MiniMaxABP/NegaMaxPVS
+    (MiniMax doesn't have any)"""
+    if algo_type == Algo.ABP:
+        return MiniMaxABP(depth, **options)
+    if algo_type == Algo.PVS:
+        return NegaMaxPVS(depth, **options)
+    return MiniMax(depth)
+
+
+def bench_algo(
+    algo_type: Algo, depth: int, positions: Iterable[str] = BENCH_POSITIONS
+) -> dict:
+    """Search every position with one algorithm, returns the report for it"""
+    algo = make_algo(algo_type, depth)
+    results = []
+    for fen in positions:
+        board = chess.Board(fen)
+        start = timer()
+        move = algo.get_next_move(board, board.turn)
+        elapsed = timer() - start
+        results.append(
+            {
+                "fen": fen,
+                "move": move.uci(),
+                "nodes": algo.nodes,
+                "time": elapsed,
+                "nps": algo.nodes / elapsed if elapsed > 0 else 0.0,
+            }
+        )
+    if hasattr(algo, "close"):
+        algo.close()
+
+    nodes = sum(result["nodes"] for result in results)
+    elapsed = sum(result["time"] for result in results)
+    return {
+        "depth": depth,
+        "positions": results,
+        "nodes": nodes,
+        "time": elapsed,
+        "nps": nodes / elapsed if elapsed > 0 else 0.0,
+        "signature": nodes,
+    }
+
+
+def run_bench(
+    algos: Optional[Iterable[Algo]] = None,
+    depth: Optional[int] = None,
+    positions: Iterable[str] = BENCH_POSITIONS,
+) -> Dict[str, dict]:
+    """Bench each algorithm (all of them by default), keyed by Algo name.
+    depth overrides DEFAULT_DEPTHS for every algorithm."""
+    positions = list(positions)
+    report = {}
+    for algo_type in algos if algos is not None else list(Algo):
+        algo_depth = depth if depth is not None else DEFAULT_DEPTHS[algo_type]
+        report[algo_type.name] = bench_algo(algo_type, algo_depth, positions)
+    return report
+
+
+def compare(
+    baseline: Dict[str, dict], report: Dict[str, dict], slowdown: float
+) -> List[str]:
+    """Differences between two reports worth failing CI over: a changed
+    signature, or nodes per second down by more than the slowdown fraction"""
+    problems = []
+    for name, result in report.items():
+        old = baseline.get(name)
+        if old is None or old["depth"] != result["depth"]:
+            continue
+        if old["signature"] != result["signature"]:
+            problems.append(
+                "{}: signature changed from {} to {}".format(
+                    name, old["signature"], result["signature"]
+                )
+            )
+        if result["nps"] < old["nps"] * (1.0 - slowdown):
+            problems.append(
+                "{}: {:.0f} nps, was {:.0f}".format(name, result["nps"], old["nps"])
+            )
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="main.py bench", description=__doc__)
+    parser.add_argument("--depth", type=int, help="search depth for every algo")
+    parser.add_argument(
+        "--algo",
+        action="append",
+        choices=[algo.name for algo in Algo],
+        help="algorithm to bench, can be given more than once (default all)",
+    )
+    parser.add_argument("--output", help="write the report here as JSON")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument(
+        "--slowdown",
+        type=float,
+        default=0.1,
+        help="allowed drop in nodes per second against the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    algos = [Algo[name] for name in args.algo] if args.algo else None
+    report = run_bench(algos, args.depth)
+
+    for name, result in report.items():
+        print("{} depth {}".format(name, result["depth"]))
+        for position in result["positions"]:
+            print(
+                "  {:>10} nodes {:8.3f}s  {}".format(
+                    position["nodes"], position["time"], position["fen"]
+                )
+            )
+        print(
+            "  Nodes: {}  Time: {:.3f}s  NPS: {:.0f}  Signature: {}".format(
+                result["nodes"], result["time"], result["nps"], result["signature"]
+            )
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            problems = compare(json.load(baseline), report, args.slowdown)
+        for problem in problems:
+            print(problem)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
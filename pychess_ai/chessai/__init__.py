@@ -1 +1,2 @@
+from .book import BookSelection, book_move, close_books, open_book
 from .chessai import ChessAi
@@ -0,0 +1,53 @@
+from enum import Enum
+from typing import Dict, Optional
+import chess
+import chess.polyglot
+import os
+import random
+
+
+class BookSelection(Enum):
+    """How to pick between the book moves for a position"""
+
+    # Random, in proportion to the weights in the book
+    WEIGHTED = 0
+    # Always the highest weight
+    BEST = 1
+
+
+# Open books by absolute path, shared by every ChessAi in the process
+_readers: Dict[str, chess.polyglot.MemoryMappedReader] = {}
+
+
+def open_book(path: str) -> chess.polyglot.MemoryMappedReader:
+    """Memory map a Polyglot .bin book, or hand back the one already open"""
+    path = os.path.abspath(path)
+    reader = _readers.get(path)
+    if reader is None:
+        reader = chess.polyglot.open_reader(path)
+        _readers[path] = reader
+    return reader
+
+
+def close_books() -> None:
+    """Unmap every book opened with open_book"""
+    for reader in _readers.values():
+        reader.close()
+    _readers.clear()
+
+
+def book_move(
+    reader: chess.polyglot.MemoryMappedReader,
+    board: chess.Board,
+    selection: BookSelection = BookSelection.WEIGHTED,
+    rng: Optional[random.Random] = None,
+) -> Optional[chess.Move]:
+    """Move the book has for board, None if it doesn't have the position"""
+    try:
+        if selection == BookSelection.BEST:
+            entry = reader.find(board)
+        else:
+            entry = reader.weighted_choice(board, random=rng)
+    except IndexError:
+        return None
+    return entry.move
@@ -1,6 +1,18 @@
-from pychess_ai.algos import Algo, MiniMax, MiniMaxABP
+from pychess_ai.algos import (
+    Algo,
+    MiniMax,
+    MiniMaxABP,
+    NegaMaxPVS,
+    SearchLimits,
+    SearchStats,
+    TimeManager,
+)
+from pychess_ai.chessai.book import BookSelection, book_move, open_book
+from pychess_ai.evaluator import EvalReturnType
+from typing import Optional
 import chess
 import logging
+import threading
 
 DEFAULT_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
 
@@ -13,33 +25,242 @@ class ChessAi:
         color_to_play: chess.Color = chess.WHITE,
         starting_fen: str = DEFAULT_FEN,
         logging_level=logging.INFO,
+        workers: int = 1,
+        lazy_smp: int = 0,
+        book_path: Optional[str] = None,
+        book_selection: BookSelection = BookSelection.WEIGHTED,
+        ponder: bool = False,
+        move_time: Optional[float] = None,
+        options: Optional[dict] = None,
     ) -> None:
 
         self._board = chess.Board(fen=starting_fen)
         self._color = color_to_play
+        # Book is opened once per process and shared by every game
+        self._book = open_book(book_path) if book_path is not None else None
+        self._book_selection = book_selection
+        self._last_stats = None
+        # Extra search options (null_move, lmr, tt_size...) for the engines
+        # that take them
+        options = options or {}
         if algo_type == Algo.ABP:
-            self._ai = MiniMaxABP(depth, log_level=logging_level)
+            self._ai = MiniMaxABP(
+                depth,
+                log_level=logging_level,
+                workers=workers,
+                lazy_smp=lazy_smp,
+                **options
+            )
         elif algo_type == Algo.NO_ABP:
             self._ai = MiniMax(depth)
+        elif algo_type == Algo.PVS:
+            self._ai = NegaMaxPVS(
+                depth,
+                log_level=logging_level,
+                workers=workers,
+                lazy_smp=lazy_smp,
+                **options
+            )
+
+        # With a move time the search deepens until the time runs out, depth
+        # is then only a cap
+        self._limits = None
+        if move_time is not None:
+            if not isinstance(self._ai, MiniMaxABP):
+                raise ValueError("A move time needs an algo that can be stopped")
+            self._limits = SearchLimits(time_limit=move_time, max_depth=depth)
+
+        # Pondering searches the reply we expect while the opponent thinks,
+        # which needs a search that can be stopped part way
+        if ponder and not isinstance(self._ai, MiniMaxABP):
+            raise ValueError("Pondering needs an algo that can be stopped")
+        self._ponder = ponder
+        self._ponder_thread = None
+        self._ponder_move = None
+        self._ponder_hit = False
+        self._ponder_result = None
 
     def update_with_move(self, move: str) -> bool:
         # TODO (dan) At some point make this check legal moves, but for now we'll control that
         try:
-            if self._board.is_legal(self._board.parse_san(move)):
-                self._board.push_san(move)
+            parsed = self._board.parse_san(move)
+            if self._board.is_legal(parsed):
+                self._settle_ponder(parsed)
+                self._board.push(parsed)
                 return True
         except ValueError:
             return False
         return False
 
-    def take_turn(self) -> str:
-        next_move = self._board.san(self.get_next_move(self._color))
-        self._board.push_san(next_move)
+    def take_turn(
+        self,
+        time_left: Optional[float] = None,
+        increment: float = 0.0,
+        moves_to_go: Optional[int] = None,
+    ) -> str:
+        """Play our move, see get_next_move for the clock arguments"""
+        move = self.get_next_move(self._color, time_left, increment, moves_to_go)
+        next_move = self._board.san(move)
+        self._board.push(move)
         print(self._board)
+        if self._ponder and self._last_stats is not None:
+            self._start_pondering()
         return next_move
 
-    def get_next_move(self, color: chess.Color) -> chess.Move:
-        return self._ai.get_next_move(self._board, color)
+    @property
+    def ponder_move(self) -> Optional[chess.Move]:
+        """Reply being pondered on right now, None if we aren't"""
+        return self._ponder_move if self._ponder_thread is not None else None
+
+    def stop_pondering(self) -> None:
+        """Throw away any ponder search, e.g. once the game is over"""
+        if self._ponder_thread is None:
+            return
+        # Keep asking in case the ponder search hadn't got going yet
+        while self._ponder_thread.is_alive():
+            self._ai.stop()
+            self._ponder_thread.join(0.05)
+        self._ponder_thread = None
+        self._ponder_move = None
+        self._ponder_hit = False
+        self._ponder_result = None
+
+    def close(self) -> None:
+        """Stop pondering and shut down any worker processes the algo has"""
+        self.stop_pondering()
+        if hasattr(self._ai, "close"):
+            self._ai.close()
+
+    def _start_pondering(self) -> None:
+        """Start searching our answer to the reply the last search expects"""
+        result = self._ai.last_result
+        if result is None or len(result.line) < 2:
+            return
+        expected = result.line[1]
+        if not self._board.is_legal(expected):
+            return
+        board = self._board.copy()
+        board.push(expected)
+        if board.is_game_over():
+            return
+        self._ponder_move = expected
+        self._ponder_hit = False
+        self._ponder_result = None
+
+        # With a move time the ponder search deepens for as long as the
+        # opponent takes, a hit then gets at most the move time on top
+        limits = None
+        if self._limits is not None:
+            limits = SearchLimits(max_depth=self._limits.max_depth)
+
+        def ponder() -> None:
+            move = self._ai.get_next_move(board, self._color, limits, reuse_tables=True)
+            # Left alone if the search got stopped, it's a miss anyway
+            self._ponder_result = move
+
+        self._ponder_thread = threading.Thread(target=ponder, daemon=True)
+        self._ponder_thread.start()
+
+    def _settle_ponder(self, move: chess.Move) -> None:
+        """The opponent played move, keep the ponder search going if it's the
+        one we were expecting or stop it if not"""
+        if self._ponder_thread is None:
+            return
+        if move == self._ponder_move:
+            self._ponder_hit = True
+        else:
+            self.stop_pondering()
+
+    @property
+    def last_stats(self) -> Optional[SearchStats]:
+        """Search statistics for the last move we came up with, None if it
+        came out of the book"""
+        return self._last_stats
+
+    def get_next_move(
+        self,
+        color: chess.Color,
+        time_left: Optional[float] = None,
+        increment: float = 0.0,
+        moves_to_go: Optional[int] = None,
+    ) -> chess.Move:
+        """Our move in the current position
+
+        Args:
+            color (chess.Color): Side to find a move for
+            time_left (float): Seconds left on our clock, None to search the
+                way the ChessAi was set up (fixed depth or move time).
+                With a clock the search deepens for as long as TimeManager
+                says the move is worth.
+            increment (float): Seconds added to our clock after every move
+            moves_to_go (int): Moves until the clock gets topped up, None
+                if it never does
+        """
+        clock = None
+        if time_left is not None:
+            if not isinstance(self._ai, MiniMaxABP):
+                raise ValueError("A clock needs an algo that can be stopped")
+            clock = TimeManager(time_left, increment, moves_to_go)
+
+        if self._ponder_thread is not None:
+            if self._ponder_hit and color == self._color:
+                # Already searching this exact position, wait for it (no
+                # longer than the clock or move time allows) then stop it,
+                # it hands back the best move it has so far
+                timeout = None
+                if clock is not None:
+                    timeout = clock.hard
+                elif self._limits is not None:
+                    timeout = self._limits.time_limit
+                self._ponder_thread.join(timeout)
+                while self._ponder_thread.is_alive():
+                    self._ai.stop()
+                    self._ponder_thread.join(0.05)
+                move = self._ponder_result
+                self._ponder_thread = None
+                self._ponder_hit = False
+                if move is not None and self._board.is_legal(move):
+                    self._last_stats = self._ai.last_stats
+                    return move
+            self.stop_pondering()
+
+        # No point searching a position the book already knows
+        self._last_stats = None
+        if clock is not None:
+            legal_moves = list(self._board.legal_moves)
+            if len(legal_moves) == 1:
+                # Nothing to think about, save the time for later
+                return legal_moves[0]
+        if self._book is not None:
+            move = book_move(self._book, self._board, self._book_selection)
+            if move is not None and self._board.is_legal(move):
+                return move
+        if clock is not None:
+            move = self._clock_move(color, clock)
+        elif isinstance(self._ai, MiniMaxABP):
+            # Same game as the last search (or the ponder search), so carry
+            # on from what it found rather than starting cold
+            move = self._ai.get_next_move(
+                self._board, color, self._limits, reuse_tables=True
+            )
+        else:
+            move = self._ai.get_next_move(self._board, color)
+        self._last_stats = self._ai.last_stats
+        return move
+
+    def _clock_move(self, color: chess.Color, clock: TimeManager) -> chess.Move:
+        """Search as deep as the clock allows, stopping between iterations
+        once the time manager has seen enough"""
+
+        def on_iteration(
+            depth: int, result: EvalReturnType, nodes: int, seconds: float
+        ) -> None:
+            if clock.should_stop(result, seconds):
+                self._ai.stop()
+
+        return self._ai.get_next_move(
+            self._board, color, clock.limits(), on_iteration, reuse_tables=True
+        )
 
     def print_board(self) -> None:
         print(self._board)
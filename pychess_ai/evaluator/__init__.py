@@ -1 +1,2 @@
-from .evaluator import Evaluator, EvalReturnType
+from .cache import EvalCache
+from .evaluator import EVAL_VERSION, Evaluator, EvalReturnType
@@ -0,0 +1,129 @@
+from typing import Iterable
+from pychess_ai.evaluator.evaluator import (
+    DOUBLED_PAWN_PENALTY,
+    ISOLATED_PAWN_PENALTY,
+    PASSED_PAWN_BONUS,
+    PASSED_PAWN_MASKS,
+    PIECE_SQUARE_VALUES,
+    ROOK_BASE_VALUE,
+    ROOK_EVAL_DICT,
+    ROOK_OPEN_FILE_BONUS,
+    ROOK_SEMI_OPEN_FILE_BONUS,
+)
+import chess
+import numpy as np
+
+# Order of the 12 bitboards pulled out of each board
+PIECE_ORDER = [
+    (color, piece_type) for color in chess.COLORS for piece_type in chess.PIECE_TYPES
+]
+
+# [piece, square] piece square values, white positive and black negative
+PIECE_SQUARE_WEIGHTS = np.array(
+    [PIECE_SQUARE_VALUES[color][piece_type] for color, piece_type in PIECE_ORDER],
+    dtype=np.float64,
+)
+
+
+def _rook_file_weights(bonus: float) -> np.ndarray:
+    """[color, square] extra value of a rook on a (semi) open file, signed
+    like the piece square weights"""
+    return np.array(
+        [
+            [
+                (1.0 if color == chess.WHITE else -1.0)
+                * (bonus - 1.0)
+                * ROOK_BASE_VALUE
+                * value
+                for value in ROOK_EVAL_DICT[color]
+            ]
+            for color in chess.COLORS
+        ],
+        dtype=np.float64,
+    )
+
+
+ROOK_OPEN_FILE_WEIGHTS = _rook_file_weights(ROOK_OPEN_FILE_BONUS)
+ROOK_SEMI_OPEN_FILE_WEIGHTS = _rook_file_weights(ROOK_SEMI_OPEN_FILE_BONUS)
+
+SQUARE_FILES = np.array([chess.square_file(square) for square in chess.SQUARES])
+FILE_MASKS = np.array(chess.BB_FILES, dtype=np.uint64)
+# [color, square] enemy pawns that would stop a pawn there being passed
+PASSED_MASKS = np.array(
+    [PASSED_PAWN_MASKS[color] for color in chess.COLORS], dtype=np.uint64
+)
+
+
+def board_bitboards(boards: Iterable[chess.Board]) -> np.ndarray:
+    """Pull the 12 piece bitboards out of every board, shape (N, 12)"""
+    return np.array(
+        [
+            [board.pieces_mask(piece_type, color) for color, piece_type in PIECE_ORDER]
+            for board in boards
+        ],
+        dtype="<u8",
+    ).reshape(-1, len(PIECE_ORDER))
+
+
+def unpack_squares(bitboards: np.ndarray) -> np.ndarray:
+    """Turn (..., ) uint64 bitboards into (..., 64) 0/1 arrays indexed by square"""
+    as_bytes = bitboards.astype("<u8").view(np.uint8).reshape(bitboards.shape + (8,))
+    return np.unpackbits(as_bytes, axis=-1, bitorder="little")
+
+
+def evaluate_bitboards(bitboards: np.ndarray) -> np.ndarray:
+    """Static evaluation of (N, 12) piece bitboards from white's point of view
+
+    Same material, piece square, pawn structure and rook file terms as
+    Evaluator.evaluate but done for every position at once with table lookups.
+    """
+    squares = unpack_squares(bitboards)
+    scores = np.tensordot(squares, PIECE_SQUARE_WEIGHTS, axes=([1, 2], [0, 1]))
+
+    pieces = len(chess.PIECE_TYPES)
+    pawn = chess.PAWN - 1
+    rook = chess.ROOK - 1
+    for index, color in enumerate(chess.COLORS):
+        sign = 1.0 if color == chess.WHITE else -1.0
+        enemy_pawns = bitboards[:, (1 - index) * pieces + pawn]
+        pawn_squares = squares[:, index * pieces + pawn]
+
+        # [N, file] pawn counts, squares go rank by rank so files are columns
+        on_file = pawn_squares.reshape(-1, 8, 8).sum(axis=1, dtype=np.int64)
+        has_pawn = on_file > 0
+        neighbours = np.zeros_like(has_pawn)
+        neighbours[:, 1:] |= has_pawn[:, :-1]
+        neighbours[:, :-1] |= has_pawn[:, 1:]
+        doubled = np.maximum(on_file - 1, 0).sum(axis=1)
+        isolated = (on_file * ~neighbours).sum(axis=1)
+        passed = (
+            ((enemy_pawns[:, None] & PASSED_MASKS[index][None, :]) == 0) * pawn_squares
+        ).sum(axis=1)
+        scores += sign * (
+            PASSED_PAWN_BONUS * passed
+            - DOUBLED_PAWN_PENALTY * doubled
+            - ISOLATED_PAWN_PENALTY * isolated
+        )
+
+        # Rooks on files without their own pawns, open if no enemy pawns either
+        no_own_pawn = ~has_pawn[:, SQUARE_FILES]
+        enemy_on_file = ((enemy_pawns[:, None] & FILE_MASKS[None, :]) != 0)[
+            :, SQUARE_FILES
+        ]
+        rooks = squares[:, index * pieces + rook]
+        open_rooks = rooks * (no_own_pawn & ~enemy_on_file)
+        semi_open_rooks = rooks * (no_own_pawn & enemy_on_file)
+        scores += open_rooks @ ROOK_OPEN_FILE_WEIGHTS[index]
+        scores += semi_open_rooks @ ROOK_SEMI_OPEN_FILE_WEIGHTS[index]
+
+    return scores
+
+
+def evaluate_many(
+    boards: Iterable[chess.Board], color_to_play: chess.Color = chess.WHITE
+) -> np.ndarray:
+    """Score a batch of boards, see Evaluator.evaluate_many"""
+    scores = evaluate_bitboards(board_bitboards(boards))
+    if color_to_play == chess.BLACK:
+        scores = -scores
+    return scores
@@ -0,0 +1,66 @@
+from typing import Optional
+
+
+class EvalCache:
+    """Fixed capacity cache of evaluations keyed by an integer hash
+
+    Direct mapped: every key has exactly one slot (key % capacity) and a new
+    position always replaces whatever was in its slot. That keeps memory flat
+    no matter how long the game goes and favours the positions the search is
+    looking at right now over ones from moves ago.
+    """
+
+    DEFAULT_ENTRIES = 1 << 18
+    # Rough cost of one entry: two list slots plus the int key and float value
+    BYTES_PER_ENTRY = 80
+
+    def __init__(self, entries: Optional[int] = None, size_mb: Optional[float] = None):
+        if entries is None:
+            if size_mb is not None:
+                entries = int(size_mb * 1024 * 1024) // self.BYTES_PER_ENTRY
+            else:
+                entries = self.DEFAULT_ENTRIES
+        if entries <= 0:
+            raise ValueError("Eval cache needs room for at least one entry")
+        self._capacity = entries
+        self._keys = [None] * entries
+        self._values = [0.0] * entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def get(self, key: int) -> Optional[float]:
+        index = key % self._capacity
+        if self._keys[index] == key:
+            self.hits += 1
+            return self._values[index]
+        self.misses += 1
+        return None
+
+    def put(self, key: int, value: float) -> None:
+        index = key % self._capacity
+        current = self._keys[index]
+        if current is not None and current != key:
+            self.evictions += 1
+        self._keys[index] = key
+        self._values[index] = value
+
+    def clear(self) -> None:
+        self._keys = [None] * self._capacity
+        self._values = [0.0] * self._capacity
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
@@ -1,6 +1,7 @@
-from collections import deque
-from dataclasses import dataclass
+from typing import Iterable, Optional
+from pychess_ai.evaluator.cache import EvalCache
 import chess
+import chess.polyglot
 
 # fmt: off
 PAWN_EVAL_DICT = {
@@ -67,21 +68,134 @@ QUEEN_EVAL_DICT = {
 }
 # fmt: on
 
+# Bump whenever evaluate() would score positions differently, cache files
+# written with another version get thrown away when they're opened
+EVAL_VERSION = 1
+
+PAWN_BASE_VALUE = 10.0
+KNIGHT_BASE_VALUE = 30.0
+BISHOP_BASE_VALUE = 30.0
+ROOK_BASE_VALUE = 50.0
+QUEEN_BASE_VALUE = 90.0
+ROOK_OPEN_FILE_BONUS = 1.25
+ROOK_SEMI_OPEN_FILE_BONUS = 1.1
+PASSED_PAWN_BONUS = 5.0
+DOUBLED_PAWN_PENALTY = 5.0
+ISOLATED_PAWN_PENALTY = 3.0
+
+
+def _build_piece_square_values() -> dict:
+    """Value of every piece on every square, positive for white and negative
+    for black, leaving out the rook open file bonus which depends on the
+    rest of the board. Indexed [color][piece_type][square]."""
+    values = {}
+    for color in chess.COLORS:
+        sign = 1.0 if color == chess.WHITE else -1.0
+        values[color] = {
+            chess.PAWN: [sign * PAWN_BASE_VALUE * v for v in PAWN_EVAL_DICT[color]],
+            chess.KNIGHT: [sign * KNIGHT_BASE_VALUE] * 64,
+            chess.BISHOP: [sign * BISHOP_BASE_VALUE] * 64,
+            chess.ROOK: [sign * ROOK_BASE_VALUE * v for v in ROOK_EVAL_DICT[color]],
+            chess.QUEEN: [sign * QUEEN_BASE_VALUE * v for v in QUEEN_EVAL_DICT[color]],
+            chess.KING: [0.0] * 64,
+        }
+    return values
+
+
+PIECE_SQUARE_VALUES = _build_piece_square_values()
+
+# Pawns on either neighbouring file, indexed by file
+ADJACENT_FILE_MASKS = [
+    (chess.BB_FILES[file - 1] if file > 0 else 0)
+    | (chess.BB_FILES[file + 1] if file < 7 else 0)
+    for file in range(8)
+]
+
+
+def _build_passed_pawn_masks() -> dict:
+    """Squares in front of a pawn on its own and neighbouring files, a pawn
+    is passed when none of the enemy pawns are in there. [color][square]"""
+    masks = {chess.WHITE: [], chess.BLACK: []}
+    for square in chess.SQUARES:
+        file = chess.square_file(square)
+        rank = chess.square_rank(square)
+        files = chess.BB_FILES[file] | ADJACENT_FILE_MASKS[file]
+        ahead = 0
+        for r in range(rank + 1, 8):
+            ahead |= chess.BB_RANKS[r]
+        behind = 0
+        for r in range(0, rank):
+            behind |= chess.BB_RANKS[r]
+        masks[chess.WHITE].append(files & ahead)
+        masks[chess.BLACK].append(files & behind)
+    return masks
+
+
+PASSED_PAWN_MASKS = _build_passed_pawn_masks()
+
 
-@dataclass
 class EvalReturnType:
-    move: chess.Move
-    eval: float
-    line: deque
+    """Result of a search, built once at the root so it has __slots__ to keep
+    it small and doesn't need to be a dataclass"""
+
+    __slots__ = ("move", "eval", "line")
+
+    def __init__(self, move: chess.Move, eval: float, line: list):
+        self.move = move
+        self.eval = eval
+        self.line = line
+
+    def __repr__(self) -> str:
+        return "EvalReturnType(move={!r}, eval={!r}, line={!r})".format(
+            self.move, self.eval, self.line
+        )
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, EvalReturnType):
+            return NotImplemented
+        return (self.move, self.eval, self.line) == (other.move, other.eval, other.line)
 
 
 class Evaluator:
-    def __init__(self):
-        self._position_table = dict()
-        pass
+    def __init__(
+        self,
+        cache_entries: Optional[int] = None,
+        cache_mb: Optional[float] = None,
+        cache: Optional[EvalCache] = None,
+    ):
+        # A cache handed in (e.g. one backed by a file) wins over the sizes
+        if cache is None:
+            cache = EvalCache(entries=cache_entries, size_mb=cache_mb)
+        self._position_table = cache
+        # Running material + piece square score (white's view) for the search,
+        # one entry per move pushed through push() since set_position()
+        self._score_stack = []
+        self._root_length = 0
+        # The board the running score belongs to, any other gets the slow way
+        self._board = None
+
+    @property
+    def cache_hits(self) -> int:
+        return self._position_table.hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self._position_table.misses
+
+    @property
+    def cache_evictions(self) -> int:
+        return self._position_table.evictions
+
+    @property
+    def cache_hit_rate(self) -> float:
+        return self._position_table.hit_rate
 
     def evaluate(
-        self, board: chess.Board, num_moves: int, color_to_play: chess.Color
+        self,
+        board: chess.Board,
+        num_moves: int,
+        color_to_play: chess.Color,
+        key: Optional[int] = None,
     ) -> EvalReturnType:
         """Chess position evaluation function
 
@@ -89,106 +203,189 @@ class Evaluator:
             board (chess.Board): A python-chess board
             num_moves (int): How many moves deep are we int the evaluation
             color_to_play (chess.Color): What color are we evaluating for at the root
+            key (int): Zobrist hash of the position if the caller already has it
 
         Returns:
-            float: The evaluation
+            EvalReturnType: The evaluation along with the line that got here
         """
         # Build the line we evaluated
         line = board.move_stack[len(board.move_stack) - (num_moves + 1) :]
-        # Gonna use the FEN without the turn
-        epd_key = board.epd()
-        if epd_key in self._position_table:
-            return EvalReturnType(
-                move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-                eval=self._position_table[epd_key],
-                line=line,
-            )
+        return EvalReturnType(
+            move=line[0],
+            eval=self.evaluate_score(board, num_moves, color_to_play, key),
+            line=line,
+        )
 
-        evaluation = 0.0
-        if board.is_checkmate():
-            if board.outcome().winner == color_to_play:
-                return EvalReturnType(
-                    move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-                    eval=10000.0 - num_moves,
-                    line=line,
-                )
-            else:
-                return EvalReturnType(
-                    move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-                    eval=(10000.0 - num_moves) * -1.0,
-                    line=line,
-                )
+    def evaluate_score(
+        self,
+        board: chess.Board,
+        num_moves: int,
+        color_to_play: chess.Color,
+        key: Optional[int] = None,
+    ) -> float:
+        """Same as evaluate() but just the number, this is what the search
+        calls at every leaf so it doesn't build anything it doesn't need"""
+        if key is None:
+            key = chess.polyglot.zobrist_hash(board)
+        # The cache holds scores from white's point of view
+        sign = 1.0 if color_to_play == chess.WHITE else -1.0
+        cached = self._position_table.get(key)
+        if cached is not None:
+            return cached * sign
 
-        material_value = 0.0
-        for square, piece in board.piece_map().items():
-            # print(square, piece)
-            piece_value = 0.0
-            if piece.piece_type == chess.PAWN:
-                piece_value = self._evaluate_pawn(board, square, piece)
-            elif piece.piece_type == chess.KNIGHT:
-                piece_value = 30.0
-            elif piece.piece_type == chess.BISHOP:
-                piece_value = 30.0
-            elif piece.piece_type == chess.ROOK:
-                piece_value = self._evaluate_rook(board, square, piece)
-            elif piece.piece_type == chess.QUEEN:
-                piece_value = self._evaluate_queen(board, square, piece)
-            if color_to_play is piece.color:
-                material_value += piece_value
+        if board.is_checkmate():
+            # Whoever is to move got mated
+            if board.turn != color_to_play:
+                return 10000.0 - num_moves
             else:
-                material_value -= piece_value
+                return (10000.0 - num_moves) * -1.0
 
-        evaluation += material_value
-        self._position_table[epd_key] = evaluation
+        evaluation = self._material_value(board)
+        self._position_table.put(key, evaluation)
 
         # if board.is_check() and board.turn == color_to_play:
         #     evaluation -= 100.0
         # elif board.is_check() and board.turn != color_to_play:
         #     evaluation += 100.0
 
-        return EvalReturnType(
-            move=board.move_stack[len(board.move_stack) - (num_moves + 1)],
-            eval=evaluation,
-            line=line,
-        )
+        return evaluation * sign
 
-    def _evaluate_pawn(
-        self, board: chess.Board, square: chess.Square, piece: chess.Piece
-    ) -> float:
-        return 10.0 * PAWN_EVAL_DICT[piece.color][square]
+    def evaluate_many(
+        self, boards: Iterable[chess.Board], color_to_play: chess.Color = chess.WHITE
+    ):
+        """Static evaluation of a whole batch of boards in one go with NumPy
 
-    def _evaluate_rook(
-        self, board: chess.Board, square: chess.Square, piece: chess.Piece
-    ) -> float:
-        file = chess.square_file(square)
-        open_file = True
+        Scores the same material, piece square, pawn structure and rook file
+        terms as evaluate() but doesn't look for mates or touch the cache.
+
+        Args:
+            boards (Iterable[chess.Board]): Positions to score
+            color_to_play (chess.Color): Whose point of view the scores are from
 
-        # # Check for file being open
-        for i in range(0, 7):
-            square_to_check = chess.square(file, i)
-            if square_to_check == square:
-                continue
+        Returns:
+            numpy.ndarray: One float64 score per board
+        """
+        # numpy is only needed for batch work, so only pull it in here
+        from pychess_ai.evaluator.batch import evaluate_many
+
+        return evaluate_many(boards, color_to_play)
+
+    def set_position(self, board: chess.Board) -> None:
+        """Start incremental evaluation from this position
+
+        After this the search should make and take back moves through push()
+        and pop() so the running score stays in step with the board.
+        """
+        self._score_stack = [self._full_material_value(board)]
+        self._root_length = len(board.move_stack)
+        self._board = board
+
+    def push(self, board: chess.Board, move: chess.Move) -> None:
+        """Play a move on the board and update the running score"""
+        if self._score_stack:
+            self._score_stack.append(
+                self._score_stack[-1] + self._move_delta(board, move)
+            )
+        board.push(move)
+
+    def pop(self, board: chess.Board) -> chess.Move:
+        """Take back a move played with push()"""
+        if len(self._score_stack) > 1:
+            self._score_stack.pop()
+        return board.pop()
+
+    def _material_value(self, board: chess.Board) -> float:
+        """Material and positional score from white's point of view"""
+        if board is self._board and self._root_length + len(
+            self._score_stack
+        ) - 1 == len(board.move_stack):
+            return self._score_stack[-1] + self._positional_value(board)
+        return self._full_material_value(board) + self._positional_value(board)
+
+    @staticmethod
+    def _full_material_value(board: chess.Board) -> float:
+        """Sum of every piece's piece square value, the slow way"""
+        material_value = 0.0
+        for square, piece in board.piece_map().items():
+            material_value += PIECE_SQUARE_VALUES[piece.color][piece.piece_type][square]
+        return material_value
+
+    @staticmethod
+    def _move_delta(board: chess.Board, move: chess.Move) -> float:
+        """How much the piece square score changes when move is played"""
+        if not move:
+            return 0.0
+        color = board.turn
+        values = PIECE_SQUARE_VALUES[color]
+        piece_type = board.piece_type_at(move.from_square)
+        to_piece_type = move.promotion if move.promotion else piece_type
+        delta = (
+            values[to_piece_type][move.to_square] - values[piece_type][move.from_square]
+        )
+
+        if piece_type == chess.KING and board.is_castling(move):
+            # Kings are worth nothing here but the rook hops over
+            rank = chess.square_rank(move.from_square)
+            if board.is_kingside_castling(move):
+                rook_to = chess.square(5, rank)
+                rook_from = chess.square(7, rank)
             else:
-                piece_in_way = board.piece_at(square_to_check)
-                if piece_in_way is None:
-                    continue
-                if piece_in_way.color != piece.color or (
-                    piece_in_way.color == piece.color
-                    and piece_in_way.piece_type != chess.QUEEN
-                    and piece_in_way.piece_type != chess.ROOK
-                ):
-                    open_file = False
+                rook_to = chess.square(3, rank)
+                rook_from = chess.square(0, rank)
+            # Chess960 castling is encoded as the king taking its own rook
+            if board.piece_type_at(move.to_square) == chess.ROOK:
+                rook_from = move.to_square
+            return values[chess.ROOK][rook_to] - values[chess.ROOK][rook_from]
 
-        eval = 50.0
+        if board.is_en_passant(move):
+            capture_square = move.to_square + (-8 if color == chess.WHITE else 8)
+            captured = chess.PAWN
+        else:
+            capture_square = move.to_square
+            captured = board.piece_type_at(capture_square)
+        if captured:
+            delta -= PIECE_SQUARE_VALUES[not color][captured][capture_square]
+        return delta
 
-        if open_file:
-            eval = (eval) * 1.25
+    @staticmethod
+    def _positional_value(board: chess.Board) -> float:
+        """Pawn structure and rook file terms from white's point of view
 
-        eval = eval * ROOK_EVAL_DICT[piece.color][square]
+        Everything here is a handful of bitboard ANDs per file or per pawn,
+        these are the parts of the evaluation that depend on where the other
+        pieces are so they can't be kept incrementally.
+        """
+        value = 0.0
+        pawns = board.pawns
+        for color in chess.COLORS:
+            own_pawns = pawns & board.occupied_co[color]
+            enemy_pawns = pawns & board.occupied_co[not color]
+            color_value = 0.0
 
-        return eval
+            for file in range(8):
+                on_file = chess.popcount(own_pawns & chess.BB_FILES[file])
+                if on_file == 0:
+                    continue
+                color_value -= DOUBLED_PAWN_PENALTY * (on_file - 1)
+                if not own_pawns & ADJACENT_FILE_MASKS[file]:
+                    color_value -= ISOLATED_PAWN_PENALTY * on_file
 
-    def _evaluate_queen(
-        self, board: chess.Board, square: chess.Square, piece: chess.Piece
-    ) -> float:
-        return 90.0 * QUEEN_EVAL_DICT[piece.color][square]
+            passed_masks = PASSED_PAWN_MASKS[color]
+            for square in chess.scan_forward(own_pawns):
+                if not enemy_pawns & passed_masks[square]:
+                    color_value += PASSED_PAWN_BONUS
+
+            # Rooks like files without their own pawns, even more so no pawns
+            rook_values = ROOK_EVAL_DICT[color]
+            for square in chess.scan_forward(board.rooks & board.occupied_co[color]):
+                file_mask = chess.BB_FILES[square & 7]
+                if own_pawns & file_mask:
+                    continue
+                if enemy_pawns & file_mask:
+                    bonus = ROOK_SEMI_OPEN_FILE_BONUS - 1.0
+                else:
+                    bonus = ROOK_OPEN_FILE_BONUS - 1.0
+                color_value += bonus * ROOK_BASE_VALUE * rook_values[square]
+
+            value += color_value if color == chess.WHITE else -color_value
+        return value
@@ -0,0 +1,438 @@
+"""Self-play tournaments between two engine configurations
+
+Plays ChessAi against ChessAi over a pool of worker processes. Every
+opening is played twice with the colours swapped so neither side gets the
+better half of an opening. Reports the Elo difference of the first engine
+over the second with a 95% error bar, and can stop early once a sequential
+probability ratio test (SPRT) has made up its mind. Run it with
+
+    python main.py tournament openings.epd --first ABP,depth=3,null_move=1 \\
+        --second ABP,depth=3 --games 200 --sprt 0 10
+
+Engines are given as the Algo name followed by key=value settings: depth,
+time (seconds per move) and anything else goes to the algo as an option.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pychess_ai.algos import Algo
+from pychess_ai.analysis import read_epd
+from pychess_ai.chessai import ChessAi
+from typing import Callable, List, NamedTuple, Optional, TextIO
+import argparse
+import chess
+import chess.pgn
+import logging
+import math
+import os
+import sys
+
+# Games that get this long are called a draw
+DEFAULT_MAX_PLIES = 200
+
+# 95% confidence
+CONFIDENCE_Z = 1.959964
+
+
+class EngineConfig(NamedTuple):
+    name: str
+    algo_type: Algo = Algo.ABP
+    depth: int = 3
+    move_time: Optional[float] = None  # seconds, depth is then only a cap
+    options: Optional[dict] = None  # extra MiniMaxABP/NegaMaxPVS arguments
+
+
+class GameSpec(NamedTuple):
+    index: int
+    fen: str
+    white: EngineConfig
+    black: EngineConfig
+    max_plies: int = DEFAULT_MAX_PLIES
+
+
+class GameResult(NamedTuple):
+    index: int
+    fen: str
+    white: str  # config names
+    black: str
+    result: str  # "1-0", "0-1" or "1/2-1/2"
+    reason: str  # how it finished
+    plies: int
+    moves: List[str]  # uci
+
+
+def score_to_elo(score: float) -> float:
+    """Elo difference that makes score the expected score"""
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return 400.0 * math.log10(score / (1.0 - score))
+
+
+def elo_to_score(elo: float) -> float:
+    """Expected score against someone elo points weaker"""
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+@dataclass
+class MatchResult:
+    """Wins, draws and losses from the first engine's point of view"""
+
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+
+    def add(self, score: float) -> None:
+        if score == 1.0:
+            self.wins += 1
+        elif score == 0.0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        if self.games == 0:
+            return 0.5
+        return (self.wins + 0.5 * self.draws) / self.games
+
+    @property
+    def variance(self) -> float:
+        """Variance of the score of a single game"""
+        if self.games == 0:
+            return 0.0
+        score = self.score
+        return (
+            self.wins * (1.0 - score) ** 2
+            + self.draws * (0.5 - score) ** 2
+            + self.losses * score ** 2
+        ) / self.games
+
+    @property
+    def elo(self) -> float:
+        return score_to_elo(self.score)
+
+    @property
+    def elo_error(self) -> float:
+        """Half the width of the 95% confidence interval on elo"""
+        if self.games == 0:
+            return math.inf
+        margin = CONFIDENCE_Z * math.sqrt(self.variance / self.games)
+        low = score_to_elo(self.score - margin)
+        high = score_to_elo(self.score + margin)
+        return (high - low) / 2.0
+
+    def llr(self, elo0: float, elo1: float) -> float:
+        """Log likelihood ratio of elo1 over elo0, using the normal
+        approximation to the trinomial distribution of game results"""
+        variance = self.variance
+        if variance == 0.0:
+            return 0.0
+        score0 = elo_to_score(elo0)
+        score1 = elo_to_score(elo1)
+        return (
+            self.games
+            * (score1 - score0)
+            * (2.0 * self.score - score0 - score1)
+            / (2.0 * variance)
+        )
+
+
+class Sprt(NamedTuple):
+    """Test H0 elo <= elo0 against H1 elo >= elo1"""
+
+    elo0: float = 0.0
+    elo1: float = 10.0
+    alpha: float = 0.05  # chance of accepting H1 when H0 is true
+    beta: float = 0.05  # chance of accepting H0 when H1 is true
+
+    @property
+    def bounds(self) -> tuple:
+        return (
+            math.log(self.beta / (1.0 - self.alpha)),
+            math.log((1.0 - self.beta) / self.alpha),
+        )
+
+    def status(self, result: MatchResult) -> Optional[str]:
+        """H0 or H1 once either can be accepted, None to keep playing"""
+        lower, upper = self.bounds
+        llr = result.llr(self.elo0, self.elo1)
+        if llr >= upper:
+            return "H1"
+        if llr <= lower:
+            return "H0"
+        return None
+
+
+def read_openings(path: str) -> List[str]:
+    """Starting FENs, the position at the end of every game in a .pgn file
+    or one per line of an EPD/FEN file (anything else)"""
+    with open(path) as handle:
+        if not path.lower().endswith(".pgn"):
+            return [job.fen for job in read_epd(handle)]
+        openings = []
+        while True:
+            game = chess.pgn.read_game(handle)
+            if game is None:
+                return openings
+            openings.append(game.end().board().fen())
+
+
+def parse_engine(spec: str) -> EngineConfig:
+    """EngineConfig from "ALGO,key=value,...", e.g. "PVS,depth=4,lmr=1"."""
+    fields = spec.split(",")
+    try:
+        algo_type = Algo[fields[0].upper()]
+    except KeyError:
+        raise ValueError("Unknown algo {!r}".format(fields[0]))
+    depth = 3
+    move_time = None
+    options = {}
+    for field in fields[1:]:
+        key, _, value = field.partition("=")
+        if key == "depth":
+            depth = int(value)
+        elif key == "time":
+            move_time = float(value)
+        else:
+            try:
+                options[key] = int(value)
+            except ValueError:
+                options[key] = value
+    return EngineConfig(spec, algo_type, depth, move_time, options)
+
+
+def make_player(config: EngineConfig, color: chess.Color, fen: str) -> ChessAi:
+    return ChessAi(
+        config.algo_type,
+        config.depth,
+        color,
+        fen,
+        logging_level=logging.WARNING,
+        move_time=config.move_time,
+        options=config.options,
+    )
+
+
+def play_game(spec: GameSpec) -> GameResult:
+    """Play one game out, a draw if it runs past max_plies"""
+    board = chess.Board(spec.fen)
+    players = {
+        chess.WHITE: make_player(spec.white, chess.WHITE, spec.fen),
+        chess.BLACK: make_player(spec.black, chess.BLACK, spec.fen),
+    }
+    moves = []
+    try:
+        while not board.is_game_over(claim_draw=True) and len(moves) < spec.max_plies:
+            move = players[board.turn].get_next_move(board.turn)
+            san = board.san(move)
+            board.push(move)
+            moves.append(move.uci())
+            for player in players.values():
+                player.update_with_move(san)
+    finally:
+        for player in players.values():
+            player.close()
+
+    outcome = board.outcome(claim_draw=True)
+    if outcome is None:
+        result, reason = "1/2-1/2", "max plies"
+    else:
+        result, reason = outcome.result(), outcome.termination.name.lower()
+    return GameResult(
+        spec.index,
+        spec.fen,
+        spec.white.name,
+        spec.black.name,
+        result,
+        reason,
+        len(moves),
+        moves,
+    )
+
+
+def game_specs(
+    first: EngineConfig,
+    second: EngineConfig,
+    openings: List[str],
+    games: int,
+    max_plies: int = DEFAULT_MAX_PLIES,
+):
+    """Game pairs, each opening with first as white then as black, going
+    round the openings again if there are more games than openings"""
+    for index in range(games):
+        fen = openings[(index // 2) % len(openings)]
+        if index % 2 == 0:
+            yield GameSpec(index, fen, first, second, max_plies)
+        else:
+            yield GameSpec(index, fen, second, first, max_plies)
+
+
+def first_score(game: GameResult) -> float:
+    """Score of the first engine, which plays white in even games"""
+    white_score = {"1-0": 1.0, "0-1": 0.0}.get(game.result, 0.5)
+    return white_score if game.index % 2 == 0 else 1.0 - white_score
+
+
+def run_tournament(
+    first: EngineConfig,
+    second: EngineConfig,
+    openings: List[str],
+    games: int,
+    workers: Optional[int] = None,
+    sprt: Optional[Sprt] = None,
+    max_plies: int = DEFAULT_MAX_PLIES,
+    on_game: Optional[Callable[[GameResult, MatchResult], None]] = None,
+) -> tuple:
+    """Play up to games games between first and second
+
+    Args:
+        first (EngineConfig): Engine the results are reported for
+        second (EngineConfig): Engine it plays against
+        openings (List[str]): Starting FENs, each played with both colours
+        games (int): Most games to play
+        workers (int): Processes in the pool, defaults to one per CPU
+        sprt (Sprt): Stop as soon as this test accepts either hypothesis
+        max_plies (int): Games running longer than this are a draw
+        on_game (Callable): Called with each game and the running totals
+
+    Returns:
+        tuple: The MatchResult and "H0"/"H1" if the SPRT stopped it, or None
+    """
+    if not openings:
+        raise ValueError("Need at least one opening")
+    workers = workers or os.cpu_count() or 1
+    result = MatchResult()
+    decision = None
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        specs = game_specs(first, second, openings, games, max_plies)
+        pending = set()
+        while decision is None:
+            # Only a couple of games per worker queued at once, so an SPRT
+            # stop doesn't have a pile of them to throw away
+            for spec in specs:
+                pending.add(pool.submit(play_game, spec))
+                if len(pending) >= workers * 2:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                game = future.result()
+                result.add(first_score(game))
+                if on_game is not None:
+                    on_game(game, result)
+            if sprt is not None:
+                decision = sprt.status(result)
+        for future in pending:
+            future.cancel()
+    return result, decision
+
+
+def write_pgn(game: GameResult, output: TextIO) -> None:
+    board = chess.Board(game.fen)
+    pgn = chess.pgn.Game.from_board(board)
+    pgn.headers["Event"] = "pychess_ai tournament"
+    pgn.headers["Round"] = str(game.index + 1)
+    pgn.headers["White"] = game.white
+    pgn.headers["Black"] = game.black
+    pgn.headers["Result"] = game.result
+    pgn.headers["Termination"] = game.reason
+    node = pgn
+    for uci in game.moves:
+        node = node.add_variation(chess.Move.from_uci(uci))
+    print(pgn, file=output, end="\n\n")
+
+
+def format_result(result: MatchResult) -> str:
+    return "W {} D {} L {}  Score {:.1%}  Elo {:+.1f} +/- {:.1f}".format(
+        result.wins,
+        result.draws,
+        result.losses,
+        result.score,
+        result.elo,
+        result.elo_error,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py tournament",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("openings", help=".epd/.fen or .pgn file of openings")
+    parser.add_argument("--first", required=True, help="engine to test")
+    parser.add_argument("--second", required=True, help="engine to test against")
+    parser.add_argument("--games", type=int, default=100, help="most games to play")
+    parser.add_argument("--workers", type=int, help="processes (one per CPU)")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument(
+        "--sprt",
+        type=float,
+        nargs=2,
+        metavar=("ELO0", "ELO1"),
+        help="stop once elo <= ELO0 or elo >= ELO1 is accepted",
+    )
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--pgn", help="write the games here")
+    args = parser.parse_args(argv)
+
+    try:
+        first = parse_engine(args.first)
+        second = parse_engine(args.second)
+    except ValueError as error:
+        parser.error(str(error))
+    sprt = None
+    if args.sprt:
+        sprt = Sprt(args.sprt[0], args.sprt[1], args.alpha, args.beta)
+
+    pgn = open(args.pgn, "w") if args.pgn else None
+
+    def on_game(game: GameResult, result: MatchResult) -> None:
+        line = "Game {} {} vs {}: {} ({})  {}".format(
+            game.index + 1,
+            game.white,
+            game.black,
+            game.result,
+            game.reason,
+            format_result(result),
+        )
+        if sprt is not None:
+            lower, upper = sprt.bounds
+            line += "  LLR {:.2f} [{:.2f}, {:.2f}]".format(
+                result.llr(sprt.elo0, sprt.elo1), lower, upper
+            )
+        print(line)
+        if pgn is not None:
+            write_pgn(game, pgn)
+
+    try:
+        result, decision = run_tournament(
+            first,
+            second,
+            read_openings(args.openings),
+            args.games,
+            args.workers,
+            sprt,
+            args.max_plies,
+            on_game,
+        )
+    finally:
+        if pgn is not None:
+            pgn.close()
+
+    print("{} vs {}: {}".format(first.name, second.name, format_result(result)))
+    if decision is not None:
+        print("SPRT: {} accepted".format(decision))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,359 @@
+"""UCI front end
+
+Speaks enough of the Universal Chess Interface for GUIs and match runners
+like cutechess to drive the engine. Commands are read on the main thread
+and searches run on a worker thread, so stop and isready get answered
+straight away even in the middle of a search. Run it with
+
+    python main.py uci
+"""
+from pychess_ai.algos import Algo, MiniMaxABP, NegaMaxPVS, SearchLimits, TimeManager
+from pychess_ai.algos.transposition import MATE_THRESHOLD, PACKED_ENTRY
+from pychess_ai.evaluator import EvalReturnType
+from typing import List, Optional, TextIO
+import chess
+import os
+import sys
+import threading
+
+ENGINE_NAME = "pychess_ai"
+ENGINE_AUTHOR = "drc56"
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 1024
+MAX_THREADS = 64
+
+
+def score_to_uci(score: float) -> str:
+    """Evaluator score (pawn = 10) as a UCI score, mates as mate in moves"""
+    if score > MATE_THRESHOLD:
+        plies = int(round(10000 - score)) + 1
+        return "mate {}".format((plies + 1) // 2)
+    if score < -MATE_THRESHOLD:
+        plies = int(round(10000 + score)) + 1
+        return "mate -{}".format(plies // 2)
+    return "cp {}".format(int(round(score * 10)))
+
+
+class UciEngine:
+    """State of one UCI session, feed it lines with handle()"""
+
+    def __init__(
+        self,
+        output: TextIO = sys.stdout,
+        algo_type: Algo = Algo.ABP,
+    ):
+        self._output = output
+        self._output_lock = threading.Lock()
+        self._algo_type = algo_type
+        self._hash_mb = DEFAULT_HASH_MB
+        self._threads = 1
+        self._algo = None
+        self._board = chess.Board()
+        self._search_thread = None
+        # Set once an infinite search may hand in its move
+        self._release = threading.Event()
+        # What a go ponder would have searched with as a plain go, used once
+        # ponderhit arrives, and the timer that then stops it
+        self._pondering = None
+        self._ponder_timer = None
+
+    def send(self, line: str) -> None:
+        with self._output_lock:
+            self._output.write(line + "\n")
+            self._output.flush()
+
+    def handle(self, line: str) -> bool:
+        """Deal with one command, False once it's time to quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send("id name {}".format(ENGINE_NAME))
+            self.send("id author {}".format(ENGINE_AUTHOR))
+            self.send(
+                "option name Hash type spin default {} min 1 max {}".format(
+                    DEFAULT_HASH_MB, MAX_HASH_MB
+                )
+            )
+            self.send(
+                "option name Threads type spin default 1 min 1 max {}".format(
+                    MAX_THREADS
+                )
+            )
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self._set_option(args)
+        elif command == "ucinewgame":
+            self._finish_search()
+            self._board = chess.Board()
+        elif command == "position":
+            self._finish_search()
+            self._set_position(args)
+        elif command == "go":
+            self._finish_search()
+            self._go(args)
+        elif command == "ponderhit":
+            self._ponder_hit()
+        elif command == "stop":
+            self._stop_search()
+        elif command == "quit":
+            self._stop_search()
+            if self._algo is not None:
+                self._algo.close()
+                self._algo = None
+            return False
+        return True
+
+    def run(self, lines) -> None:
+        """Handle commands until quit or the input runs dry"""
+        for line in lines:
+            if not self.handle(line):
+                return
+        # Out of input, let the last search hand in its move before going
+        self._finish_search()
+        self.handle("quit")
+
+    def _set_option(self, args: List[str]) -> None:
+        # setoption name <name> value <value>, names can have spaces
+        if "name" not in args:
+            return
+        name_start = args.index("name") + 1
+        if "value" in args:
+            value_start = args.index("value")
+            name = " ".join(args[name_start:value_start])
+            value = " ".join(args[value_start + 1 :])
+        else:
+            name = " ".join(args[name_start:])
+            value = ""
+        try:
+            if name.lower() == "hash":
+                self._hash_mb = min(max(int(value), 1), MAX_HASH_MB)
+            elif name.lower() == "threads":
+                self._threads = min(max(int(value), 1), MAX_THREADS)
+            else:
+                return
+        except ValueError:
+            return
+        self._finish_search()
+        # Rebuilt with the new settings at the next go
+        if self._algo is not None:
+            self._algo.close()
+            self._algo = None
+
+    def _make_algo(self):
+        # Every table the algo can build is packed (a bytearray, shared
+        # memory for Lazy SMP), so Hash is the memory it really takes
+        tt_size = max(self._hash_mb * 1024 * 1024 // PACKED_ENTRY.size, 1)
+        # Extra threads become Lazy SMP helpers
+        algo_class = NegaMaxPVS if self._algo_type == Algo.PVS else MiniMaxABP
+        return algo_class(0, tt_size=tt_size, lazy_smp=self._threads - 1)
+
+    def _set_position(self, args: List[str]) -> None:
+        if not args:
+            return
+        if "moves" in args:
+            moves_start = args.index("moves")
+            moves = args[moves_start + 1 :]
+            args = args[:moves_start]
+        else:
+            moves = []
+        try:
+            if args[0] == "startpos":
+                board = chess.Board()
+            elif args[0] == "fen":
+                board = chess.Board(" ".join(args[1:]))
+            else:
+                return
+            for uci in moves:
+                board.push_uci(uci)
+        except ValueError:
+            return
+        self._board = board
+
+    def _limits(self, args: List[str]) -> tuple:
+        """SearchLimits for the go arguments, whether it's infinite and the
+        TimeManager if we're playing on a clock. With nothing to stop it a
+        search counts as infinite, like a bare go."""
+        values = {}
+        infinite = False
+        index = 0
+        while index < len(args):
+            token = args[index]
+            if token == "infinite":
+                infinite = True
+            elif token == "ponder":
+                pass
+            elif index + 1 < len(args):
+                try:
+                    values[token] = int(args[index + 1])
+                except ValueError:
+                    pass
+                index += 1
+            index += 1
+
+        limits = SearchLimits()
+        if infinite:
+            return limits, True, None
+        if "depth" in values:
+            # The algo searches depth + 1 plies
+            limits.max_depth = max(values["depth"] - 1, 0)
+        if "nodes" in values:
+            limits.max_nodes = values["nodes"]
+        clock = None
+        white = self._board.turn == chess.WHITE
+        time_left = values.get("wtime" if white else "btime")
+        if "movetime" in values:
+            limits.time_limit = values["movetime"] / 1000.0
+        elif time_left is not None:
+            # The hard budget aborts the search, the soft one gets checked
+            # after every iteration in _search
+            clock = TimeManager(
+                time_left / 1000.0,
+                values.get("winc" if white else "binc", 0) / 1000.0,
+                values.get("movestogo"),
+            )
+            limits.time_limit = clock.hard
+        if limits == SearchLimits():
+            return limits, True, None
+        return limits, False, clock
+
+    def _go(self, args: List[str]) -> None:
+        if self._algo is None:
+            self._algo = self._make_algo()
+        limits, infinite, clock = self._limits(args)
+        if self._ponder_timer is not None:
+            self._ponder_timer.cancel()
+            self._ponder_timer = None
+        self._pondering = None
+        if "ponder" in args and not infinite:
+            # Thinking on the opponent's time, so the clock doesn't run and
+            # bestmove waits for ponderhit or stop like an infinite search
+            self._pondering = (limits, clock)
+            limits = SearchLimits(
+                max_nodes=limits.max_nodes, max_depth=limits.max_depth
+            )
+            clock = None
+            infinite = True
+        if infinite:
+            self._release.clear()
+        else:
+            self._release.set()
+        board = self._board.copy()
+        self._search_thread = threading.Thread(
+            target=self._search, args=(board, limits, clock), daemon=True
+        )
+        self._search_thread.start()
+
+    def _search(
+        self,
+        board: chess.Board,
+        limits: SearchLimits,
+        clock: Optional[TimeManager] = None,
+    ) -> None:
+        """Body of the search thread"""
+        algo = self._algo
+
+        def on_iteration(
+            depth: int, result: EvalReturnType, nodes: int, seconds: float
+        ) -> None:
+            # Mated or stalemated, there's no score or line worth sending
+            if result.move is None:
+                return
+            line = " ".join(move.uci() for move in result.line)
+            self.send(
+                "info depth {} score {} nodes {} nps {} time {} pv {}".format(
+                    depth + 1,
+                    score_to_uci(result.eval),
+                    nodes,
+                    int(nodes / seconds) if seconds > 0 else 0,
+                    int(seconds * 1000),
+                    line,
+                )
+            )
+            if clock is not None and clock.should_stop(result, seconds):
+                algo.stop()
+
+        move = algo.get_next_move(board, board.turn, limits, on_iteration)
+        # An infinite search only answers once it's told to stop
+        self._release.wait()
+        if not move:
+            self.send("bestmove 0000")
+            return
+        result = algo.last_result
+        if result is not None and len(result.line) > 1 and result.line[0] == move:
+            self.send("bestmove {} ponder {}".format(move.uci(), result.line[1].uci()))
+        else:
+            self.send("bestmove {}".format(move.uci()))
+
+    def _finish_search(self) -> None:
+        """Let a search with limits run out, GUIs wait for bestmove before
+        moving on anyway, but stop an infinite one"""
+        thread = self._search_thread
+        if thread is None:
+            return
+        if self._release.is_set():
+            thread.join()
+            self._search_thread = None
+        else:
+            self._stop_search()
+
+    def _ponder_hit(self) -> None:
+        """The opponent played the move we were pondering on, the search
+        carries on as the plain go it would have been, its time starting now"""
+        pondering, self._pondering = self._pondering, None
+        if pondering is None or self._search_thread is None:
+            return
+        limits, clock = pondering
+        if limits.time_limit is not None:
+            # Everything searched so far is a head start, the soft budget
+            # is plenty on top of it
+            budget = clock.soft if clock is not None else limits.time_limit
+            self._ponder_timer = threading.Timer(budget, self._algo.stop)
+            self._ponder_timer.daemon = True
+            self._ponder_timer.start()
+        self._release.set()
+
+    def _stop_search(self) -> None:
+        """Stop a running search and wait for its bestmove to go out"""
+        thread = self._search_thread
+        if thread is None:
+            return
+        self._release.set()
+        # Keep asking in case the search thread hadn't got going yet
+        while thread.is_alive():
+            self._algo.stop()
+            thread.join(0.05)
+        self._search_thread = None
+
+
+def read_lines(fd: int):
+    """Lines from a file descriptor, read with os.read rather than through
+    sys.stdin. A search forking worker processes while the main thread sits
+    in sys.stdin.readline would hand the child a stdin lock nobody can ever
+    release, and the child hangs when multiprocessing closes its stdin."""
+    pending = b""
+    while True:
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            break
+        pending += chunk
+        while b"\n" in pending:
+            line, pending = pending.split(b"\n", 1)
+            yield line.decode().strip()
+    if pending:
+        yield pending.decode().strip()
+
+
+def main(algo_type: Algo = Algo.ABP) -> int:
+    engine = UciEngine(sys.stdout, algo_type)
+    engine.run(read_lines(sys.stdin.fileno()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
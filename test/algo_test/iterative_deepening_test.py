@@ -0,0 +1,106 @@
+from pychess_ai.algos import MiniMaxABP, SearchLimits
+from timeit import default_timer as timer
+import chess
+import threading
+
+MATE_FEN = "r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - 0 27"
+MIDDLEGAME_FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+
+
+def test_depth_limit_finds_mate():
+    board = chess.Board(MATE_FEN)
+    algo = MiniMaxABP(1)
+    move = algo.get_next_move(board, board.turn, SearchLimits(max_depth=2))
+    assert board.san(move) == "Qxa2#"
+    assert algo.completed_depth == 2
+
+
+def test_node_limit():
+    board = chess.Board(MIDDLEGAME_FEN)
+    fen = board.fen()
+    algo = MiniMaxABP(1)
+    move = algo.get_next_move(board, board.turn, SearchLimits(max_nodes=50))
+    assert move in board.legal_moves
+    assert algo.nodes <= 50
+    # The board has to come back untouched after an aborted search
+    assert board.fen() == fen
+
+
+def test_time_limit():
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = MiniMaxABP(1)
+    start = timer()
+    move = algo.get_next_move(board, board.turn, SearchLimits(time_limit=0.5))
+    assert timer() - start < 2.0
+    assert move in board.legal_moves
+    assert algo.completed_depth is not None
+
+
+def test_stop_from_other_thread():
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = MiniMaxABP(1)
+    stopper = threading.Timer(0.3, algo.stop)
+    stopper.start()
+    start = timer()
+    move = algo.get_next_move(board, board.turn, SearchLimits())
+    stopper.join()
+    assert timer() - start < 2.0
+    assert move in board.legal_moves
+
+
+def test_reuse_follows_expected_line():
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = MiniMaxABP(3)
+    algo.get_next_move(board, board.turn)
+    line = algo.last_result.line
+    board.push(line[0])
+    board.push(line[1])
+    move = algo.get_next_move(board, board.turn, reuse_tables=True)
+    assert move in board.legal_moves
+    # What's left of the old line got searched first
+    assert algo._expected_result.move == line[2]
+    assert algo._expected_result.line == line[2:]
+
+    # Off the expected line there's nothing to follow
+    board.pop()
+    board.push(next(m for m in board.legal_moves if m != line[1]))
+    algo.get_next_move(board, board.turn, reuse_tables=True)
+    assert algo._expected_result is None
+
+
+def test_stop_between_iterations():
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = MiniMaxABP(1)
+
+    def on_iteration(depth, result, nodes, seconds):
+        if depth == 2:
+            algo.stop()
+
+    move = algo.get_next_move(
+        board, board.turn, SearchLimits(max_depth=5), on_iteration
+    )
+    assert algo.completed_depth == 2
+    assert [iteration.depth for iteration in algo.last_stats.iterations] == [0, 1, 2]
+    assert move == algo.last_result.move
+
+
+def test_tables_aged_once_after_stopped_search():
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = MiniMaxABP(2)
+    algo.get_next_move(board, board.turn)
+    line = algo.last_result.line
+    marker = chess.Move.from_uci("a2a3")
+    # Far deeper than these searches go, so only aging moves it
+    algo._orderer._killers[40] = [marker, None]
+
+    # Pondering on the expected reply, stopped straight away on a miss
+    board.push(line[0])
+    board.push(line[1])
+    algo.get_next_move(board, board.turn, SearchLimits(max_nodes=5), reuse_tables=True)
+    board.pop()
+    board.push(next(m for m in board.legal_moves if m != line[1]))
+    algo.get_next_move(board, board.turn, reuse_tables=True)
+    # Two plies on from the first search, so two plies of aging
+    assert algo._orderer.killers(38)[0] == marker
+    # Entries from the earlier searches are an older generation
+    assert algo._tt.generation == 3
@@ -0,0 +1,92 @@
+from pychess_ai.algos import (
+    Bound,
+    MiniMaxABP,
+    PackedTranspositionTable,
+    SearchLimits,
+    SharedTranspositionTable,
+    lazysmp,
+)
+from pychess_ai.algos.transposition import PACKED_ENTRY
+import chess
+import pickle
+import pytest
+import threading
+
+
+def test_packed_round_trip():
+    table = PackedTranspositionTable(bytearray(PACKED_ENTRY.size * 8), 8)
+    move = chess.Move.from_uci("a7a8n")
+    table.store(1234567, 5, -3.25, Bound.UPPER, move)
+    entry = table.probe(1234567)
+    assert (entry.depth, entry.score, entry.bound, entry.move) == (
+        5,
+        -3.25,
+        Bound.UPPER,
+        move,
+    )
+    assert table.probe(1234567 + 8) is None
+    table.clear()
+    assert table.probe(1234567) is None
+
+
+def test_torn_entry_rejected():
+    buffer = bytearray(PACKED_ENTRY.size)
+    table = PackedTranspositionTable(buffer, 1)
+    table.store(99, 2, 1.5, Bound.EXACT, None)
+    # Scribble over the score like a half finished write from someone else
+    buffer[8] ^= 0xFF
+    assert table.probe(99) is None
+
+
+def test_buffer_too_small():
+    with pytest.raises(ValueError):
+        PackedTranspositionTable(bytearray(10), 8)
+
+
+def test_shared_table_attach_by_name():
+    table = SharedTranspositionTable(16)
+    try:
+        table.store(42, 1, 7.0, Bound.LOWER, None)
+        other = pickle.loads(pickle.dumps(table))
+        assert other.probe(42).score == 7.0
+        other.store(43, 1, 8.0, Bound.EXACT, None)
+        assert table.probe(43).score == 8.0
+        other.close()
+    finally:
+        table.close()
+
+
+def test_lazy_smp_search():
+    board = chess.Board("r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - 0 27")
+    algo = MiniMaxABP(1, lazy_smp=2)
+    try:
+        move = algo.get_next_move(board, board.turn, SearchLimits(max_depth=2))
+        assert board.san(move) == "Qxa2#"
+    finally:
+        algo.close()
+
+
+def test_lazy_smp_and_workers():
+    with pytest.raises(ValueError):
+        MiniMaxABP(1, workers=2, lazy_smp=2)
+
+
+def test_helper_table_size(monkeypatch):
+    # Helpers search into the shared table, they shouldn't build a big one
+    # of their own first
+    sizes = []
+    init = PackedTranspositionTable.__init__
+
+    def recording_init(self, buffer, size):
+        sizes.append(size)
+        init(self, buffer, size)
+
+    monkeypatch.setattr(PackedTranspositionTable, "__init__", recording_init)
+    table = SharedTranspositionTable(64)
+    stop_event = threading.Event()
+    stop_event.set()
+    lazysmp._run_helper(
+        MiniMaxABP, {}, chess.STARTING_FEN, chess.WHITE, table, stop_event, 0
+    )
+    assert max(sizes) == 64
+    table.close()
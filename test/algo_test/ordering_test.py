@@ -0,0 +1,117 @@
+from pychess_ai.algos import BaseChessAlgo, MoveOrderer
+from pychess_ai.algos.ordering import gives_check, static_exchange
+import chess
+import pytest
+
+# White can take a queen with a pawn or a rook, or a knight with the rook
+CAPTURE_FEN = "4k3/8/8/2q1n3/1P6/8/8/2R1K3 w - - 0 1"
+
+
+def test_mvv_lva():
+    board = chess.Board(CAPTURE_FEN)
+    moves = MoveOrderer().order_moves(board, 0)
+    assert moves[:2] == [chess.Move.from_uci("b4c5"), chess.Move.from_uci("c1c5")]
+
+
+def test_tt_move_first():
+    board = chess.Board(CAPTURE_FEN)
+    tt_move = chess.Move.from_uci("e1d2")
+    assert MoveOrderer().order_moves(board, 0, tt_move)[0] == tt_move
+
+
+def test_killers_and_history():
+    board = chess.Board()
+    orderer = MoveOrderer()
+    move = chess.Move.from_uci("g1f3")
+    orderer.record_cutoff(board, move, 3, 4)
+    assert orderer.killers(3)[0] == move
+    assert orderer.history(move) == 16
+    assert orderer.order_moves(board, 3)[0] == move
+    # A different ply doesn't have that killer, but history still helps
+    assert orderer.order_moves(board, 2)[0] == move
+
+
+def test_age():
+    board = chess.Board()
+    orderer = MoveOrderer()
+    move = chess.Move.from_uci("g1f3")
+    orderer.record_cutoff(board, move, 3, 4)
+    orderer.age(2)
+    # Two plies on, ply 3 of the last search is ply 1 of the next
+    assert orderer.killers(1)[0] == move
+    assert orderer.killers(3) == [None, None]
+    assert orderer.history(move) == 8
+
+
+def test_captures_not_killers():
+    board = chess.Board(CAPTURE_FEN)
+    orderer = MoveOrderer()
+    orderer.record_cutoff(board, chess.Move.from_uci("b4c5"), 1, 2)
+    assert orderer.killers(1) == [None, None]
+
+
+def test_check_capture_order_no_duplicates():
+    # Rxb5 is a capture, Rg1+ is a check
+    board = chess.Board("6k1/8/8/1q6/8/8/8/KR6 w - - 0 1")
+    moves = list(BaseChessAlgo.generate_check_capture_move_list_order(board))
+    assert len(moves) == len(set(moves)) == board.legal_moves.count()
+    kinds = [
+        0 if board.gives_check(move) else 1 if board.is_capture(move) else 2
+        for move in moves
+    ]
+    assert kinds == sorted(kinds)
+    assert kinds.count(0) > 0 and kinds.count(1) > 0
+
+
+@pytest.mark.parametrize(
+    "fen,uci,see",
+    [
+        # Pawn takes an undefended pawn
+        ("4k3/8/8/3p4/4P3/8/8/4K3 w - - 0 1", "e4d5", 10),
+        # Queen takes a pawn the other pawn defends
+        ("4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1", "d1d5", -80),
+        # Rook takes a pawn defended by a rook, with a second rook behind it
+        ("3rk3/8/8/3p4/8/8/3R4/3RK3 w - - 0 1", "d2d5", 10),
+        ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6", 10),
+    ],
+)
+def test_static_exchange(fen, uci, see):
+    board = chess.Board(fen)
+    assert static_exchange(board, chess.Move.from_uci(uci)) == see
+
+
+def test_order_captures_drops_losing():
+    board = chess.Board("4k3/8/4p3/3p4/4P3/8/8/3QK3 w - - 0 1")
+    assert MoveOrderer().order_captures(board) == [(10, chess.Move.from_uci("e4d5"))]
+
+
+def test_order_captures_pseudo_legal():
+    # The knight is pinned, taking the pawn would leave the king in check
+    board = chess.Board("4r1k1/8/8/3p4/8/4N3/8/4K3 w - - 0 1")
+    capture = chess.Move.from_uci("e3d5")
+    assert MoveOrderer().order_captures(board) == []
+    assert MoveOrderer().order_captures(board, pseudo_legal=True) == [(10, capture)]
+    assert board.is_into_check(capture)
+
+
+@pytest.mark.parametrize(
+    "fen",
+    [
+        chess.STARTING_FEN,
+        # Discovered checks, bishop behind the knight and rook behind the pawn
+        "4k3/8/8/8/1B6/2N5/8/4RK2 w - - 0 1",
+        "4k3/4P3/8/8/8/8/8/4R1K1 w - - 0 1",
+        # Promotions onto the king's lines, one of them capturing
+        "3nk3/2P5/8/8/8/8/8/6K1 w - - 0 1",
+        # Castling with the rook landing on the king's file, and en passant
+        # uncovering a check along the rank
+        "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+        "8/8/8/K2pP2q/8/8/8/7k w - d6 0 2",
+        "8/8/8/k2pP2R/8/8/8/7K w - d6 0 2",
+        "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+    ],
+)
+def test_gives_check(fen):
+    board = chess.Board(fen)
+    for move in board.pseudo_legal_moves:
+        assert gives_check(board, move) == board.gives_check(move), move
@@ -0,0 +1,51 @@
+from pychess_ai.algos import MiniMaxABP, SearchLimits, parallel
+import chess
+import multiprocessing
+import pytest
+
+POSITIONS = [
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8",
+    "2Q5/1p1r2kp/p4pq1/6p1/2P5/1PB5/P4PPK/4r3 w - - 0 42",
+    "r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - 0 27",
+    # Lots of equal moves, so the tie break has to line up with the serial one
+    "4k3/8/8/8/8/8/8/4K3 w - - 0 1",
+]
+
+
+@pytest.fixture(scope="module")
+def parallel_algo():
+    algo = MiniMaxABP(2, workers=2)
+    yield algo
+    algo.close()
+
+
+@pytest.mark.parametrize("fen", POSITIONS)
+def test_matches_serial(parallel_algo, fen):
+    board = chess.Board(fen)
+    serial = MiniMaxABP(2).get_next_move(board, board.turn)
+    assert parallel_algo.get_next_move(board, board.turn) == serial
+    assert board.fen() == fen
+
+
+def test_limits(parallel_algo):
+    board = chess.Board(POSITIONS[0])
+    move = parallel_algo.get_next_move(board, board.turn, SearchLimits(time_limit=0.5))
+    assert move in board.legal_moves
+
+
+def test_worker_new_search():
+    # Run the worker side in this process, every new root ages its table once
+    parallel._init_worker(
+        MiniMaxABP,
+        {},
+        1000,
+        multiprocessing.Value("d", MiniMaxABP.BASE_ALPHA_VAL),
+        multiprocessing.Event(),
+    )
+    tt = parallel._worker_algo._tt
+    generation = tt.generation
+    for fen in [POSITIONS[0], POSITIONS[0], POSITIONS[1]]:
+        board = chess.Board(fen)
+        move = next(iter(board.legal_moves))
+        parallel._search_root_move(fen, move.uci(), 1, board.turn)
+    assert tt.generation == generation + 2
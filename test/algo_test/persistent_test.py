@@ -0,0 +1,167 @@
+from pychess_ai.algos import persistent
+from pychess_ai.algos import (
+    Bound,
+    MappedEvalCache,
+    MappedTranspositionTable,
+    MiniMaxABP,
+    NegaMaxPVS,
+)
+import chess
+import os
+import pickle
+import pytest
+
+FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+
+
+def test_table_survives_reopening(tmp_path):
+    path = str(tmp_path / "tt.bin")
+    move = chess.Move.from_uci("e7e8q")
+    table = MappedTranspositionTable(path, 64)
+    table.store(1234, 3, 12.5, Bound.LOWER, move)
+    table.close()
+    table.close()
+
+    # The size in the file wins over the one asked for
+    table = MappedTranspositionTable(path, 8)
+    assert len(table) == 64
+    entry = table.probe(1234)
+    assert entry.depth == 3
+    assert entry.score == 12.5
+    assert entry.bound == Bound.LOWER
+    assert entry.move == move
+    table.close()
+
+
+def test_generation_kept_in_file(tmp_path):
+    path = str(tmp_path / "tt.bin")
+    table = MappedTranspositionTable(path, 1)
+    table.new_search()
+    table.store(5, 8, 1.0, Bound.EXACT, None)
+    table.close()
+
+    # A later run starts a new generation, so the old deep entry gives way
+    table = MappedTranspositionTable(path, 1)
+    assert table.generation == 1
+    table.new_search()
+    assert table.generation == 2
+    table.store(6, 1, 2.0, Bound.EXACT, None)
+    assert table.probe(5) is None
+    assert table.probe(6).score == 2.0
+    table.close()
+
+
+def test_table_pickles_by_path(tmp_path):
+    table = MappedTranspositionTable(str(tmp_path / "tt.bin"), 64)
+    other = pickle.loads(pickle.dumps(table))
+    other.store(99, 1, -4.0, Bound.EXACT, None)
+    assert table.probe(99).score == -4.0
+    other.close()
+    table.close()
+
+
+def test_not_a_cache_file(tmp_path):
+    path = tmp_path / "junk.bin"
+    path.write_bytes(b"definitely not a cache file")
+    with pytest.raises(ValueError):
+        MappedTranspositionTable(str(path), 64)
+
+
+def test_rebuilt_when_out_of_date(tmp_path, monkeypatch):
+    path = str(tmp_path / "eval.bin")
+    cache = MappedEvalCache(path, file_entries=64, entries=8)
+    cache.put(42, 3.5)
+    cache.close()
+
+    # Scores from another version of the evaluator are no use
+    monkeypatch.setattr(persistent, "EVAL_VERSION", persistent.EVAL_VERSION + 1)
+    cache = MappedEvalCache(path, file_entries=32, entries=8)
+    assert cache.get(42) is None
+    cache.close()
+    assert (
+        os.path.getsize(path)
+        == persistent.FILE_HEADER.size + 32 * persistent.PACKED_ENTRY.size
+    )
+
+    # Same for a file in an older layout
+    old = tmp_path / "old.bin"
+    old.write_bytes(b"PYCAICH1" + bytes(100))
+    table = MappedTranspositionTable(str(old), 16)
+    assert len(table) == 16
+    table.close()
+
+
+def test_rebuild_leaves_old_mappings_alone(tmp_path, monkeypatch):
+    path = str(tmp_path / "tt.bin")
+    old = MappedTranspositionTable(path, 64)
+    old.store(7, 2, 1.5, Bound.EXACT, None)
+
+    # Someone else rebuilds the file to a smaller size, truncating it in
+    # place would crash the next access here with SIGBUS
+    monkeypatch.setattr(persistent, "FORMAT_VERSION", persistent.FORMAT_VERSION + 1)
+    new = MappedTranspositionTable(path, 8)
+    assert len(new) == 8
+    assert new.probe(7) is None
+    assert old.probe(7).score == 1.5
+    old.store(8, 1, 2.5, Bound.EXACT, None)
+    old.close()
+    new.close()
+    assert os.listdir(tmp_path) == ["tt.bin"]
+
+
+def test_rebuilt_for_other_search_options(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    options = {"null_move": True, "lmr": False, "futility": False}
+    table, cache = persistent.open_cache(cache_dir, 64, options)
+    table.store(11, 4, 3.0, Bound.EXACT, None)
+    # Workers get attached with the same options, not a rebuilt file
+    other = pickle.loads(pickle.dumps(table))
+    assert other.probe(11).score == 3.0
+    for opened in (table, cache, other):
+        opened.close()
+
+    table, cache = persistent.open_cache(cache_dir, 64, dict(options))
+    assert table.probe(11).score == 3.0
+    table.close()
+    cache.close()
+
+    # Pruning differently stores different scores
+    table, cache = persistent.open_cache(cache_dir, 64, dict(options, lmr=True))
+    assert table.probe(11) is None
+    table.close()
+    cache.close()
+
+
+def test_eval_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / "eval.bin")
+    cache = MappedEvalCache(path, file_entries=64, entries=8)
+    cache.put(42, 3.5)
+    cache.close()
+
+    cache = MappedEvalCache(path, file_entries=64, entries=8)
+    assert cache.get(42) == 3.5
+    assert cache.get(43) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+
+@pytest.mark.parametrize("algo_class", [MiniMaxABP, NegaMaxPVS])
+def test_warm_start(tmp_path, algo_class):
+    cache_dir = str(tmp_path / "cache")
+    board = chess.Board(FEN)
+    plain = algo_class(2)
+    expected = plain.get_next_move(board, board.turn)
+
+    cold = algo_class(2, tt_size=1 << 12, cache_dir=cache_dir)
+    assert cold.get_next_move(board, board.turn) == expected
+    cold.close()
+
+    # A new algo picks up everything the last one left in the files
+    warm = algo_class(2, tt_size=1 << 12, cache_dir=cache_dir)
+    assert warm.get_next_move(board, board.turn) == expected
+    assert warm.last_result.eval == plain.last_result.eval
+    assert warm.nodes < cold.nodes / 10
+    warm.close()
+    # Both files get let go of
+    assert warm._tt._file.buffer is None
+    assert warm._eval_cache._file.buffer is None
@@ -0,0 +1,72 @@
+from pychess_ai.algos import MiniMax, MiniMaxABP, NegaMaxPVS, SearchLimits
+from pychess_ai.algos.ordering import SEE_VALUES
+from pychess_ai.algos.searchboard import SearchBoard
+from pychess_ai.evaluator import EvalReturnType
+import chess
+import pytest
+
+
+def test_result_has_slots():
+    result = EvalReturnType(move=None, eval=1.0, line=[])
+    with pytest.raises(AttributeError):
+        result.extra = 1
+
+
+@pytest.mark.parametrize("limits", [None, SearchLimits(max_depth=2)])
+def test_principal_variation_is_legal(limits):
+    board = chess.Board(
+        "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+    )
+    algo = MiniMaxABP(2)
+    move = algo.get_next_move(board, board.turn, limits)
+    result = algo.last_result
+    assert result.move == move
+    assert result.line[0] == move
+    assert len(result.line) == 3
+    copy = board.copy()
+    for pv_move in result.line:
+        assert pv_move in copy.legal_moves
+        copy.push(pv_move)
+
+
+def test_mate_line():
+    board = chess.Board("5k2/7R/2p2KP1/p1p2p2/5P2/1P4q1/P2p4/8 w - - 0 45")
+    algo = MiniMaxABP(2)
+    algo.get_next_move(board, board.turn)
+    assert [board.san(m) for m in algo.last_result.line] == ["Rh8#"]
+    assert algo.last_result.eval == 10000.0
+
+
+def test_minimax_runs():
+    board = chess.Board("5k2/7R/2p2KP1/p1p2p2/5P2/1P4q1/P2p4/8 w - - 0 45")
+    assert board.san(MiniMax(1).get_next_move(board, board.turn)) == "Rh8#"
+
+
+def test_quiescence_sees_recapture():
+    # One ply deep the queen would happily take the pawn if the search
+    # stopped right after, the recapture only shows up in quiescence
+    board = chess.Board("4k3/8/4p3/3p4/8/8/8/3QK3 w - - 0 1")
+    move = MiniMaxABP(0).get_next_move(board, board.turn)
+    assert move != chess.Move.from_uci("d1d5")
+
+
+@pytest.mark.parametrize("algo_class", [MiniMaxABP, NegaMaxPVS])
+@pytest.mark.parametrize(
+    "fen",
+    ["4k3/8/8/8/8/8/1p6/1R2K3 w - - 0 1", "1r2k3/1P6/8/8/8/8/8/4K3 b - - 0 1"],
+)
+def test_quiescence_takes_advanced_pawn(algo_class, fen):
+    # Taking the pawn on its 7th only gets a pawn back by SEE, but it's
+    # worth the best part of a rook to the evaluator. With alpha past what
+    # delta pruning thinks a pawn can win, the capture is the only way to
+    # get there.
+    board = SearchBoard(fen)
+    algo = algo_class(0)
+    algo._evaluator.set_position(board)
+    stand_pat = algo._evaluator.evaluate_score(board, 0, board.turn)
+    alpha = stand_pat + SEE_VALUES[chess.PAWN] + algo.DELTA_MARGIN + 5
+    if algo_class is NegaMaxPVS:
+        score = algo._negamax_quiescence(board, alpha, 99999, 0, board.turn, 2)
+    else:
+        score = algo._quiescence_search(board, alpha, 99999, 0, True, board.turn, 2)
+    assert score > alpha
@@ -0,0 +1,46 @@
+from pychess_ai.algos import Algo, MiniMaxABP, NegaMaxPVS, SearchLimits
+from pychess_ai.chessai import ChessAi
+import chess
+import pytest
+
+MIDDLEGAME_FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+
+
+@pytest.mark.parametrize(
+    "fen,san",
+    [
+        ("r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - 0 27", "Qxa2#"),
+        ("5k2/7R/2p2KP1/p1p2p2/5P2/1P4q1/P2p4/8 w - - 0 45", "Rh8#"),
+        ("2Q5/1p1r2kp/p4pq1/6p1/2P5/1PB5/P4PPK/4r3 w - - 0 42", "Qxd7+"),
+    ],
+)
+def test_finds_best_move(fen, san):
+    board = chess.Board(fen)
+    assert board.san(NegaMaxPVS(2).get_next_move(board, board.turn)) == san
+
+
+def test_same_result_as_alpha_beta():
+    board = chess.Board(MIDDLEGAME_FEN)
+    abp = MiniMaxABP(2)
+    pvs = NegaMaxPVS(2)
+    assert abp.get_next_move(board, board.turn) == pvs.get_next_move(board, board.turn)
+    assert abp.last_result.eval == pvs.last_result.eval
+
+
+def test_aspiration_window_misses():
+    # A tiny window misses nearly every iteration and has to be widened
+    board = chess.Board(MIDDLEGAME_FEN)
+    wide = NegaMaxPVS(2)
+    narrow = NegaMaxPVS(2)
+    narrow.ASPIRATION_WINDOW = 0.01
+    limits = SearchLimits(max_depth=2)
+    assert wide.get_next_move(board, board.turn, limits) == narrow.get_next_move(
+        board, board.turn, limits
+    )
+    assert wide.last_result.eval == narrow.last_result.eval
+    assert narrow.last_result.line[0] == narrow.last_result.move
+
+
+def test_selectable_from_chessai():
+    chess_ai = ChessAi(Algo.PVS, 1)
+    assert isinstance(chess_ai._ai, NegaMaxPVS)
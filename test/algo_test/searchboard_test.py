@@ -0,0 +1,82 @@
+from pychess_ai.algos import MiniMaxABP, SearchBoard
+import chess
+import chess.polyglot
+import pytest
+import random
+
+POSITIONS = [
+    chess.STARTING_FEN,
+    # Castling both ways, en passant and promotions all come up from these
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+    "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def assert_same(search_board: SearchBoard, board: chess.Board) -> None:
+    assert search_board.fen() == board.fen()
+    assert search_board.zobrist_hash() == chess.polyglot.zobrist_hash(board)
+    assert search_board.promoted == board.promoted
+
+
+@pytest.mark.parametrize("fen", POSITIONS)
+def test_matches_chess_board(fen):
+    """Random make/unmake against a plain chess.Board"""
+    rng = random.Random(fen)
+    for game in range(20):
+        board = chess.Board(fen)
+        search_board = SearchBoard.from_board(board)
+        for ply in range(rng.randint(1, 60)):
+            moves = list(board.legal_moves)
+            assert list(search_board.legal_moves) == moves
+            if not moves:
+                break
+            if board.move_stack and rng.random() < 0.2:
+                assert search_board.pop() == board.pop()
+            elif not board.is_check() and rng.random() < 0.05:
+                board.push(chess.Move.null())
+                search_board.push(chess.Move.null())
+            else:
+                move = rng.choice(moves)
+                board.push(move)
+                search_board.push(move)
+            assert_same(search_board, board)
+        while board.move_stack:
+            search_board.pop()
+            board.pop()
+            assert_same(search_board, board)
+
+
+def test_from_board_leaves_the_board_alone():
+    board = chess.Board(POSITIONS[1])
+    board.push_san("O-O")
+    search_board = SearchBoard.from_board(board)
+    search_board.push_san("O-O-O")
+    assert board.fen() != search_board.fen()
+    assert len(board.move_stack) == 1
+    assert not search_board.move_stack[:-1]
+
+
+def test_other_edits_keep_the_key():
+    search_board = SearchBoard(POSITIONS[3])
+    search_board.push_san("dxc8=Q")
+    copy = search_board.copy()
+    assert copy.zobrist_hash() == search_board.zobrist_hash()
+
+    search_board.remove_piece_at(chess.C8)
+    search_board.set_piece_at(chess.H3, chess.Piece(chess.QUEEN, chess.BLACK))
+    assert search_board.zobrist_hash() == chess.polyglot.zobrist_hash(search_board)
+    mirror = search_board.mirror()
+    assert mirror.zobrist_hash() == chess.polyglot.zobrist_hash(mirror)
+    search_board.set_fen(POSITIONS[4])
+    assert search_board.zobrist_hash() == chess.polyglot.zobrist_hash(search_board)
+
+
+def test_search_leaves_caller_board_alone():
+    board = chess.Board(POSITIONS[1])
+    algo = MiniMaxABP(1)
+    algo.get_next_move(board, board.turn)
+    assert type(board) is chess.Board
+    assert board.fen() == POSITIONS[1]
+    assert not board.move_stack
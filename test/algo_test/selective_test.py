@@ -0,0 +1,52 @@
+from pychess_ai.algos import MiniMaxABP, NegaMaxPVS, SearchLimits
+import chess
+import pytest
+
+MIDDLEGAME_FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+
+OPTIONS = [
+    {"null_move": True},
+    {"lmr": True},
+    {"futility": True},
+    {"null_move": True, "lmr": True, "futility": True},
+]
+
+
+@pytest.mark.parametrize("algo_class", [MiniMaxABP, NegaMaxPVS])
+@pytest.mark.parametrize("options", OPTIONS)
+@pytest.mark.parametrize(
+    "fen,san",
+    [
+        ("r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - 0 27", "Qxa2#"),
+        ("2Q5/1p1r2kp/p4pq1/6p1/2P5/1PB5/P4PPK/4r3 w - - 0 42", "Qxd7+"),
+    ],
+)
+def test_still_finds_best_move(algo_class, options, fen, san):
+    board = chess.Board(fen)
+    algo = algo_class(2, **options)
+    assert board.san(algo.get_next_move(board, board.turn)) == san
+
+
+@pytest.mark.parametrize("algo_class", [MiniMaxABP, NegaMaxPVS])
+def test_fewer_nodes(algo_class):
+    board = chess.Board(MIDDLEGAME_FEN)
+    limits = SearchLimits(max_depth=3)
+    full = algo_class(3)
+    full.get_next_move(board, board.turn, limits)
+    selective = algo_class(3, null_move=True, lmr=True, futility=True)
+    selective.get_next_move(board, board.turn, limits)
+    assert selective.nodes < full.nodes
+
+
+def test_no_null_move_in_pawn_endings():
+    algo = MiniMaxABP(3, null_move=True)
+    board = chess.Board("8/8/4k3/4p3/4P3/4K3/8/8 w - - 0 1")
+    board.push(chess.Move.from_uci("e3d3"))
+    assert not algo._null_move_allowed(board, 3, False)
+    board = chess.Board("6n1/8/4k3/4p3/4P3/4K3/8/6N1 w - - 0 1")
+    board.push(chess.Move.from_uci("e3d3"))
+    board.push(chess.Move.from_uci("e6d6"))
+    assert algo._null_move_allowed(board, 3, False)
+    # Never two in a row
+    board.push(chess.Move.null())
+    assert not algo._null_move_allowed(board, 3, False)
@@ -0,0 +1,53 @@
+from pychess_ai.algos import (
+    Algo,
+    IterationStats,
+    MiniMax,
+    MiniMaxABP,
+    NegaMaxPVS,
+    SearchLimits,
+    SearchStats,
+)
+from pychess_ai.chessai import ChessAi
+import chess
+import pytest
+
+MIDDLEGAME_FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+
+
+@pytest.mark.parametrize("algo_class", [MiniMaxABP, NegaMaxPVS])
+def test_search_stats(algo_class):
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = algo_class(2)
+    algo.get_next_move(board, board.turn, SearchLimits(max_depth=2))
+    stats = algo.last_stats
+    assert stats.nodes == algo.nodes
+    assert 0 < stats.quiescence_nodes < stats.nodes
+    assert 0 < stats.first_move_cutoffs <= stats.beta_cutoffs
+    assert stats.cache_hits + stats.cache_misses > 0
+    assert [iteration.depth for iteration in stats.iterations] == [0, 1, 2]
+    assert sum(iteration.nodes for iteration in stats.iterations) == stats.nodes
+    assert stats.branching_factor > 1.0
+    assert stats.time > 0
+
+
+def test_minimax_stats():
+    board = chess.Board(MIDDLEGAME_FEN)
+    algo = MiniMax(0)
+    algo.get_next_move(board, board.turn)
+    stats = algo.last_stats
+    assert stats.nodes == board.legal_moves.count()
+    assert stats.iterations == [IterationStats(0, stats.nodes, stats.time)]
+
+
+def test_rates_without_data():
+    stats = SearchStats()
+    assert stats.first_move_cutoff_rate == 0.0
+    assert stats.cache_hit_rate == 0.0
+    assert stats.branching_factor == 0.0
+
+
+def test_chessai_stats():
+    chess_ai = ChessAi(Algo.ABP, 1)
+    assert chess_ai.last_stats is None
+    chess_ai.take_turn()
+    assert chess_ai.last_stats.nodes > 0
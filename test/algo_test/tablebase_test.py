@@ -0,0 +1,54 @@
+from pychess_ai.algos import MiniMaxABP, NegaMaxPVS
+from pychess_ai.algos.tablebase import TB_WIN_SCORE, open_tablebase
+import chess
+import pytest
+
+# White queen takes the rook and it's a known win
+QUEEN_VS_ROOK_FEN = "8/8/8/4k3/8/2r5/8/K1Q5 w - - 0 1"
+
+
+class QueenWinsTablebase:
+    """Stands in for the Syzygy files: white wins any king and queen vs
+    lone king ending, nothing else is covered"""
+
+    def get_wdl(self, board):
+        if (
+            chess.popcount(board.occupied) == 3
+            and board.pieces(chess.QUEEN, chess.WHITE)
+            and chess.popcount(board.occupied_co[chess.BLACK]) == 1
+        ):
+            return 2 if board.turn == chess.WHITE else -2
+        return None
+
+    def get_dtz(self, board):
+        wdl = self.get_wdl(board)
+        return None if wdl is None else wdl // 2
+
+
+@pytest.mark.parametrize("algo_class", [MiniMaxABP, NegaMaxPVS])
+def test_interior_probe_cuts_subtree(algo_class):
+    board = chess.Board(QUEEN_VS_ROOK_FEN)
+    algo = algo_class(2, syzygy_pieces=3)
+    algo._tablebase = QueenWinsTablebase()
+    move = algo.get_next_move(board, board.turn)
+    assert board.san(move) == "Qxc3+"
+    assert algo.last_result.eval == TB_WIN_SCORE
+
+
+def test_root_probe_skips_search():
+    board = chess.Board("8/8/8/4k3/8/8/8/K1Q5 w - - 0 1")
+    algo = MiniMaxABP(2, syzygy_pieces=3)
+    algo._tablebase = QueenWinsTablebase()
+    move = algo.get_next_move(board, board.turn)
+    assert move in board.legal_moves
+    assert algo.nodes == 0
+    assert algo.last_result.eval == TB_WIN_SCORE
+
+
+def test_missing_tables_fall_back_to_search(tmp_path):
+    board = chess.Board("8/8/8/4k3/8/8/8/K1Q5 w - - 0 1")
+    algo = MiniMaxABP(1, syzygy_path=str(tmp_path))
+    assert algo.get_next_move(board, board.turn) in board.legal_moves
+    assert algo.nodes > 0
+    # Same handle for the same directory
+    assert open_tablebase(str(tmp_path)) is algo._tablebase
@@ -0,0 +1,55 @@
+from pychess_ai.algos import TimeManager
+from pychess_ai.evaluator import EvalReturnType
+import chess
+import pytest
+
+E4 = chess.Move.from_uci("e2e4")
+D4 = chess.Move.from_uci("d2d4")
+
+
+def result(move: chess.Move, score: float = 0.0) -> EvalReturnType:
+    return EvalReturnType(move=move, eval=score, line=[move])
+
+
+def test_budgets():
+    clock = TimeManager(60.0, 1.0)
+    assert clock.soft == pytest.approx((60.0 - clock.MOVE_OVERHEAD) / 30 + 0.5)
+    assert clock.hard == pytest.approx(clock.soft * clock.HARD_FACTOR)
+    assert clock.limits(5).time_limit == clock.hard
+    # Fewer moves to the time control, more time for each
+    assert TimeManager(60.0, 1.0, 10).soft > clock.soft
+    # Never more than half the clock, however few moves are left
+    short = TimeManager(1.0, 0.0, 1)
+    assert short.hard <= 0.5
+    assert TimeManager(0.0).hard > 0
+
+
+def test_stable_best_move_stops_early():
+    clock = TimeManager(60.0)
+    seconds = 0.0
+    for _ in range(clock.STABLE_ITERATIONS + 1):
+        seconds += 0.01
+        clock.should_stop(result(E4), seconds)
+    assert clock.budget == pytest.approx(clock.soft * clock.STABLE_FACTOR)
+    assert clock.should_stop(result(E4), clock.soft * 0.6)
+
+
+def test_unstable_or_dropping_gets_longer():
+    clock = TimeManager(60.0)
+    assert not clock.should_stop(result(E4, 10.0), 0.01)
+    # Best move changed and the score dropped
+    assert not clock.should_stop(result(D4, 0.0), 0.02)
+    assert clock.budget > clock.soft * 1.5
+    assert clock.budget <= clock.hard
+
+
+def test_stops_when_next_iteration_wont_fit():
+    clock = TimeManager(60.0)
+    clock.should_stop(result(E4), 0.01)
+    # Another iteration like the last one would blow the hard budget
+    assert clock.should_stop(result(D4), clock.hard * 0.5)
+
+
+def test_mate_stops():
+    clock = TimeManager(60.0)
+    assert clock.should_stop(result(E4, 9990.0), 0.01)
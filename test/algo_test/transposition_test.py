@@ -0,0 +1,79 @@
+from pychess_ai.algos import (
+    Bound,
+    MiniMaxABP,
+    PackedTranspositionTable,
+    TranspositionTable,
+    zobrist_key,
+)
+from pychess_ai.algos.transposition import PACKED_ENTRY
+import chess
+import pytest
+
+
+def test_store_and_probe():
+    table = TranspositionTable(64)
+    board = chess.Board()
+    key = zobrist_key(board)
+    move = chess.Move.from_uci("e2e4")
+    table.store(key, 3, 12.5, Bound.EXACT, move)
+
+    entry = table.probe(key)
+    assert entry.depth == 3
+    assert entry.score == 12.5
+    assert entry.bound == Bound.EXACT
+    assert entry.move == move
+
+
+def test_probe_miss_on_collision():
+    table = TranspositionTable(1)
+    table.store(5, 1, 1.0, Bound.EXACT, None)
+    assert table.probe(6) is None
+
+
+def test_deeper_entry_kept():
+    table = TranspositionTable(1)
+    table.store(5, 4, 1.0, Bound.EXACT, None)
+    table.store(6, 1, 2.0, Bound.EXACT, None)
+    assert table.probe(5).score == 1.0
+    assert table.probe(6) is None
+
+
+@pytest.mark.parametrize(
+    "table", [TranspositionTable(1), PackedTranspositionTable(None, 1)]
+)
+def test_older_generation_replaced(table):
+    table.store(5, 4, 1.0, Bound.EXACT, chess.Move.from_uci("e2e4"))
+    table.new_search()
+    # Shallower, but the deep entry is from the last search
+    table.store(6, 1, 2.0, Bound.EXACT, None)
+    assert table.probe(5) is None
+    assert table.probe(6).score == 2.0
+    table.store(5, 4, 1.0, Bound.EXACT, chess.Move.from_uci("e2e4"))
+    assert table.probe(5).move == chess.Move.from_uci("e2e4")
+    # Same generation, depth wins again
+    table.store(6, 1, 2.0, Bound.EXACT, None)
+    assert table.probe(6) is None
+
+
+def test_mate_scores_relative_to_node():
+    table = TranspositionTable(64)
+    table.store(1, 2, 9995.0, Bound.EXACT, None, ply=3)
+    # Reached two plies later it's a mate two plies further from the root
+    assert table.score_from_tt(table.probe(1).score, 5) == 9993.0
+
+
+def test_transposition_same_move():
+    # Searching with the table should pick the same move as a cold search
+    fen = "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+    cold = MiniMaxABP(2, tt_size=1)
+    warm = MiniMaxABP(2)
+    board = chess.Board(fen)
+    assert cold.get_next_move(board, chess.WHITE) == warm.get_next_move(
+        board, chess.WHITE
+    )
+
+
+def test_packed_table_is_the_default():
+    algo = MiniMaxABP(1, tt_size=1000)
+    assert isinstance(algo._tt, PackedTranspositionTable)
+    assert len(algo._tt._buffer) == 1000 * PACKED_ENTRY.size
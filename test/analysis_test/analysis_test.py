@@ -0,0 +1,68 @@
+from pychess_ai.algos import Algo
+from pychess_ai.analysis import analyse, read_epd, read_pgn, read_positions
+import chess
+import io
+import json
+
+EPD = """
+# Mates in one
+r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - bm Qxa2#; id "m1";
+5k2/7R/2p2KP1/p1p2p2/5P2/1P4q1/P2p4/8 w - - bm Rh8#; id "m2";
+not an epd line
+2Q5/1p1r2kp/p4pq1/6p1/2P5/1PB5/P4PPK/4r3 w - - am Kh3; id "hang";
+"""
+
+PGN = """[Event "One"]
+
+1. e4 e5 2. Nf3 *
+
+[Event "Two"]
+
+1. d4 *
+"""
+
+
+def test_read_epd():
+    jobs = list(read_epd(EPD.splitlines()))
+    assert [job.id for job in jobs] == ["m1", "m2", "hang"]
+    assert jobs[0].best_moves == ["d5a2"]
+    assert jobs[2].avoid_moves == ["h2h3"]
+
+
+def test_read_pgn():
+    jobs = list(read_pgn(io.StringIO(PGN)))
+    assert [job.id for job in jobs] == ["0.0", "0.1", "0.2", "1.0"]
+    assert jobs[0].fen == chess.STARTING_FEN
+    assert [job.index for job in jobs] == [0, 1, 2, 3]
+
+
+def test_read_positions_by_extension(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN)
+    assert len(list(read_positions(str(path)))) == 4
+
+
+def test_analyse_streams_jsonl():
+    output = io.StringIO()
+    totals = analyse(
+        read_epd(EPD.splitlines()),
+        output,
+        Algo.ABP,
+        depth=1,
+        workers=1,
+        max_in_flight=1,
+    )
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(result["id"] for result in results) == ["hang", "m1", "m2"]
+    assert all(result["matches"] for result in results)
+    assert all(result["nodes"] > 0 for result in results)
+    assert totals["positions"] == 3
+    assert totals["matched"] == totals["checked"] == 3
+
+
+def test_analyse_with_time_limit():
+    output = io.StringIO()
+    jobs = read_pgn(io.StringIO(PGN))
+    totals = analyse(jobs, output, Algo.PVS, depth=1, time_limit=0.5, workers=1)
+    assert totals["positions"] == 4
+    assert totals["checked"] == 0
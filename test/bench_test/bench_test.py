@@ -0,0 +1,29 @@
+from pychess_ai.algos import Algo
+from pychess_ai.bench import BENCH_POSITIONS, compare, run_bench
+import json
+
+
+def test_report_for_every_algo():
+    report = run_bench(depth=0, positions=BENCH_POSITIONS[:2])
+    assert set(report) == {algo.name for algo in Algo}
+    for result in report.values():
+        assert len(result["positions"]) == 2
+        assert result["nodes"] == sum(p["nodes"] for p in result["positions"])
+        assert result["nodes"] > 0
+    # Has to survive a trip through JSON for CI
+    assert json.loads(json.dumps(report)) == report
+
+
+def test_signature_is_repeatable():
+    first = run_bench([Algo.ABP], depth=1, positions=BENCH_POSITIONS[:3])
+    second = run_bench([Algo.ABP], depth=1, positions=BENCH_POSITIONS[:3])
+    assert first["ABP"]["signature"] == second["ABP"]["signature"]
+    assert compare(first, second, slowdown=1.0) == []
+
+
+def test_compare_flags_changes():
+    report = run_bench([Algo.ABP], depth=0, positions=BENCH_POSITIONS[:1])
+    changed = json.loads(json.dumps(report))
+    changed["ABP"]["signature"] += 1
+    changed["ABP"]["nps"] *= 2
+    assert len(compare(changed, report, slowdown=0.1)) == 2
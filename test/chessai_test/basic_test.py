@@ -1,7 +1,56 @@
 from pychess_ai.chessai import ChessAi
 from pychess_ai.algos import Algo
+import chess
+import pytest
 
 
 def test_construction():
     chess_ai = ChessAi(Algo.ABP)
     assert isinstance(chess_ai, ChessAi)
+
+
+def test_move_time_and_options():
+    chess_ai = ChessAi(
+        Algo.PVS, 6, move_time=0.2, options={"null_move": True, "lmr": True}
+    )
+    move = chess_ai.get_next_move(chess.WHITE)
+    assert move in chess.Board().legal_moves
+    assert chess_ai.last_stats.time < 2.0
+    chess_ai.close()
+
+
+def test_move_time_needs_stoppable_algo():
+    with pytest.raises(ValueError):
+        ChessAi(Algo.NO_ABP, 1, move_time=1.0)
+
+
+def test_turns_carry_on_from_last_search():
+    chess_ai = ChessAi(Algo.PVS, 2)
+    chess_ai.take_turn()
+    reply = chess_ai._ai.last_result.line[1]
+    assert chess_ai.update_with_move(chess_ai._board.san(reply))
+    chess_ai.take_turn()
+    assert chess_ai._ai._expected_result is not None
+
+
+def test_clock():
+    chess_ai = ChessAi(Algo.PVS, 3)
+    chess_ai.take_turn(time_left=3.0, increment=0.1)
+    stats = chess_ai.last_stats
+    assert stats.time < 1.5
+    # The clock decides how deep, not the depth it was set up with
+    assert stats.iterations
+    chess_ai.close()
+
+
+def test_clock_forced_move():
+    # Only the king can move
+    chess_ai = ChessAi(Algo.ABP, 3, starting_fen="k7/8/8/8/8/8/1q6/K7 w - - 0 1")
+    move = chess_ai.get_next_move(chess.WHITE, time_left=10.0)
+    assert move == chess.Move.from_uci("a1b2")
+    assert chess_ai.last_stats is None
+
+
+def test_clock_needs_stoppable_algo():
+    with pytest.raises(ValueError):
+        ChessAi(Algo.NO_ABP, 1).get_next_move(chess.WHITE, time_left=10.0)
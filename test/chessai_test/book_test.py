@@ -0,0 +1,63 @@
+from pychess_ai.algos import Algo
+from pychess_ai.chessai import BookSelection, ChessAi, book_move, open_book
+import chess
+import chess.polyglot
+import pytest
+import struct
+
+
+def write_book(path, entries):
+    """Write (board, move, weight) entries as a Polyglot book"""
+    records = []
+    for board, move, weight in entries:
+        raw_move = move.to_square | move.from_square << 6
+        records.append((chess.polyglot.zobrist_hash(board), raw_move, weight))
+    with open(path, "wb") as book:
+        for key, raw_move, weight in sorted(records):
+            book.write(struct.pack(">QHHI", key, raw_move, weight, 0))
+
+
+@pytest.fixture
+def book_path(tmp_path):
+    path = tmp_path / "book.bin"
+    board = chess.Board()
+    write_book(
+        path,
+        [
+            (board, chess.Move.from_uci("e2e4"), 10),
+            (board, chess.Move.from_uci("d2d4"), 1),
+        ],
+    )
+    return str(path)
+
+
+def test_best_move(book_path):
+    reader = open_book(book_path)
+    move = book_move(reader, chess.Board(), BookSelection.BEST)
+    assert move == chess.Move.from_uci("e2e4")
+
+
+def test_weighted_move(book_path):
+    reader = open_book(book_path)
+    moves = {book_move(reader, chess.Board()) for _ in range(50)}
+    assert moves <= {chess.Move.from_uci("e2e4"), chess.Move.from_uci("d2d4")}
+
+
+def test_out_of_book(book_path):
+    board = chess.Board()
+    board.push_san("a3")
+    assert book_move(open_book(book_path), board) is None
+
+
+def test_book_shared(book_path):
+    assert open_book(book_path) is open_book(book_path)
+
+
+def test_chessai_uses_book(book_path):
+    chess_ai = ChessAi(
+        Algo.ABP, 1, book_path=book_path, book_selection=BookSelection.BEST
+    )
+    assert chess_ai.take_turn() == "e4"
+    # Out of book now, so it searches
+    assert chess_ai.update_with_move("e5")
+    assert chess_ai.get_next_move(chess.WHITE) in chess_ai._board.legal_moves
@@ -0,0 +1,54 @@
+from pychess_ai.algos import Algo
+from pychess_ai.chessai import ChessAi
+import chess
+import pytest
+import time
+
+MIDDLEGAME_FEN = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N2N2/PP2BPPP/R2QKB1R w KQ - 0 8"
+
+
+def test_ponder_hit_reuses_search():
+    chess_ai = ChessAi(Algo.ABP, 1, starting_fen=MIDDLEGAME_FEN, ponder=True)
+    chess_ai.take_turn()
+    expected = chess_ai.ponder_move
+    assert expected is not None
+    board = chess_ai._board.copy()
+    assert chess_ai.update_with_move(board.san(expected))
+    # Finishing the ponder search is all it takes, no new search
+    ponder_thread = chess_ai._ponder_thread
+    move = chess_ai.get_next_move(chess.WHITE)
+    assert not ponder_thread.is_alive()
+    assert chess_ai._ponder_thread is None
+    assert move in chess_ai._board.legal_moves
+    assert chess_ai.last_stats.nodes > 0
+
+
+def test_ponder_miss_cancels():
+    chess_ai = ChessAi(Algo.PVS, 2, starting_fen=MIDDLEGAME_FEN, ponder=True)
+    chess_ai.take_turn()
+    expected = chess_ai.ponder_move
+    board = chess_ai._board
+    other = next(move for move in board.legal_moves if move != expected)
+    assert chess_ai.update_with_move(board.san(other))
+    assert chess_ai.ponder_move is None
+    assert chess_ai.take_turn()
+
+
+def test_ponder_needs_stoppable_algo():
+    with pytest.raises(ValueError):
+        ChessAi(Algo.NO_ABP, 1, ponder=True)
+
+
+def test_ponder_hit_keeps_to_move_time():
+    chess_ai = ChessAi(
+        Algo.ABP, 5, starting_fen=MIDDLEGAME_FEN, ponder=True, move_time=0.3
+    )
+    chess_ai.take_turn()
+    expected = chess_ai.ponder_move
+    assert expected is not None
+    assert chess_ai.update_with_move(chess_ai._board.san(expected))
+    start = time.time()
+    move = chess_ai.get_next_move(chess.WHITE)
+    assert time.time() - start < 2.0
+    assert move in chess_ai._board.legal_moves
+    chess_ai.close()
@@ -0,0 +1,34 @@
+from pychess_ai.evaluator import Evaluator
+import chess
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def random_positions(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(1, 120)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if not board.is_checkmate():
+            boards.append(board)
+    return boards
+
+
+@pytest.mark.parametrize("color", [chess.WHITE, chess.BLACK])
+def test_matches_evaluate(color):
+    boards = random_positions(50)
+    scores = Evaluator().evaluate_many(boards, color)
+    expected = [Evaluator(cache_entries=1).evaluate(b, 0, color).eval for b in boards]
+    assert scores.shape == (50,)
+    assert np.allclose(scores, expected)
+
+
+def test_empty_batch():
+    assert Evaluator().evaluate_many([]).shape == (0,)
@@ -0,0 +1,44 @@
+from pychess_ai.evaluator import EvalCache, Evaluator
+import chess
+import pytest
+
+
+def test_hit_and_miss_counts():
+    cache = EvalCache(entries=16)
+    assert cache.get(3) is None
+    cache.put(3, 1.5)
+    assert cache.get(3) == 1.5
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+
+def test_eviction_keeps_capacity():
+    cache = EvalCache(entries=4)
+    for key in range(100):
+        cache.put(key, float(key))
+    assert cache.capacity == 4
+    assert cache.evictions == 96
+    assert cache.get(99) == 99.0
+    assert cache.get(3) is None
+
+
+def test_size_in_mb():
+    cache = EvalCache(size_mb=1)
+    assert cache.capacity == (1024 * 1024) // EvalCache.BYTES_PER_ENTRY
+
+
+def test_bad_size():
+    with pytest.raises(ValueError):
+        EvalCache(entries=0)
+
+
+def test_evaluator_cache_both_colors():
+    evaluator = Evaluator(cache_entries=64)
+    board = chess.Board("4k3/8/8/8/8/8/4P3/R3K3 w - - 0 1")
+    board.push_san("Ra2")
+    white = evaluator.evaluate(board, 0, chess.WHITE)
+    black = evaluator.evaluate(board, 0, chess.BLACK)
+    assert white.eval == -black.eval
+    assert evaluator.cache_hits == 1
+    assert evaluator.cache_misses == 1
@@ -0,0 +1,60 @@
+from pychess_ai.algos import MiniMaxABP
+from pychess_ai.evaluator import Evaluator
+import chess
+import random
+import pytest
+
+
+def full_eval(board: chess.Board) -> float:
+    return Evaluator(cache_entries=1).evaluate(board, 0, chess.WHITE).eval
+
+
+@pytest.mark.parametrize(
+    "fen, moves",
+    [
+        # Castling both ways
+        (
+            "r3k2r/pppq1ppp/2n1bn2/3pp3/3PP3/2N1BN2/PPPQ1PPP/R3K2R w KQkq - 0 1",
+            ["O-O", "O-O-O"],
+        ),
+        # En passant
+        ("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", ["exd6"]),
+        # Promotion with capture
+        ("1n2k3/P7/8/8/8/8/8/4K3 w - - 0 1", ["axb8=Q"]),
+    ],
+)
+def test_special_moves(fen, moves):
+    board = chess.Board(fen)
+    evaluator = Evaluator(cache_entries=1)
+    evaluator.set_position(board)
+    for san in moves:
+        evaluator.push(board, board.parse_san(san))
+        assert evaluator.evaluate(board, 0, chess.WHITE).eval == full_eval(board)
+
+
+def test_random_games_match_full_scan():
+    rng = random.Random(7)
+    for _ in range(10):
+        board = chess.Board()
+        evaluator = Evaluator(cache_entries=1)
+        evaluator.set_position(board)
+        for _ in range(80):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            evaluator.push(board, rng.choice(moves))
+            assert evaluator.evaluate(board, 0, chess.WHITE).eval == full_eval(board)
+        while len(board.move_stack) > 1:
+            evaluator.pop(board)
+            assert evaluator.evaluate(board, 0, chess.WHITE).eval == full_eval(board)
+
+
+def test_other_board_after_search():
+    algo = MiniMaxABP(1)
+    board = chess.Board()
+    algo.get_next_move(board, board.turn)
+    # Same (empty) move stack as the search's root, nothing else in common
+    other = chess.Board("4k3/8/8/8/8/8/8/QQQQK3 w - - 0 1")
+    evaluator = algo._evaluator
+    expected = Evaluator(cache_entries=1).evaluate_score(other, 0, chess.WHITE)
+    assert evaluator.evaluate_score(other, 0, chess.WHITE) == expected
@@ -0,0 +1,54 @@
+from pychess_ai.evaluator import Evaluator
+from pychess_ai.evaluator.evaluator import (
+    DOUBLED_PAWN_PENALTY,
+    ISOLATED_PAWN_PENALTY,
+    PASSED_PAWN_BONUS,
+    ROOK_BASE_VALUE,
+    ROOK_EVAL_DICT,
+    ROOK_OPEN_FILE_BONUS,
+    ROOK_SEMI_OPEN_FILE_BONUS,
+)
+import chess
+import pytest
+
+
+def positional(fen: str) -> float:
+    return Evaluator._positional_value(chess.Board(fen))
+
+
+def test_passed_pawn():
+    # Lone white pawn, nothing can stop it, but it is isolated too
+    assert positional("4k3/8/8/8/3P4/8/8/4K3 w - - 0 1") == pytest.approx(
+        PASSED_PAWN_BONUS - ISOLATED_PAWN_PENALTY
+    )
+
+
+def test_blocked_pawn_not_passed():
+    # Black pawn on the next file over still covers d5, so neither pawn is
+    # passed and both isolated penalties cancel out
+    assert positional("4k3/4p3/8/8/3P4/8/8/4K3 w - - 0 1") == pytest.approx(0.0)
+
+
+def test_doubled_pawns():
+    # Two white d pawns with a c pawn alongside, neither passed
+    fen = "4k3/2ppp3/8/8/3P4/2PP4/8/4K3 w - - 0 1"
+    # Black has three connected pawns, none passed
+    assert positional(fen) == pytest.approx(-DOUBLED_PAWN_PENALTY)
+
+
+def test_rook_files():
+    open_file = positional("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+    assert open_file == pytest.approx(
+        (ROOK_OPEN_FILE_BONUS - 1.0) * ROOK_BASE_VALUE * ROOK_EVAL_DICT[chess.WHITE][0]
+    )
+    semi_open = positional("4k3/p7/8/8/8/8/8/R3K3 w - - 0 1")
+    # Black's a pawn is passed and isolated as well
+    assert semi_open == pytest.approx(
+        (ROOK_SEMI_OPEN_FILE_BONUS - 1.0)
+        * ROOK_BASE_VALUE
+        * ROOK_EVAL_DICT[chess.WHITE][0]
+        - PASSED_PAWN_BONUS
+        + ISOLATED_PAWN_PENALTY
+    )
+    # Own pawn on the file, no bonus, the pawns cancel out
+    assert positional("4k3/p7/8/8/8/8/P7/R3K3 w - - 0 1") == pytest.approx(0.0)
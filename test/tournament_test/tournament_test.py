@@ -0,0 +1,117 @@
+from pychess_ai.algos import Algo
+from pychess_ai.tournament import (
+    EngineConfig,
+    GameSpec,
+    MatchResult,
+    Sprt,
+    elo_to_score,
+    parse_engine,
+    play_game,
+    read_openings,
+    run_tournament,
+    score_to_elo,
+)
+import chess
+import pytest
+
+# White mates with Rh8#, black mates with Qxa2#
+WHITE_MATES = "5k2/7R/2p2KP1/p1p2p2/5P2/1P4q1/P2p4/8 w - - 0 1"
+BLACK_MATES = "r7/ppQ5/k7/3q1N2/3B4/N7/P3rnPP/1KR5 b - - 0 1"
+
+
+def test_elo_score_round_trip():
+    assert score_to_elo(0.5) == 0.0
+    assert score_to_elo(0.75) == pytest.approx(190.85, abs=0.01)
+    for elo in (-300.0, -20.0, 0.0, 35.0, 400.0):
+        assert score_to_elo(elo_to_score(elo)) == pytest.approx(elo)
+
+
+def test_match_result():
+    result = MatchResult(wins=30, draws=40, losses=30)
+    assert result.games == 100
+    assert result.score == 0.5
+    assert result.elo == 0.0
+    # Fewer games make for a wider error bar
+    assert 0 < result.elo_error < MatchResult(3, 4, 3).elo_error
+
+
+def test_sprt():
+    sprt = Sprt(elo0=0.0, elo1=10.0)
+    assert sprt.status(MatchResult(wins=1, draws=1)) is None
+    assert sprt.status(MatchResult(wins=600, draws=800, losses=400)) == "H1"
+    assert sprt.status(MatchResult(wins=400, draws=800, losses=600)) == "H0"
+
+
+def test_parse_engine():
+    config = parse_engine("pvs,depth=4,time=0.5,lmr=1,syzygy_path=/tb")
+    assert config.algo_type == Algo.PVS
+    assert config.depth == 4
+    assert config.move_time == 0.5
+    assert config.options == {"lmr": 1, "syzygy_path": "/tb"}
+    with pytest.raises(ValueError):
+        parse_engine("nope,depth=2")
+
+
+def test_read_openings(tmp_path):
+    epd = tmp_path / "openings.epd"
+    epd.write_text("# comment\n{}\n{}\n".format(WHITE_MATES, BLACK_MATES))
+    assert len(read_openings(str(epd))) == 2
+
+    pgn = tmp_path / "openings.pgn"
+    pgn.write_text('[Event "?"]\n\n1. e4 e5 *\n')
+    board = chess.Board()
+    board.push_san("e4")
+    board.push_san("e5")
+    assert read_openings(str(pgn)) == [board.fen()]
+
+
+def test_play_game_to_mate():
+    strong = EngineConfig("strong", Algo.ABP, 1)
+    weak = EngineConfig("weak", Algo.NO_ABP, 0)
+    game = play_game(GameSpec(0, WHITE_MATES, strong, weak))
+    assert game.result == "1-0"
+    assert game.reason == "checkmate"
+    assert game.moves == ["h7h8"]
+
+
+def test_play_game_max_plies():
+    config = EngineConfig("abp", Algo.ABP, 0, move_time=0.05)
+    game = play_game(GameSpec(0, chess.STARTING_FEN, config, config, max_plies=4))
+    assert game.result == "1/2-1/2"
+    assert game.reason == "max plies"
+    assert game.plies == 4
+
+
+def test_run_tournament_swaps_colours():
+    # Whoever has the move mates straight away, so each game pair is a win
+    # and a loss for the first engine
+    first = EngineConfig("first", Algo.ABP, 1)
+    second = EngineConfig("second", Algo.ABP, 1)
+    games = []
+    result, decision = run_tournament(
+        first,
+        second,
+        [WHITE_MATES, BLACK_MATES],
+        4,
+        workers=1,
+        on_game=lambda game, totals: games.append(game),
+    )
+    assert decision is None
+    assert result == MatchResult(wins=2, draws=0, losses=2)
+    assert sorted(game.index for game in games) == [0, 1, 2, 3]
+    assert all(game.reason == "checkmate" for game in games)
+
+
+def test_run_tournament_sprt_stop():
+    # Evenly matched, so a huge elo1 gets turned down after a few pairs
+    config = EngineConfig("abp", Algo.ABP, 1)
+    result, decision = run_tournament(
+        config,
+        config,
+        [WHITE_MATES, BLACK_MATES],
+        100,
+        workers=1,
+        sprt=Sprt(0.0, 400.0),
+    )
+    assert decision == "H0"
+    assert result.games < 20
@@ -0,0 +1,150 @@
+from pychess_ai.algos import Algo
+from pychess_ai.uci import UciEngine, score_to_uci
+import chess
+import io
+import pytest
+import time
+
+
+def run(commands):
+    output = io.StringIO()
+    UciEngine(output).run(commands)
+    return output.getvalue().splitlines()
+
+
+def test_handshake():
+    lines = run(["uci", "isready"])
+    assert lines[0].startswith("id name")
+    assert "uciok" in lines
+    assert lines[-1] == "readyok"
+
+
+def test_go_depth():
+    lines = run(["position startpos moves e2e4 e7e5", "go depth 2"])
+    infos = [line for line in lines if line.startswith("info")]
+    assert [line.split()[2] for line in infos] == ["1", "2"]
+    assert all(" pv " in line and " nps " in line for line in infos)
+    best = lines[-1].split()
+    assert best[0] == "bestmove"
+    board = chess.Board()
+    board.push_uci("e2e4")
+    board.push_uci("e7e5")
+    assert chess.Move.from_uci(best[1]) in board.legal_moves
+
+
+def test_mate_score():
+    lines = run(
+        ["position fen 5k2/7R/2p2KP1/p1p2p2/5P2/1P4q1/P2p4/8 w - - 0 45", "go depth 1"]
+    )
+    assert "score mate 1" in lines[0]
+    assert lines[-1] == "bestmove h7h8"
+
+
+def test_stop_infinite_answers_straight_away():
+    output = io.StringIO()
+    engine = UciEngine(output)
+    engine.handle("position startpos")
+    engine.handle("go infinite")
+    time.sleep(0.2)
+    engine.handle("isready")
+    assert "readyok" in output.getvalue()
+    assert "bestmove" not in output.getvalue()
+    start = time.time()
+    engine.handle("stop")
+    assert time.time() - start < 2.0
+    assert output.getvalue().splitlines()[-1].startswith("bestmove")
+    assert not engine.handle("quit")
+
+
+@pytest.mark.parametrize("go", ["go", "go ponder"])
+def test_bare_go_waits_for_stop(go):
+    # Nothing limits the search, so it's infinite rather than a search to
+    # the maximum depth that stop then has to sit through
+    output = io.StringIO()
+    engine = UciEngine(output)
+    assert engine._limits(go.split()[1:])[1]
+    engine.handle("position startpos")
+    engine.handle(go)
+    time.sleep(0.2)
+    assert "bestmove" not in output.getvalue()
+    start = time.time()
+    engine.handle("stop")
+    assert time.time() - start < 2.0
+    assert output.getvalue().splitlines()[-1].startswith("bestmove")
+    assert not engine.handle("quit")
+
+
+def test_ponderhit_starts_the_clock():
+    output = io.StringIO()
+    engine = UciEngine(output)
+    engine.handle("position startpos moves e2e4")
+    engine.handle("go ponder wtime 3000 btime 3000")
+    # Way past the hard budget, but the clock only runs after ponderhit
+    time.sleep(0.5)
+    assert "bestmove" not in output.getvalue()
+    start = time.time()
+    engine.handle("ponderhit")
+    engine.handle("isready")
+    engine._finish_search()
+    assert time.time() - start < 1.0
+    assert output.getvalue().splitlines()[-1].startswith("bestmove")
+    assert not engine.handle("quit")
+
+
+def test_setoption():
+    output = io.StringIO()
+    engine = UciEngine(output)
+    engine.handle("setoption name Hash value 1")
+    engine.handle("setoption name Threads value 1")
+    engine.handle("go nodes 200")
+    engine.handle("quit")
+    assert output.getvalue().splitlines()[-1].startswith("bestmove")
+
+
+def test_hash_is_table_memory():
+    engine = UciEngine(io.StringIO())
+    engine.handle("setoption name Hash value 2")
+    engine.handle("go depth 1")
+    buffer = engine._algo._tt._buffer
+    assert len(buffer) <= 2 * 1024 * 1024
+    assert isinstance(buffer, bytearray)
+    engine.handle("quit")
+
+
+def test_score_to_uci():
+    assert score_to_uci(12.5) == "cp 125"
+    assert score_to_uci(9998.0) == "mate 2"
+    assert score_to_uci(-9999.0) == "mate -1"
+
+
+def test_clock_limits():
+    engine = UciEngine(io.StringIO())
+    limits, infinite, clock = engine._limits(
+        "wtime 60000 btime 1000 winc 1000 movestogo 20".split()
+    )
+    assert not infinite
+    assert clock.soft == pytest.approx((60.0 - clock.MOVE_OVERHEAD) / 20 + 0.5)
+    assert limits.time_limit == clock.hard
+    limits, _, clock = engine._limits(["movetime", "500"])
+    assert clock is None
+    assert limits.time_limit == 0.5
+
+
+def test_go_on_clock():
+    output = io.StringIO()
+    engine = UciEngine(output)
+    start = time.time()
+    engine.run(["position startpos", "go wtime 3000 btime 3000"])
+    # A tenth of a second soft, three tenths hard
+    assert time.time() - start < 1.0
+    assert output.getvalue().splitlines()[-1].startswith("bestmove")
+
+
+def test_no_legal_moves():
+    # Checkmated and stalemated, both engines still have to answer
+    for fen in ("7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"):
+        for algo_type in (Algo.ABP, Algo.PVS):
+            output = io.StringIO()
+            UciEngine(output, algo_type).run(["position fen " + fen, "go depth 2"])
+            lines = output.getvalue().splitlines()
+            assert lines == ["bestmove 0000"]